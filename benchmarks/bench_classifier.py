@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""Benchmark IOCClassifier against the previous per-call regex implementation
+
+Usage: python benchmarks/bench_classifier.py [--count N] [--repeat R]
+"""
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.ioc_utils import IOCClassifier
+
+class LegacyIOCClassifier:
+    """The classifier before precompiled dispatch, kept for comparison"""
+    
+    @staticmethod
+    def classify(ioc: str) -> Optional[Tuple[str, str]]:
+        ioc = ioc.strip()
+        if ip_type := LegacyIOCClassifier._classify_ip(ioc):
+            return ip_type
+        if domain := LegacyIOCClassifier._classify_domain(ioc):
+            return ('domain', domain.lower())
+        if hash_type := LegacyIOCClassifier._classify_hash(ioc):
+            return hash_type
+        return None
+        
+    @staticmethod
+    def _classify_ip(ioc: str) -> Optional[Tuple[str, str]]:
+        ipv4_re = r'^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$'
+        if re.fullmatch(ipv4_re, ioc):
+            return ('ip', ioc)
+        ipv6_re = r'^([0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$'
+        if re.fullmatch(ipv6_re, ioc):
+            return ('ip', ioc.lower())
+        return None
+        
+    @staticmethod
+    def _classify_domain(ioc: str) -> Optional[str]:
+        domain_re = r'^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}$'
+        if re.fullmatch(domain_re, ioc):
+            return ioc.lower()
+        return None
+        
+    @staticmethod
+    def _classify_hash(ioc: str) -> Optional[Tuple[str, str]]:
+        ioc = ioc.lower()
+        if re.fullmatch(r'^[a-f0-9]{32}$', ioc):
+            return ('hash', ioc)
+        if re.fullmatch(r'^[a-f0-9]{40}$', ioc):
+            return ('hash', ioc)
+        if re.fullmatch(r'^[a-f0-9]{64}$', ioc):
+            return ('hash', ioc)
+        return None
+
+def make_workload(count: int, seed: int = 7) -> List[str]:
+    """Feed-like mix: IPv4, domains, hashes, some IPv6 and junk lines"""
+    rng = random.Random(seed)
+    hexdigits = '0123456789abcdef'
+    
+    def label() -> str:
+        return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 12)))
+        
+    makers: List[Callable[[], str]] = [
+        lambda: '.'.join(str(rng.randint(0, 255)) for _ in range(4)),
+        lambda: f"{label()}.{label()}.{rng.choice(['com', 'net', 'org', 'ru'])}",
+        lambda: ''.join(rng.choice(hexdigits) for _ in range(rng.choice([32, 40, 64]))),
+        lambda: ':'.join(f"{rng.randint(0, 0xffff):x}" for _ in range(8)),
+        lambda: rng.choice(['# comment', 'N/A', 'indicator', '']),
+    ]
+    weights = [35, 35, 20, 5, 5]
+    return [rng.choices(makers, weights)[0]() for _ in range(count)]
+
+def bench(name: str, classify_many: Callable[[List[str]], list], iocs: List[str], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        classify_many(iocs)
+        best = min(best, time.perf_counter() - start)
+    rate = len(iocs) / best
+    print(f"{name:<28} {best * 1000:9.1f} ms  {rate / 1e6:6.2f} M IOCs/s")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    iocs = make_workload(args.count)
+    legacy = bench('legacy classify', lambda batch: [LegacyIOCClassifier.classify(i) for i in batch],
+                   iocs, args.repeat)
+    current = bench('IOCClassifier.classify_many', IOCClassifier.classify_many, iocs, args.repeat)
+    print(f"speedup: {legacy / current:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config import settings
+
+# Cache entries are keyed per source: (source, ioc_type, ioc)
+CacheKey = Tuple[str, str, str]
+
+# Stored in place of data when a source has no record of the IOC
+NOT_FOUND_ENTRY = {'_status': 'not_found'}
+
+def is_not_found(data: Optional[Dict[str, Any]]) -> bool:
+    """Whether a cached value is a negative (not-found) entry"""
+    return isinstance(data, dict) and data.get('_status') == 'not_found'
+
+def ttl_for(source: str, ioc_type: str, not_found: bool = False) -> int:
+    """TTL in seconds for a source's results on an IOC type (0 never expires)"""
+    ttls = settings.CACHE_TTLS.get(source, {})
+    if not_found:
+        return ttls.get('not_found', settings.CACHE_NEGATIVE_TTL)
+    return ttls.get(ioc_type, ttls.get('default', settings.CACHE_TTL))
+
+class CacheBackend(ABC):
+    """Store for per-source enrichment results with per-source TTLs
+    
+    Backends that are shared between processes set supports_single_flight
+    and implement the fill lock, so only one worker queries a provider for
+    a given key while the others wait for its result.
+    """
+    
+    ttl: Optional[int] = None
+    supports_single_flight = False
+    
+    def expires_at(self, source: str, ioc_type: str, now: float,
+                   not_found: bool = False) -> Optional[float]:
+        """Expiry timestamp for an entry written now (None never expires)"""
+        ttl = self.ttl if self.ttl is not None else ttl_for(source, ioc_type, not_found)
+        return now + ttl if ttl > 0 else None
+        
+    def get(self, source: str, ioc_type: str, ioc: str) -> Optional[Dict[str, Any]]:
+        """Get a source's cached result for an IOC if not expired"""
+        key = (source, ioc_type, ioc)
+        return self.get_many([key]).get(key)
+        
+    def get_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, Dict[str, Any]]:
+        """
+        Get cached results for many (source, ioc_type, ioc) keys in bulk
+        
+        Args:
+            keys: Cache keys to look up
+            
+        Returns:
+            Dict mapping each cached, unexpired key to its source result
+        """
+        return {key: data for key, (data, _) in self.get_entries(keys).items()}
+        
+    @abstractmethod
+    def get_entries(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, Tuple[Dict[str, Any], Optional[float]]]:
+        """Like get_many, but also return each entry's expiry timestamp"""
+        
+    def set(self, source: str, ioc_type: str, ioc: str, data: Dict[str, Any]):
+        """Cache a source's result for an IOC"""
+        self.set_many({(source, ioc_type, ioc): data})
+        
+    @abstractmethod
+    def set_many(self, items: Dict[CacheKey, Dict[str, Any]], timestamp: Optional[float] = None):
+        """
+        Cache many source results, each with its source's TTL
+        
+        Args:
+            items: Source results keyed by (source, ioc_type, ioc)
+            timestamp: When the results were fetched (defaults to now); expiry counts from it
+        """
+        
+    @abstractmethod
+    def clear_expired(self) -> int:
+        """Remove expired entries, returning how many were removed"""
+        
+    def record_access(self, counts: Dict[CacheKey, int]) -> None:
+        """Add hits served elsewhere (e.g. a memory tier) to entries' access counts"""
+        
+    def flush_access(self) -> None:
+        """Write out access counts buffered by this backend"""
+        
+    def hot_expiring(self, before: float, min_hits: int, accessed_since: float,
+                     limit: int = 100) -> List[Tuple[CacheKey, Optional[float]]]:
+        """Frequently used entries expiring before a timestamp (none if untracked)"""
+        return []
+        
+    def acquire_fill(self, key: CacheKey) -> bool:
+        """Try to become the one worker fetching a key (always succeeds when unshared)"""
+        return True
+        
+    def release_fill(self, key: CacheKey) -> None:
+        """Release a fill lock taken with acquire_fill"""
+        
+    def close(self):
+        """Release connections held by the backend"""
+
+def open_backend(name: Optional[str] = None) -> CacheBackend:
+    """
+    Open the configured persistent cache backend
+    
+    Args:
+        name: 'sqlite' or 'redis' (defaults to settings.CACHE_BACKEND)
+        
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    name = name or settings.CACHE_BACKEND
+    if name == 'sqlite':
+        from .db import CacheDB
+        return CacheDB()
+    if name == 'redis':
+        from .redis_backend import RedisCache
+        return RedisCache()
+    raise ValueError(f"Unknown cache backend: {name}")
@@ -0,0 +1,113 @@
+import json
+import zlib
+from typing import Any, Callable, Dict, Union
+
+# Optional faster/smaller codecs
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Encoded payloads start with a format version byte and a codec id byte
+FORMAT_VERSION = 1
+
+class Codec:
+    """Serializer/compressor pair identified by a stable one-byte id"""
+    
+    def __init__(self, codec_id: int, name: str,
+                 dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any],
+                 compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes]):
+        self.id = codec_id
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+        self._compress = compress
+        self._decompress = decompress
+        
+    def encode(self, value: Any) -> bytes:
+        """Serialize and compress a value, prefixed with the version tag"""
+        return bytes((FORMAT_VERSION, self.id)) + self._compress(self._dumps(value))
+        
+    def decode_body(self, body: bytes) -> Any:
+        return self._loads(self._decompress(body))
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+def _identity(data: bytes) -> bytes:
+    return data
+
+CODECS: Dict[str, Codec] = {}
+
+def _register(codec: Codec) -> None:
+    CODECS[codec.name] = codec
+
+_register(Codec(0, 'json', _json_dumps, json.loads, _identity, _identity))
+_register(Codec(1, 'json+zlib', _json_dumps, json.loads,
+                lambda data: zlib.compress(data, 6), zlib.decompress))
+
+if msgpack is not None:
+    _register(Codec(2, 'msgpack+zlib',
+                    lambda value: msgpack.packb(value, use_bin_type=True),
+                    lambda data: msgpack.unpackb(data, raw=False),
+                    lambda data: zlib.compress(data, 6), zlib.decompress))
+
+if msgpack is not None and zstandard is not None:
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    _register(Codec(3, 'msgpack+zstd',
+                    lambda value: msgpack.packb(value, use_bin_type=True),
+                    lambda data: msgpack.unpackb(data, raw=False),
+                    _zstd_compressor.compress, _zstd_decompressor.decompress))
+
+_CODECS_BY_ID = {codec.id: codec for codec in CODECS.values()}
+
+# Ids of codecs whose libraries are missing, for clearer decode errors
+_KNOWN_IDS = {0: 'json', 1: 'json+zlib', 2: 'msgpack+zlib', 3: 'msgpack+zstd'}
+
+def get_codec(name: str) -> Codec:
+    """
+    Look up a codec by name
+    
+    Args:
+        name: Codec name, or 'auto' for the best one available
+        
+    Raises:
+        ValueError: If the codec is unknown or its library isn't installed
+    """
+    if name == 'auto':
+        for preferred in ('msgpack+zstd', 'msgpack+zlib', 'json+zlib'):
+            if preferred in CODECS:
+                return CODECS[preferred]
+    if name not in CODECS:
+        raise ValueError(f"Unknown or unavailable cache codec: {name}. "
+                         f"Available: {', '.join(sorted(CODECS))}")
+    return CODECS[name]
+
+def codec_of(payload: Union[bytes, str]) -> str:
+    """Name of the codec that produced a stored payload ('legacy' for plain JSON text)"""
+    if isinstance(payload, str):
+        return 'legacy'
+    return _KNOWN_IDS.get(payload[1], 'unknown') if len(payload) > 1 else 'unknown'
+
+def decode(payload: Union[bytes, str]) -> Any:
+    """
+    Decode a stored payload written by any registered codec
+    
+    Plain JSON text written before the codec layer existed is also accepted.
+    """
+    if isinstance(payload, str):
+        return json.loads(payload)
+        
+    if len(payload) < 2 or payload[0] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported cache payload format version: {payload[:1]!r}")
+        
+    codec = _CODECS_BY_ID.get(payload[1])
+    if codec is None:
+        raise ValueError(f"Cache payload uses codec {codec_of(payload)!r}, which is not installed")
+    return codec.decode_body(payload[2:])
@@ -1,59 +1,441 @@
-import json
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple, Union
 from config import settings
+from .backend import CacheBackend, CacheKey, NOT_FOUND_ENTRY, is_not_found
+from .codec import decode, get_codec
 
-class CacheDB:
-    """Simple cache implementation using TinyDB"""
+# SQLite caps the number of bound parameters per statement
+_BULK_CHUNK = 500
+
+# Distinct keys with buffered access stamps before they're written out
+_ACCESS_FLUSH_SIZE = 1000
+
+# Bump when the table layout changes; older tables are dropped on open
+_SCHEMA_VERSION = 4
+
+# A stored entry with its fetch time and expiry: (key, data, timestamp, expires_at)
+CacheEntry = Tuple[CacheKey, Dict[str, Any], float, Optional[float]]
+
+class CacheDB(CacheBackend):
+    """Indexed SQLite cache (WAL mode) holding one entry per source and IOC"""
     
-    def __init__(self):
-        self.db_path = settings.CACHE_PATH
+    def __init__(self, db_path: Optional[Union[str, Path]] = None, ttl: Optional[int] = None,
+                 codec: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLite file (defaults to settings.CACHE_PATH)
+            ttl: Fixed TTL for every entry; per-source TTLs from settings if None
+            codec: Payload codec name for writes (defaults to settings.CACHE_CODEC)
+        """
+        self.db_path = Path(db_path or settings.CACHE_PATH)
+        self.ttl = ttl
+        self.codec = get_codec(codec or settings.CACHE_CODEC)
         self._ensure_db_dir()
+        self._lock = threading.Lock()
+        # Hits not yet written to last_access/hits, so reads stay read-only
+        self._pending_access: Dict[CacheKey, int] = {}
+        self._access_lock = threading.Lock()
+        self._access_flushed = time.monotonic()
         
-        # Initialize database
-        from tinydb import TinyDB, Query
-        self.db = TinyDB(self.db_path)
-        self.query = Query()
-        self.ttl = settings.CACHE_TTL
+        # Initialize database; WAL lets the API and watcher read while a batch writes
+        self.conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate_schema()
         
     def _ensure_db_dir(self):
         """Create cache directory if it doesn't exist"""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-    def get(self, ioc: str) -> Optional[Dict[str, Any]]:
-        """Get cached results for an IOC if not expired"""
-        result = self.db.search(self.query.ioc == ioc)
-        if not result:
-            return None
-            
-        record = result[0]
-        if self._is_expired(record['timestamp']):
-            self.db.remove(self.query.ioc == ioc)
-            return None
-            
-        return record['data']
-        
-    def set(self, ioc: str, data: Dict[str, Any]):
-        """Cache enrichment results for an IOC"""
-        self.db.upsert({
-            'ioc': ioc,
-            'data': data,
-            'timestamp': datetime.utcnow().isoformat()
-        }, self.query.ioc == ioc)
-        
-    def _is_expired(self, timestamp: str) -> bool:
-        """Check if cached record is expired"""
-        if self.ttl <= 0:
-            return False
-            
-        record_time = datetime.fromisoformat(timestamp)
-        return datetime.utcnow() > record_time + timedelta(seconds=self.ttl)
-        
-    def clear_expired(self):
-        """Remove all expired cache entries"""
-        expired = self.db.search(
-            self._is_expired(self.query.timestamp)
-        )
-        for entry in expired:
-            self.db.remove(doc_ids=[entry.doc_id])
\ No newline at end of file
+    def _migrate_schema(self):
+        """Create tables, upgrading or dropping caches written with an older layout"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 2:
+            # Merged per-IOC entries can't be split back into sources
+            self.conn.execute("DROP TABLE IF EXISTS cache")
+        if version == 2:
+            self.conn.execute("ALTER TABLE entries ADD COLUMN last_access REAL")
+            self.conn.execute("UPDATE entries SET last_access = timestamp")
+        if 2 <= version < 4:
+            self.conn.execute("ALTER TABLE entries ADD COLUMN hits INTEGER NOT NULL DEFAULT 0")
+            
+        # Only takes effect on a fresh file; compact() applies it to older ones
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                ioc TEXT NOT NULL,
+                ioc_type TEXT NOT NULL,
+                source TEXT NOT NULL,
+                data TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                expires_at REAL,
+                last_access REAL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (ioc, ioc_type, source)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_expires_at ON entries (expires_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+        self.conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        
+    def get_entries(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, Tuple[Dict[str, Any], Optional[float]]]:
+        """Like get_many, but also return each entry's expiry timestamp"""
+        wanted = set(keys)
+        iocs = list(dict.fromkeys(ioc for _, _, ioc in wanted))
+        found: Dict[CacheKey, Tuple[Dict[str, Any], Optional[float]]] = {}
+        now = time.time()
+        
+        with self._lock:
+            for start in range(0, len(iocs), _BULK_CHUNK):
+                chunk = iocs[start:start + _BULK_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT source, ioc_type, ioc, data, expires_at FROM entries WHERE ioc IN ({placeholders}) "
+                    f"AND (expires_at IS NULL OR expires_at > ?)",
+                    (*chunk, now)
+                ).fetchall()
+                for source, ioc_type, ioc, data, expires_at in rows:
+                    key = (source, ioc_type, ioc)
+                    if key in wanted:
+                        found[key] = (decode(data), expires_at)
+                        
+        # Access time and frequency for eviction and refresh-ahead are written in batches
+        self._count_access(found)
+        return found
+        
+    def _count_access(self, keys: Iterable[CacheKey]) -> None:
+        """Buffer hits, flushing once enough have accumulated or the interval has passed"""
+        with self._access_lock:
+            for key in keys:
+                self._pending_access[key] = self._pending_access.get(key, 0) + 1
+            due = (len(self._pending_access) >= _ACCESS_FLUSH_SIZE or
+                   time.monotonic() - self._access_flushed >= settings.CACHE_ACCESS_FLUSH_INTERVAL)
+        if due:
+            self.flush_access()
+            
+    def flush_access(self) -> None:
+        """Write buffered hits to the entries' access stamps in one statement"""
+        with self._access_lock:
+            pending, self._pending_access = self._pending_access, {}
+            self._access_flushed = time.monotonic()
+        self.record_access(pending)
+        
+    def set_many(self, items: Dict[CacheKey, Dict[str, Any]], timestamp: Optional[float] = None):
+        """
+        Cache many source results in one transaction, each with its source's TTL
+        
+        Negative entries (NOT_FOUND_ENTRY) get the shorter not-found TTL. Rewriting
+        an entry halves its hit count, so access frequency decays between refreshes.
+        
+        Args:
+            items: Source results keyed by (source, ioc_type, ioc)
+            timestamp: When the results were fetched (defaults to now); expiry counts from it
+        """
+        if not items:
+            return
+            
+        now = time.time()
+        fetched = now if timestamp is None else timestamp
+        rows = [
+            (ioc, ioc_type, source, self.codec.encode(data), fetched,
+             self.expires_at(source, ioc_type, fetched, is_not_found(data)), now)
+            for (source, ioc_type, ioc), data in items.items()
+        ]
+        # Count earlier hits before the rewrite decays them
+        self.flush_access()
+        
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT INTO entries "
+                    "(ioc, ioc_type, source, data, timestamp, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (ioc, ioc_type, source) DO UPDATE SET "
+                    "data = excluded.data, timestamp = excluded.timestamp, "
+                    "expires_at = excluded.expires_at, last_access = excluded.last_access, "
+                    "hits = entries.hits / 2",
+                    rows
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+                
+    def iter_entries(self, sources: Optional[Iterable[str]] = None,
+                     batch_size: int = 1000) -> Iterator[CacheEntry]:
+        """
+        Iterate over unexpired entries in primary-key order, a batch at a time
+        
+        Args:
+            sources: Only yield entries from these sources (all if None)
+            batch_size: Rows fetched per query
+            
+        Yields:
+            (key, data, timestamp, expires_at) tuples
+        """
+        wanted = set(sources) if sources is not None else None
+        last = ('', '', '')
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT ioc, ioc_type, source, data, timestamp, expires_at FROM entries "
+                    "WHERE (ioc, ioc_type, source) > (?, ?, ?) "
+                    "ORDER BY ioc, ioc_type, source LIMIT ?",
+                    (*last, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+                
+            now = time.time()
+            for ioc, ioc_type, source, data, timestamp, expires_at in rows:
+                if wanted is not None and source not in wanted:
+                    continue
+                if expires_at is not None and expires_at <= now:
+                    continue
+                yield (source, ioc_type, ioc), decode(data), timestamp, expires_at
+            last = rows[-1][:3]
+            
+    def merge_entries(self, entries: Iterable[CacheEntry]) -> int:
+        """
+        Insert entries with their original timestamp and expiry, newest wins
+        
+        An existing entry is only replaced when the incoming one was fetched later.
+        
+        Args:
+            entries: (key, data, timestamp, expires_at) tuples
+            
+        Returns:
+            Number of entries inserted or replaced
+        """
+        now = time.time()
+        rows = [
+            (ioc, ioc_type, source, self.codec.encode(data), timestamp, expires_at, now)
+            for (source, ioc_type, ioc), data, timestamp, expires_at in entries
+        ]
+        if not rows:
+            return 0
+            
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT INTO entries "
+                    "(ioc, ioc_type, source, data, timestamp, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (ioc, ioc_type, source) DO UPDATE SET "
+                    "data = excluded.data, timestamp = excluded.timestamp, "
+                    "expires_at = excluded.expires_at, last_access = excluded.last_access "
+                    "WHERE excluded.timestamp > entries.timestamp",
+                    rows
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.conn.total_changes - before
+            
+    def recode(self, codec: Optional[str] = None, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Re-encode stored payloads with a codec, in batches
+        
+        Args:
+            codec: Target codec name (defaults to this cache's codec, which is then switched)
+            batch_size: Rows converted per transaction
+            
+        Returns:
+            Counts of converted and already-current entries
+        """
+        target = get_codec(codec) if codec else self.codec
+        self.codec = target
+        converted = unchanged = 0
+        last = ('', '', '')
+        
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT ioc, ioc_type, source, data FROM entries "
+                    "WHERE (ioc, ioc_type, source) > (?, ?, ?) "
+                    "ORDER BY ioc, ioc_type, source LIMIT ?",
+                    (*last, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                    
+                updates = []
+                for ioc, ioc_type, source, data in rows:
+                    if isinstance(data, bytes) and len(data) > 1 and data[1] == target.id:
+                        unchanged += 1
+                        continue
+                    updates.append((target.encode(decode(data)), ioc, ioc_type, source))
+                    
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self.conn.executemany(
+                        "UPDATE entries SET data = ? WHERE ioc = ? AND ioc_type = ? AND source = ?",
+                        updates
+                    )
+                    self.conn.execute("COMMIT")
+                except BaseException:
+                    self.conn.execute("ROLLBACK")
+                    raise
+            converted += len(updates)
+            last = rows[-1][:3]
+            
+        return {'converted': converted, 'unchanged': unchanged}
+        
+    def record_access(self, counts: Dict[CacheKey, int]) -> None:
+        """Add hits served by a faster tier to entries' access counts"""
+        if not counts:
+            return
+            
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "UPDATE entries SET last_access = MAX(COALESCE(last_access, 0), ?), hits = hits + ? "
+                "WHERE ioc = ? AND ioc_type = ? AND source = ?",
+                [(now, hits, ioc, ioc_type, source) for (source, ioc_type, ioc), hits in counts.items()]
+            )
+            
+    def hot_expiring(self, before: float, min_hits: int, accessed_since: float,
+                     limit: int = 100) -> List[Tuple[CacheKey, Optional[float]]]:
+        """
+        Frequently used entries that expire soon, soonest first
+        
+        Args:
+            before: Only entries expiring before this timestamp (and not yet expired)
+            min_hits: Minimum access count
+            accessed_since: Only entries accessed at or after this timestamp
+            limit: Maximum entries returned
+            
+        Returns:
+            List of (key, expires_at) tuples
+        """
+        self.flush_access()
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT source, ioc_type, ioc, expires_at FROM entries "
+                "WHERE expires_at > ? AND expires_at <= ? AND hits >= ? AND last_access >= ? "
+                "ORDER BY expires_at LIMIT ?",
+                (time.time(), before, min_hits, accessed_since, limit)
+            ).fetchall()
+        return [((source, ioc_type, ioc), expires_at) for source, ioc_type, ioc, expires_at in rows]
+        
+    def clear_expired(self) -> int:
+        """Remove all expired cache entries, returning how many were removed"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),)
+            )
+        return cursor.rowcount
+        
+    def payload_bytes(self) -> int:
+        """Approximate bytes held by entries (keys plus payload)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(ioc) + LENGTH(ioc_type) + LENGTH(source) + LENGTH(data)), 0) "
+                "FROM entries"
+            ).fetchone()
+        return row[0]
+        
+    def file_bytes(self) -> int:
+        """Bytes used by the database file, excluding free pages"""
+        with self._lock:
+            page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+            page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+        
+    def evict_lru(self, max_bytes: int, batch_size: int = 500) -> int:
+        """
+        Evict least recently accessed entries until payload fits in max_bytes
+        
+        Args:
+            max_bytes: Target upper bound for payload_bytes()
+            batch_size: Entries removed per delete statement
+            
+        Returns:
+            Number of entries evicted
+        """
+        self.flush_access()
+        evicted = 0
+        excess = self.payload_bytes() - max_bytes
+        while excess > 0:
+            with self._lock:
+                victims = self.conn.execute(
+                    "SELECT ioc, ioc_type, source, "
+                    "LENGTH(ioc) + LENGTH(ioc_type) + LENGTH(source) + LENGTH(data) "
+                    "FROM entries ORDER BY last_access LIMIT ?",
+                    (batch_size,)
+                ).fetchall()
+                if not victims:
+                    break
+                    
+                # Only take as many as needed from the oldest end of the batch
+                chosen = []
+                for ioc, ioc_type, source, size in victims:
+                    chosen.append((ioc, ioc_type, source))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                        
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self.conn.executemany(
+                        "DELETE FROM entries WHERE ioc = ? AND ioc_type = ? AND source = ?",
+                        chosen
+                    )
+                    self.conn.execute("COMMIT")
+                except BaseException:
+                    self.conn.execute("ROLLBACK")
+                    raise
+            evicted += len(chosen)
+            
+        if evicted:
+            with self._lock:
+                self.conn.execute("PRAGMA incremental_vacuum")
+        return evicted
+        
+    def compact(self):
+        """Rebuild the database file to reclaim free pages and truncate the WAL"""
+        with self._lock:
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.conn.execute("VACUUM")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts and payload bytes per source, plus file size"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT source, COUNT(*), "
+                "SUM(CASE WHEN expires_at IS NOT NULL AND expires_at <= ? THEN 1 ELSE 0 END), "
+                "SUM(LENGTH(ioc) + LENGTH(ioc_type) + LENGTH(source) + LENGTH(data)) "
+                "FROM entries GROUP BY source ORDER BY source",
+                (time.time(),)
+            ).fetchall()
+        sources = {
+            source: {'entries': count, 'expired': expired, 'bytes': size}
+            for source, count, expired, size in rows
+        }
+        return {
+            'sources': sources,
+            'entries': sum(s['entries'] for s in sources.values()),
+            'payload_bytes': sum(s['bytes'] for s in sources.values()),
+            'file_bytes': self.file_bytes()
+        }
+        
+    def close(self):
+        """Write buffered access stamps and close the database connection"""
+        self.flush_access()
+        with self._lock:
+            self.conn.close()
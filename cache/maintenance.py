@@ -0,0 +1,64 @@
+import threading
+from typing import Any, Dict, Optional
+from config import settings
+from .db import CacheDB
+
+class CacheMaintainer:
+    """Keep the persistent cache bounded: expiry sweeps, LRU eviction and compaction"""
+    
+    def __init__(self, cache: CacheDB, max_bytes: Optional[int] = None,
+                 interval: Optional[float] = None):
+        """
+        Args:
+            cache: Persistent cache to maintain
+            max_bytes: Payload size cap (defaults to settings.CACHE_MAX_BYTES; 0 disables)
+            interval: Seconds between background sweeps (defaults to settings)
+        """
+        self.cache = cache
+        self.max_bytes = settings.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.interval = settings.CACHE_SWEEP_INTERVAL if interval is None else interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+    def sweep(self) -> Dict[str, int]:
+        """
+        Remove expired entries, then evict least recently used ones over the cap
+        
+        Returns:
+            Counts of expired and evicted entries
+        """
+        expired = self.cache.clear_expired()
+        evicted = self.cache.evict_lru(self.max_bytes) if self.max_bytes else 0
+        return {'expired': expired, 'evicted': evicted}
+        
+    def compact(self) -> Dict[str, int]:
+        """Sweep, then rebuild the file to return free space to the filesystem"""
+        before = self.cache.file_bytes()
+        result = self.sweep()
+        self.cache.compact()
+        result.update({'bytes_before': before, 'bytes_after': self.cache.file_bytes()})
+        return result
+        
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+        
+    def start(self) -> None:
+        """Run sweeps on a daemon thread every interval seconds"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-maintainer", daemon=True)
+        self._thread.start()
+        
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+            
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error maintaining cache: {str(e)}")
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+from config import settings
+
+class MemoryCache:
+    """Bounded in-process LRU cache with per-entry expiry
+    
+    Bounded by entry count and by approximate payload bytes (JSON length);
+    whichever limit is hit first evicts the least recently used entries.
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = settings.CACHE_MEMORY_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = settings.CACHE_MEMORY_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+    def __len__(self) -> int:
+        return len(self._entries)
+        
+    @staticmethod
+    def _size_of(value: Any) -> int:
+        """Approximate payload size in bytes"""
+        return len(json.dumps(value, separators=(',', ':')))
+        
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value if present and not expired, marking it recently used"""
+        entry = self._lookup(key)
+        return entry[0] if entry else None
+        
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Get all present, unexpired values for the given keys"""
+        return {key: value for key, (value, _) in self.get_entries(keys).items()}
+        
+    def get_entries(self, keys: Iterable[Hashable]) -> Dict[Hashable, Tuple[Any, Optional[float]]]:
+        """Like get_many, but also return each entry's expiry timestamp"""
+        found = {}
+        for key in keys:
+            entry = self._lookup(key)
+            if entry is not None:
+                found[key] = entry
+        return found
+        
+    def _lookup(self, key: Hashable) -> Optional[Tuple[Any, Optional[float]]]:
+        """(value, expires_at) if present and unexpired, counting the hit or miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+                
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+                
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, expires_at
+            
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """
+        Store a value
+        
+        Args:
+            key: Cache key
+            value: Value to store (stored by reference; callers must not mutate it)
+            expires_at: Absolute expiry timestamp, or None to keep until evicted
+        """
+        size = self._size_of(value)
+        if self.max_bytes and size > self.max_bytes:
+            return
+            
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            self._evict()
+            
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                
+    def clear_expired(self) -> int:
+        """Drop expired entries, returning how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                key for key, (_, expires_at, _) in self._entries.items()
+                if expires_at is not None and expires_at <= now
+            ]
+            for key in expired:
+                self._remove(key)
+        return len(expired)
+        
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current footprint"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._bytes
+        }
+        
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        
+    def _evict(self) -> None:
+        """Evict least recently used entries until within limits (lock held)"""
+        while self._entries and (
+            (self.max_entries and len(self._entries) > self.max_entries) or
+            (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
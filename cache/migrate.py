@@ -0,0 +1,53 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Union
+from utils.ioc_utils import IOCClassifier
+from .db import CacheDB
+
+def import_tinydb(cache: CacheDB, legacy_path: Union[str, Path]) -> Dict[str, int]:
+    """
+    Import a legacy TinyDB JSON cache file into the SQLite cache
+    
+    Legacy documents hold merged results per IOC; each source is split into
+    its own entry and keeps its original fetch time, so entries that are
+    already past their source's TTL are skipped.
+    
+    Args:
+        cache: Destination cache
+        legacy_path: Path of the TinyDB JSON file
+        
+    Returns:
+        Counts of imported entries and skipped documents
+    """
+    with open(legacy_path, 'r', encoding='utf-8') as f:
+        tables = json.load(f)
+        
+    imported = skipped = 0
+    now = datetime.now(timezone.utc).timestamp()
+    for documents in tables.values():
+        for document in documents.values():
+            classified = IOCClassifier.classify(str(document.get('ioc', '')))
+            data = document.get('data')
+            if not classified or not isinstance(data, dict):
+                skipped += 1
+                continue
+                
+            ioc_type, ioc = classified
+            # Legacy timestamps are naive UTC
+            fetched = datetime.fromisoformat(document['timestamp']).replace(tzinfo=timezone.utc).timestamp()
+            items = {}
+            for source, result in data.items():
+                if source == 'mitre' or not isinstance(result, dict):
+                    continue
+                expires_at = cache.expires_at(source, ioc_type, fetched)
+                if expires_at is None or expires_at > now:
+                    items[(source, ioc_type, ioc)] = result
+                    
+            if not items:
+                skipped += 1
+                continue
+            cache.set_many(items, timestamp=fetched)
+            imported += len(items)
+            
+    return {'imported': imported, 'skipped': skipped}
@@ -0,0 +1,236 @@
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlparse
+from config import settings
+from .backend import CacheBackend, CacheKey, is_not_found
+from .codec import decode, get_codec
+
+# Keys fetched per MGET
+_BULK_CHUNK = 500
+
+class RedisError(Exception):
+    """Error reply from the server, or a broken connection"""
+
+class RedisClient:
+    """Minimal Redis (RESP2) client: one socket, commands pipelined per call"""
+    
+    def __init__(self, url: Optional[str] = None, timeout: float = 5.0):
+        """
+        Args:
+            url: redis://[user:password@]host[:port][/db] (defaults to settings.REDIS_URL)
+            timeout: Socket connect and read timeout in seconds
+        """
+        parsed = urlparse(url or settings.REDIS_URL)
+        if parsed.scheme != 'redis':
+            raise ValueError(f"Unsupported Redis URL scheme: {parsed.scheme}")
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+        
+    def execute(self, *args: Any) -> Any:
+        """Run a single command and return its reply"""
+        return self.pipeline([args])[0]
+        
+    def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """
+        Send several commands in one write and read all their replies
+        
+        A dropped connection is reopened and the pipeline retried once.
+        
+        Raises:
+            RedisError: If any command returns an error reply
+        """
+        if not commands:
+            return []
+            
+        payload = b''.join(self._encode(command) for command in commands)
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(payload)
+                    replies = [self._read_reply() for _ in commands]
+                    break
+                except (OSError, EOFError) as e:
+                    self._disconnect()
+                    if attempt:
+                        raise RedisError(f"Redis connection failed: {str(e)}") from e
+                        
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+        
+    def close(self):
+        with self._lock:
+            self._disconnect()
+            
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile('rb')
+        setup = []
+        if self.password:
+            setup.append(('AUTH', self.username, self.password) if self.username else ('AUTH', self.password))
+        if self.db:
+            setup.append(('SELECT', self.db))
+        if setup:
+            self._sock.sendall(b''.join(self._encode(command) for command in setup))
+            for _ in setup:
+                reply = self._read_reply()
+                if isinstance(reply, RedisError):
+                    self._disconnect()
+                    raise reply
+                    
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+        
+    @staticmethod
+    def _encode(command: Sequence[Any]) -> bytes:
+        parts = [b'*%d\r\n' % len(command)]
+        for arg in command:
+            if isinstance(arg, bytes):
+                data = arg
+            elif isinstance(arg, float):
+                data = repr(arg).encode()
+            else:
+                data = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        return b''.join(parts)
+        
+    def _read_line(self) -> bytes:
+        line = self._reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise EOFError("Connection closed by server")
+        return line[:-2]
+        
+    def _read_reply(self) -> Any:
+        line = self._read_line()
+        kind, rest = line[:1], line[1:]
+        if kind == b'+':
+            return rest.decode('utf-8')
+        if kind == b'-':
+            return RedisError(rest.decode('utf-8'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise EOFError("Connection closed by server")
+            return data[:-2]
+        if kind == b'*':
+            count = int(rest)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected Redis reply: {line[:32]!r}")
+
+# Delete a fill lock only if it still holds our token, in one atomic step
+_RELEASE_FILL_SCRIPT = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+class RedisCache(CacheBackend):
+    """Cache shared by every worker and node through a Redis server
+    
+    Entries expire through Redis key TTLs. A fill lock per key (SET NX with
+    an expiry) lets one worker query a provider while others wait for it.
+    """
+    
+    supports_single_flight = True
+    
+    def __init__(self, url: Optional[str] = None, prefix: Optional[str] = None,
+                 ttl: Optional[int] = None, codec: Optional[str] = None,
+                 client: Optional[RedisClient] = None):
+        """
+        Args:
+            url: Redis URL (defaults to settings.REDIS_URL)
+            prefix: Key namespace (defaults to settings.CACHE_REDIS_PREFIX)
+            ttl: Fixed TTL for every entry; per-source TTLs from settings if None
+            codec: Payload codec name for writes (defaults to settings.CACHE_CODEC)
+            client: Existing client to use instead of connecting to url
+        """
+        self.client = client or RedisClient(url)
+        self.prefix = settings.CACHE_REDIS_PREFIX if prefix is None else prefix
+        self.ttl = ttl
+        self.codec = get_codec(codec or settings.CACHE_CODEC)
+        self.lock_ttl = settings.CACHE_FILL_LOCK_TTL
+        # Identifies this process's fill locks so it never releases another's
+        self._token = uuid.uuid4().hex
+        
+    def _key(self, key: CacheKey) -> str:
+        source, ioc_type, ioc = key
+        return f"{self.prefix}entry:{source}:{ioc_type}:{ioc}"
+        
+    def _lock_key(self, key: CacheKey) -> str:
+        source, ioc_type, ioc = key
+        return f"{self.prefix}fill:{source}:{ioc_type}:{ioc}"
+        
+    def get_entries(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, Tuple[Dict[str, Any], Optional[float]]]:
+        """Look up entries with MGET, a chunk of keys per round trip"""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[CacheKey, Tuple[Dict[str, Any], Optional[float]]] = {}
+        for start in range(0, len(keys), _BULK_CHUNK):
+            chunk = keys[start:start + _BULK_CHUNK]
+            values = self.client.execute('MGET', *(self._key(key) for key in chunk))
+            for key, value in zip(chunk, values):
+                if value is not None:
+                    entry = decode(value)
+                    found[key] = (entry['data'], entry['expires_at'])
+        return found
+        
+    def set_many(self, items: Dict[CacheKey, Dict[str, Any]], timestamp: Optional[float] = None):
+        """Write entries in one pipeline, each expiring with its source's TTL"""
+        if not items:
+            return
+            
+        now = time.time()
+        fetched = now if timestamp is None else timestamp
+        commands = []
+        for (source, ioc_type, ioc), data in items.items():
+            expires_at = self.expires_at(source, ioc_type, fetched, is_not_found(data))
+            if expires_at is not None and expires_at <= now:
+                continue
+            value = self.codec.encode({'data': data, 'timestamp': fetched, 'expires_at': expires_at})
+            command = ['SET', self._key((source, ioc_type, ioc)), value]
+            if expires_at is not None:
+                command += ['PX', max(1, int((expires_at - now) * 1000))]
+            commands.append(command)
+        self.client.pipeline(commands)
+        
+    def clear_expired(self) -> int:
+        """Redis removes expired keys itself"""
+        return 0
+        
+    def acquire_fill(self, key: CacheKey) -> bool:
+        """Take the key's fill lock unless another worker holds it"""
+        reply = self.client.execute('SET', self._lock_key(key), self._token,
+                                    'NX', 'PX', int(self.lock_ttl * 1000))
+        return reply == 'OK'
+        
+    def release_fill(self, key: CacheKey) -> None:
+        """Release the fill lock if this process still holds it"""
+        # The lock may have expired and been taken by another worker meanwhile,
+        # so compare and delete on the server rather than GET then DEL
+        self.client.execute('EVAL', _RELEASE_FILL_SCRIPT, 1, self._lock_key(key), self._token)
+            
+    def close(self):
+        self.client.close()
@@ -0,0 +1,107 @@
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Dict, IO, Iterable, Iterator, Optional, Union
+from .db import CacheDB, CacheEntry
+
+# Snapshot files are gzip-compressed NDJSON: a header line, then one entry per line
+SNAPSHOT_FORMAT = 'ioc-enricher-cache'
+SNAPSHOT_VERSION = 1
+
+def _open(path: Union[str, Path], mode: str) -> IO[str]:
+    """Open a snapshot, gzip-compressed unless the path ends in .ndjson/.jsonl"""
+    if str(path).endswith(('.ndjson', '.jsonl')):
+        return open(path, mode, encoding='utf-8')
+    return gzip.open(path, mode + 't', encoding='utf-8')
+
+def export_snapshot(cache: CacheDB, path: Union[str, Path],
+                    sources: Optional[Iterable[str]] = None) -> int:
+    """
+    Stream unexpired cache entries to a snapshot file
+    
+    Args:
+        cache: Cache to export
+        path: Destination file
+        sources: Only export these sources (all if None)
+        
+    Returns:
+        Number of entries written
+    """
+    count = 0
+    with _open(path, 'w') as f:
+        header = {'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION, 'created': time.time()}
+        f.write(json.dumps(header) + '\n')
+        for (source, ioc_type, ioc), data, timestamp, expires_at in cache.iter_entries(sources):
+            f.write(json.dumps({
+                'source': source,
+                'ioc_type': ioc_type,
+                'ioc': ioc,
+                'timestamp': timestamp,
+                'ttl': None if expires_at is None else expires_at - timestamp,
+                'data': data
+            }, separators=(',', ':')) + '\n')
+            count += 1
+    return count
+
+def read_snapshot(path: Union[str, Path]) -> Iterator[CacheEntry]:
+    """
+    Stream entries from a snapshot file
+    
+    Raises:
+        ValueError: If the file isn't a snapshot or uses a newer version
+    """
+    with _open(path, 'r') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Not a cache snapshot: {path}")
+        if header.get('version', 0) > SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported cache snapshot version: {header.get('version')}")
+            
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            ttl = entry.get('ttl')
+            expires_at = None if ttl is None else entry['timestamp'] + ttl
+            yield ((entry['source'], entry['ioc_type'], entry['ioc']),
+                   entry['data'], entry['timestamp'], expires_at)
+
+def import_snapshot(cache: CacheDB, path: Union[str, Path],
+                    batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Merge a snapshot into the cache, keeping the newest entry per source
+    
+    Entries keep their original fetch time and TTL, so nothing lives longer
+    than it would have on the exporting node; already-expired ones are skipped.
+    
+    Args:
+        cache: Destination cache
+        path: Snapshot file
+        batch_size: Entries merged per transaction
+        
+    Returns:
+        Counts of merged entries and skipped (expired or older) entries
+    """
+    merged = skipped = 0
+    batch = []
+    now = time.time()
+    
+    def flush():
+        nonlocal merged, skipped
+        written = cache.merge_entries(batch)
+        merged += written
+        skipped += len(batch) - written
+        batch.clear()
+        
+    for entry in read_snapshot(path):
+        expires_at = entry[3]
+        if expires_at is not None and expires_at <= now:
+            skipped += 1
+            continue
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    
+    return {'merged': merged, 'skipped': skipped}
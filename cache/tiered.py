@@ -0,0 +1,104 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .backend import CacheBackend, CacheKey, is_not_found
+from .memory import MemoryCache
+
+# Distinct keys with buffered memory hits before they're written out
+_ACCESS_FLUSH_SIZE = 1000
+
+class TieredCache(CacheBackend):
+    """Two-tier cache: in-process LRU memory layer in front of the persistent store
+    
+    Reads try memory first and fall through to the persistent store, filling
+    the memory tier with the entry's real expiry. Writes go through to both.
+    """
+    
+    def __init__(self, persistent: CacheBackend, memory: Optional[MemoryCache] = None):
+        self.persistent = persistent
+        self.memory = memory or MemoryCache()
+        self.persistent_hits = 0
+        self.persistent_misses = 0
+        # Memory hits not yet added to the persistent store's access counts
+        self._pending_access: Dict[CacheKey, int] = {}
+        self._access_lock = threading.Lock()
+        
+    @property
+    def supports_single_flight(self) -> bool:
+        return self.persistent.supports_single_flight
+        
+    def expires_at(self, source: str, ioc_type: str, now: float,
+                   not_found: bool = False) -> Optional[float]:
+        return self.persistent.expires_at(source, ioc_type, now, not_found)
+        
+    def get_entries(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, Tuple[Dict[str, Any], Optional[float]]]:
+        """Bulk lookup: memory first, then one persistent query for the rest"""
+        keys = list(dict.fromkeys(keys))
+        found = self.memory.get_entries(keys)
+        self._count_access(found)
+        
+        remaining = [key for key in keys if key not in found]
+        if remaining:
+            entries = self.persistent.get_entries(remaining)
+            self.persistent_hits += len(entries)
+            self.persistent_misses += len(remaining) - len(entries)
+            for key, (data, expires_at) in entries.items():
+                self.memory.set(key, data, expires_at)
+                found[key] = (data, expires_at)
+        return found
+        
+    def set_many(self, items: Dict[CacheKey, Dict[str, Any]], timestamp: Optional[float] = None):
+        """Write through to the persistent store, then populate memory"""
+        if not items:
+            return
+            
+        self.persistent.set_many(items, timestamp)
+        fetched = time.time() if timestamp is None else timestamp
+        for (source, ioc_type, ioc), data in items.items():
+            expires_at = self.persistent.expires_at(source, ioc_type, fetched, is_not_found(data))
+            self.memory.set((source, ioc_type, ioc), data, expires_at)
+            
+    def clear_expired(self) -> int:
+        """Remove expired entries from both tiers (returns persistent count)"""
+        self.memory.clear_expired()
+        return self.persistent.clear_expired()
+        
+    def _count_access(self, keys: Iterable[CacheKey]) -> None:
+        """Buffer memory hits, flushing once enough have accumulated"""
+        with self._access_lock:
+            for key in keys:
+                self._pending_access[key] = self._pending_access.get(key, 0) + 1
+            full = len(self._pending_access) >= _ACCESS_FLUSH_SIZE
+        if full:
+            self.flush_access()
+            
+    def flush_access(self) -> None:
+        with self._access_lock:
+            pending, self._pending_access = self._pending_access, {}
+        self.persistent.record_access(pending)
+        self.persistent.flush_access()
+        
+    def record_access(self, counts: Dict[CacheKey, int]) -> None:
+        self.persistent.record_access(counts)
+        
+    def hot_expiring(self, before: float, min_hits: int, accessed_since: float,
+                     limit: int = 100) -> List[Tuple[CacheKey, Optional[float]]]:
+        return self.persistent.hot_expiring(before, min_hits, accessed_since, limit)
+        
+    def acquire_fill(self, key: CacheKey) -> bool:
+        return self.persistent.acquire_fill(key)
+        
+    def release_fill(self, key: CacheKey) -> None:
+        self.persistent.release_fill(key)
+        
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit and miss counters per tier"""
+        return {
+            'memory': self.memory.stats(),
+            'persistent': {'hits': self.persistent_hits, 'misses': self.persistent_misses}
+        }
+        
+    def close(self):
+        self.flush_access()
+        self.memory.clear()
+        self.persistent.close()
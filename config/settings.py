@@ -16,8 +16,90 @@ OTX_API_KEY = os.getenv('OTX_API_KEY')
 
 # Cache settings
 CACHE_ENABLED = True
-CACHE_TTL = 86400  # 24 hours in seconds
-CACHE_PATH = BASE_DIR / 'cache' / 'ioc_cache.db'
+CACHE_TTL = 86400  # 24 hours in seconds (default for every source)
+# Per-source TTLs in seconds, optionally per IOC type ('default' covers the rest)
+CACHE_TTLS = {
+    'virustotal': {'hash': 7 * 86400, 'default': 86400},  # file verdicts rarely change
+    'otx': {'default': 86400},
+    'shodan': {'default': 86400},
+    'abuseipdb': {'default': 6 * 3600}                    # abuse scores move quickly
+}
+# TTL for negative (not-found) answers; override per source with a 'not_found' key
+CACHE_NEGATIVE_TTL = 6 * 3600
+CACHE_PATH = BASE_DIR / 'cache' / 'ioc_cache.sqlite'
+# Backend: 'sqlite' (local file) or 'redis' (one store shared by all workers and nodes)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+CACHE_REDIS_PREFIX = 'ioc-enricher:'
+# Single-flight on shared backends: fill lock lifetime, how long peers wait, poll period
+CACHE_FILL_LOCK_TTL = 30.0  # seconds
+CACHE_FILL_WAIT = 30.0      # seconds
+CACHE_FILL_POLL = 0.1       # seconds
+# Payload codec: 'json', 'json+zlib', 'msgpack+zlib', 'msgpack+zstd' or 'auto' (best installed)
+CACHE_CODEC = 'auto'
+# Maintenance: payload cap enforced by LRU eviction (0 disables) and sweep period
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_SWEEP_INTERVAL = 3600  # seconds
+CACHE_ACCESS_FLUSH_INTERVAL = 60  # seconds cache hit stamps may lag before they're written
+# In-process LRU layer in front of the persistent cache
+CACHE_MEMORY_ENABLED = True
+CACHE_MEMORY_MAX_ENTRIES = 50000
+CACHE_MEMORY_MAX_BYTES = 64 * 1024 * 1024  # approximate payload bytes
+# Refresh-ahead: re-enrich hot entries shortly before they expire, on spare rate-limit budget
+CACHE_REFRESH_ENABLED = True
+CACHE_REFRESH_INTERVAL = 60         # seconds between passes
+CACHE_REFRESH_LEAD = 1800           # refresh entries expiring within this many seconds
+CACHE_REFRESH_MIN_HITS = 3          # accesses (decaying) before an entry counts as hot
+CACHE_REFRESH_WINDOW = 86400        # ...and it must have been accessed within this many seconds
+CACHE_REFRESH_BATCH = 50            # entries considered per pass
+CACHE_REFRESH_MIN_TOKENS = 2        # only spend a token while the bucket holds this many (capped at burst)
+CACHE_REFRESH_QUOTA_RESERVE = 0.25  # fraction of a daily quota never spent on refreshes
+
+# Enrichment settings
+ENRICH_CONCURRENCY = 10  # Maximum in-flight requests per provider
+ENRICH_STREAM_WINDOW = 500  # IOCs in flight (and cache writes buffered) when streaming
+
+# Free-text extraction: line-aligned chunk size and worker processes (None = CPU count)
+EXTRACT_CHUNK_BYTES = 16 * 1024 * 1024
+EXTRACT_WORKERS = None
+
+# Deduplication of parsed IOCs: in-memory fingerprint budget, then sorted runs on disk
+DEDUP_MAX_MEMORY = 64 * 1024 * 1024  # bytes
+DEDUP_MAX_RUNS = 4                   # runs on disk before they're merged into one
+DEDUP_SPILL_DIR = None               # None uses the system temp directory
+
+# HTTP connection pooling (per enricher)
+HTTP_POOL_CONNECTIONS = 4   # Number of host pools to keep
+HTTP_POOL_MAXSIZE = 16      # Keep-alive connections per host
+
+# Retry and circuit breaker settings
+HTTP_MAX_RETRIES = 3            # Retries after the first attempt
+HTTP_BACKOFF_BASE = 1.0         # Seconds; doubles each attempt (with full jitter)
+HTTP_BACKOFF_MAX = 30.0         # Cap on a single backoff delay
+HTTP_MAX_RETRY_DELAY = 60.0     # Longer Retry-After waits fail fast instead
+CIRCUIT_FAILURE_THRESHOLD = 5   # Consecutive failures before a breaker opens
+CIRCUIT_COOLDOWN = 300.0        # Seconds a breaker stays open
+
+# Rate limits: token-bucket 'rate' (requests/sec), 'burst' size and
+# optional 'daily_quota'. Shared by every process through RATE_LIMIT_DB.
+RATE_LIMITS = {
+    'virustotal': {'rate': 4 / 60, 'burst': 4, 'daily_quota': 500},   # VT public API: 4 req/min, 500/day
+    'shodan': {'rate': 1.0, 'burst': 1, 'daily_quota': None},         # Shodan: 1 req/sec
+    'abuseipdb': {'rate': 1.0, 'burst': 1, 'daily_quota': 1000},      # AbuseIPDB free tier: 1000/day
+    'otx': {'rate': 0, 'burst': 0, 'daily_quota': None}               # OTX: no rate limit
+}
+RATE_LIMIT_DB = BASE_DIR / 'cache' / 'rate_limits.db'
+
+# MITRE ATT&CK data: the STIX bundle is compiled into a SQLite index, rebuilt when it changes
+MITRE_ATTACK_FILE = BASE_DIR / 'mitre' / 'data' / 'enterprise-attack.json'
+MITRE_INDEX_PATH = BASE_DIR / 'mitre' / 'data' / 'attack_index.sqlite'
+MITRE_ACTORS_FILE = BASE_DIR / 'mitre' / 'data' / 'threat_actors.json'
+MITRE_INDEX_MMAP_BYTES = 64 * 1024 * 1024  # index bytes memory-mapped for lookups
+MITRE_RELOAD_INTERVAL = 30  # seconds between background checks for changed ATT&CK or actor files (0 disables)
+
+# Cross-IOC clustering on shared infrastructure (enrich --graph, watcher)
+GRAPH_PATH = BASE_DIR / 'cache' / 'graph.sqlite'
+GRAPH_MAX_FANOUT = 1000  # IOCs one attribute may link before it's treated as shared hosting
 
 # Output settings
 DEFAULT_OUTPUT_FORMAT = 'json'
@@ -9,6 +9,8 @@ IOC_TYPE = Literal["ip"]
 class AbuseIPDBEnricher(BaseEnricher):
     """Enrich IPs using AbuseIPDB API"""
     
+    name = "abuseipdb"
+    
     def _get_api_key(self) -> str:
         """Get AbuseIPDB API key from environment variable"""
         api_key = os.getenv("ABUSEIPDB_API_KEY")
@@ -1,16 +1,78 @@
+import asyncio
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, NamedTuple, Optional
 import requests
+from requests.adapters import HTTPAdapter
 from config import settings
+from .resilience import (
+    CircuitBreaker,
+    ProviderError,
+    TransientProviderError,
+    backoff_delay,
+    parse_retry_after
+)
+
+# Responses worth retrying: rate limited or temporarily unavailable
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Request errors worth retrying: the connection dropped or stalled mid-response
+TRANSIENT_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError
+)
+
+# Lookup outcome states
+FOUND = "found"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+class LookupResult(NamedTuple):
+    """Outcome of one provider lookup"""
+    status: str
+    data: Optional[Dict] = None
+    error: Optional[str] = None
 
 class BaseEnricher(ABC):
     """Abstract base class for all enrichment plugins"""
     
+    # Provider key used for rate limiting and result merging
+    name: str = ""
+    
     def __init__(self):
         self.api_key = self._get_api_key()
         self.cache_enabled = settings.CACHE_ENABLED
         self.timeout = 10  # seconds
         
+        # One connection pool per enricher, shared by per-thread sessions
+        self._adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=settings.HTTP_POOL_MAXSIZE
+        )
+        self._local = threading.local()
+        
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session for the current thread, backed by the shared pool"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({
+                'Accept-Encoding': 'gzip, deflate',
+                'Connection': 'keep-alive'
+            })
+            session.mount('https://', self._adapter)
+            session.mount('http://', self._adapter)
+            self._local.session = session
+        return session
+        
+    def close(self) -> None:
+        """Release pooled connections"""
+        self._adapter.close()
+        
     @abstractmethod
     def _get_api_key(self) -> str:
         """Get API key from settings"""
@@ -21,17 +83,95 @@ class BaseEnricher(ABC):
         """Enrich an IOC with data from this source"""
         pass
         
-    def _make_request(self, url: str, headers: Dict = None, params: Dict = None) -> Dict:
-        """Helper method for API requests"""
-        try:
-            response = requests.get(
-                url,
-                headers=headers,
-                params=params,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"API request failed: {e}")
-            return None
\ No newline at end of file
+    async def aenrich(self, ioc: str, ioc_type: str) -> Optional[Dict]:
+        """Async variant of enrich; runs the blocking lookup in a worker thread"""
+        return await asyncio.to_thread(self.enrich, ioc, ioc_type)
+        
+    def lookup(self, ioc: str, ioc_type: str) -> LookupResult:
+        """
+        Enrich an IOC and classify the outcome as found, not found or error
+        
+        Transient failures (timeouts, 429, 5xx) are raised by _make_request
+        rather than reported here, so a None from enrich means the provider
+        has no data for the IOC.
+        
+        Returns:
+            LookupResult with the normalized data (without 'source') when found
+        """
+        data = self.enrich(ioc, ioc_type)
+        if not data:
+            return LookupResult(NOT_FOUND)
+            
+        data = dict(data)
+        data.pop("source", None)
+        if "error" in data:
+            return LookupResult(ERROR, error=str(data["error"]))
+        return LookupResult(FOUND, data)
+        
+    async def alookup(self, ioc: str, ioc_type: str) -> LookupResult:
+        """Async variant of lookup"""
+        return await asyncio.to_thread(self.lookup, ioc, ioc_type)
+        
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Circuit breaker shared by all instances of this provider"""
+        return CircuitBreaker.for_provider(self.name or self.__class__.__name__.lower())
+        
+    def _make_request(self, url: str, headers: Dict = None, params: Dict = None) -> Optional[Dict]:
+        """
+        Helper method for API requests with retry, backoff and circuit breaking
+        
+        Returns:
+            Parsed JSON response, or None if the provider has no data (404)
+            
+        Raises:
+            CircuitOpenError: If the provider's breaker is open
+            TransientProviderError: If retries are exhausted on timeouts, dropped
+                connections, 429 or 5xx
+            ProviderError: On other request errors or non-success responses (e.g. bad API key)
+        """
+        breaker = self.breaker
+        breaker.before_call()
+        
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self.session.get(
+                    url,
+                    headers=headers,
+                    params=params,
+                    timeout=self.timeout
+                )
+            except TRANSIENT_EXCEPTIONS as e:
+                error = str(e)
+            except requests.exceptions.RequestException as e:
+                # Anything else (bad URL, redirect loop) won't succeed on retry
+                breaker.record_failure()
+                raise ProviderError(f"{self.name} request failed: {e}") from e
+            else:
+                status = response.status_code
+                if status == 404:
+                    breaker.record_success()
+                    return None
+                if status in RETRY_STATUSES:
+                    error = f"HTTP {status}"
+                    retry_after = parse_retry_after(response.headers)
+                else:
+                    try:
+                        response.raise_for_status()
+                        data = response.json()
+                    except (requests.exceptions.RequestException, ValueError) as e:
+                        breaker.record_failure()
+                        raise ProviderError(f"{self.name} request failed: {e}") from e
+                    breaker.record_success()
+                    return data
+                    
+            attempt += 1
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if attempt > settings.HTTP_MAX_RETRIES or delay > settings.HTTP_MAX_RETRY_DELAY:
+                breaker.record_failure(cooldown=retry_after)
+                raise TransientProviderError(
+                    f"{self.name} request failed after {attempt} attempt(s): {error}"
+                )
+            time.sleep(delay)
\ No newline at end of file
@@ -1,17 +1,37 @@
-import time
-from typing import Dict, List, Optional, Any
+import asyncio
+from collections import deque
+from itertools import islice
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 from config import settings
-from cache.db import CacheDB
+from cache.backend import CacheKey, NOT_FOUND_ENTRY, is_not_found, open_backend
+from cache.memory import MemoryCache
+from cache.tiered import TieredCache
 from mitre.correlator import MITRECorrelator
+from .base import ERROR, FOUND, NOT_FOUND, LookupResult
+from .rate_limiter import RateLimiter
+from .scheduler import ProviderScheduler
+from .single_flight import SingleFlight
 
 class EnrichmentManager:
     """Orchestrate enrichment across all available plugins with MITRE correlation"""
     
-    def __init__(self):
+    def __init__(self, concurrency: Optional[int] = None):
         self.enrichers = self._load_enrichers()
-        self.cache = CacheDB() if settings.CACHE_ENABLED else None
-        self.rate_limits = self._init_rate_limits()
+        self.cache = self._open_cache() if settings.CACHE_ENABLED else None
+        self.rate_limiter = RateLimiter()
         self.correlator = MITRECorrelator()
+        self.concurrency = concurrency or settings.ENRICH_CONCURRENCY
+        # Concurrent lookups of the same source and IOC share one provider call
+        self.single_flight = SingleFlight()
+        # Lookups answered by another worker's fill on a shared cache
+        self.single_flight_waits = 0
+        
+    def _open_cache(self) -> Any:
+        """Open the configured cache backend, fronted by the memory tier if enabled"""
+        persistent = open_backend()
+        if settings.CACHE_MEMORY_ENABLED:
+            return TieredCache(persistent, MemoryCache())
+        return persistent
         
     def _load_enrichers(self) -> Dict[str, List[Any]]:
         """Initialize all available enrichers with their rate limits"""
@@ -20,51 +40,196 @@ class EnrichmentManager:
         from .abuseipdb import AbuseIPDBEnricher
         from .otx import OTXEnricher
         
+        # Share one instance per provider across IOC types
+        virustotal = VirusTotalEnricher()
+        otx = OTXEnricher()
+        
         return {
             "ip": [
-                VirusTotalEnricher(),
-                ShodanEnricher(), 
+                virustotal,
+                ShodanEnricher(),
                 AbuseIPDBEnricher()
             ],
             "domain": [
-                VirusTotalEnricher(),
-                OTXEnricher()
+                virustotal,
+                otx
             ],
             "hash": [
-                VirusTotalEnricher(),
-                OTXEnricher()
+                virustotal,
+                otx
             ]
         }
         
-    def _init_rate_limits(self) -> Dict[str, Dict[str, float]]:
-        """Initialize rate limit tracking for each enricher"""
-        return {
-            'virustotal': {'last_call': 0.0, 'interval': 15.0},  # VT public API: 4 req/min
-            'shodan': {'last_call': 0.0, 'interval': 1.0},       # Shodan: 1 req/sec
-            'abuseipdb': {'last_call': 0.0, 'interval': 1.0},    # AbuseIPDB: 1 req/sec
-            'otx': {'last_call': 0.0, 'interval': 0.0}           # OTX: no rate limit
-        }
-        
-    def _enforce_rate_limit(self, enricher_name: str) -> None:
-        """Enforce rate limiting for API calls"""
+    async def _enforce_rate_limit(self, enricher_name: str) -> None:
+        """Wait for the provider's shared token bucket without blocking other providers"""
         if not enricher_name:
             return
             
-        limit = self.rate_limits.get(enricher_name.lower())
-        if not limit or limit['interval'] <= 0:
+        await self.rate_limiter.aacquire(enricher_name.lower())
+        
+    async def _query_enricher(self, enricher: Any, ioc: str, ioc_type: str,
+                              scheduler: Optional[ProviderScheduler] = None) -> LookupResult:
+        """Run a single enricher for an IOC, honouring its rate limit"""
+        try:
+            if scheduler:
+                outcome = await scheduler.submit(enricher, ioc, ioc_type)
+            else:
+                await self._enforce_rate_limit(enricher.name)
+                outcome = await enricher.alookup(ioc, ioc_type)
+        except Exception as e:
+            outcome = LookupResult(ERROR, error=str(e))
+            
+        if outcome.status == ERROR:
+            print(f"Error enriching {ioc} with {enricher.__class__.__name__}: {outcome.error}")
+        return outcome
+        
+    @property
+    def saved_calls(self) -> int:
+        """Provider calls avoided by joining an identical in-flight lookup"""
+        return self.single_flight.saved
+        
+    async def _fetch_source(self, enricher: Any, ioc: str, ioc_type: str,
+                            scheduler: Optional[ProviderScheduler] = None) -> LookupResult:
+        """Query one source, joining an in-flight lookup of the same source and IOC if any"""
+        return await self.single_flight.run(
+            (enricher.name, ioc_type, ioc),
+            lambda: self._fetch_shared(enricher, ioc, ioc_type, scheduler)
+        )
+        
+    async def _fetch_shared(self, enricher: Any, ioc: str, ioc_type: str,
+                            scheduler: Optional[ProviderScheduler] = None) -> LookupResult:
+        """
+        Query one source, coordinating with other workers on a shared cache
+        
+        On a shared backend only the worker holding the key's fill lock queries
+        the provider and publishes the answer at once; the others poll the cache
+        for it, and query themselves only if it doesn't appear in time.
+        """
+        cache = self.cache
+        if not cache or not cache.supports_single_flight:
+            return await self._query_enricher(enricher, ioc, ioc_type, scheduler)
+            
+        key = (enricher.name, ioc_type, ioc)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.CACHE_FILL_WAIT
+        acquired = False
+        try:
+            while True:
+                acquired = await asyncio.to_thread(cache.acquire_fill, key)
+                if acquired or loop.time() >= deadline:
+                    break
+                await asyncio.sleep(settings.CACHE_FILL_POLL)
+                data = (await asyncio.to_thread(self._cached_sources, [key])).get(key)
+                if data is not None:
+                    self.single_flight_waits += 1
+                    return LookupResult(NOT_FOUND) if is_not_found(data) else LookupResult(FOUND, data)
+                    
+            outcome = await self._query_enricher(enricher, ioc, ioc_type, scheduler)
+            if outcome.status == FOUND:
+                await asyncio.to_thread(self._cache_results, {key: outcome.data})
+            elif outcome.status == NOT_FOUND:
+                await asyncio.to_thread(self._cache_results, {key: dict(NOT_FOUND_ENTRY)})
+            return outcome
+        except Exception as e:
+            return LookupResult(ERROR, error=str(e))
+        finally:
+            if acquired:
+                try:
+                    await asyncio.to_thread(cache.release_fill, key)
+                except Exception as e:
+                    print(f"Error releasing cache fill lock: {str(e)}")
+                    
+    def _correlate(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Add MITRE correlation to merged results"""
+        if results:
+            try:
+                mitre_data = self.correlator.correlate(results)
+                if mitre_data:
+                    results['mitre'] = mitre_data
+            except Exception as e:
+                print(f"Error performing MITRE correlation: {str(e)}")
+                
+        return results
+        
+    def _correlate_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Add MITRE correlation to many merged results, sharing lookups across them"""
+        try:
+            correlations = self.correlator.correlate_batch(batch)
+        except Exception as e:
+            print(f"Error performing MITRE correlation: {str(e)}")
+            return
+            
+        for results, mitre_data in zip(batch, correlations):
+            if results and mitre_data:
+                results['mitre'] = mitre_data
+                
+    def _cache_results(self, items: Dict[CacheKey, Dict[str, Any]]) -> None:
+        """Write fresh per-source results to the cache in one bulk operation"""
+        if not self.cache or not items:
             return
             
-        current_time = time.time()
-        elapsed = current_time - limit['last_call']
-        if elapsed < limit['interval']:
-            sleep_time = limit['interval'] - elapsed
-            time.sleep(sleep_time)
+        try:
+            self.cache.set_many(items)
+        except Exception as e:
+            print(f"Error caching results: {str(e)}")
             
-        self.rate_limits[enricher_name.lower()]['last_call'] = current_time
+    def _cache_keys(self, ioc: str, ioc_type: str) -> List[CacheKey]:
+        """Cache keys for every source that handles this IOC type"""
+        return [(enricher.name, ioc_type, ioc) for enricher in self.enrichers.get(ioc_type, [])]
         
-    def enrich_ioc(self, ioc: str, ioc_type: str) -> Dict[str, Any]:
+    def _cached_sources(self, keys: List[CacheKey]) -> Dict[CacheKey, Dict[str, Any]]:
+        """Bulk-read per-source cache entries, treating cache errors as misses"""
+        if not self.cache or not keys:
+            return {}
+            
+        try:
+            return self.cache.get_many(keys)
+        except Exception as e:
+            print(f"Error reading cache: {str(e)}")
+            return {}
+            
+    async def _afetch(self, ioc: str, ioc_type: str, cached: Dict[CacheKey, Dict[str, Any]],
+                      scheduler: Optional[ProviderScheduler] = None) -> Tuple[Dict[str, Any], Dict[CacheKey, Dict[str, Any]]]:
         """
-        Enrich a single IOC with all relevant sources and MITRE correlation
+        Merge cached sources with fresh lookups for the sources that are missing or stale
+        
+        Sources with a cached or fresh not-found answer are left out of the results.
+        
+        Returns:
+            Tuple of (merged results, fresh per-source entries to cache)
+        """
+        enrichers = self.enrichers.get(ioc_type, [])
+        missing = [e for e in enrichers if (e.name, ioc_type, ioc) not in cached]
+        
+        # Fan out to the missing enrichers at once
+        outcomes = await asyncio.gather(*(
+            self._fetch_source(enricher, ioc, ioc_type, scheduler)
+            for enricher in missing
+        ))
+        
+        # Found and not-found answers are cached; transient errors never are.
+        # Shared backends were already written as each answer arrived.
+        fresh: Dict[CacheKey, Dict[str, Any]] = {}
+        publish = not (self.cache and self.cache.supports_single_flight)
+        for enricher, outcome in zip(missing, outcomes):
+            key = (enricher.name, ioc_type, ioc)
+            if outcome.status == FOUND:
+                fresh[key] = outcome.data
+            elif outcome.status == NOT_FOUND:
+                fresh[key] = dict(NOT_FOUND_ENTRY)
+                
+        results: Dict[str, Any] = {}
+        for enricher in enrichers:
+            key = (enricher.name, ioc_type, ioc)
+            data = cached[key] if key in cached else fresh.get(key)
+            if data and not is_not_found(data):
+                results[enricher.name] = data
+                
+        return results, (fresh if publish else {})
+        
+    async def aenrich_ioc(self, ioc: str, ioc_type: str) -> Dict[str, Any]:
+        """
+        Enrich a single IOC, querying only sources missing from the cache, concurrently
         
         Args:
             ioc: The IOC to enrich (IP, domain, or hash)
@@ -76,54 +241,175 @@ class EnrichmentManager:
         if not ioc or not ioc_type:
             return {}
             
-        results: Dict[str, Any] = {}
+        cached = self._cached_sources(self._cache_keys(ioc, ioc_type))
+        results, fresh = await self._afetch(ioc, ioc_type, cached)
+        self._cache_results(fresh)
+        return self._correlate(results)
         
-        # Check cache first
-        if self.cache:
-            cached = self.cache.get(ioc)
-            if cached and isinstance(cached, dict):
-                return cached
-                
-        # Run through all relevant enrichers
-        for enricher in self.enrichers.get(ioc_type, []):
+    async def aenrich_batch(self, iocs: List[Dict[str, Any]],
+                            concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Enrich a batch of IOCs through independent per-provider queues
+        
+        Per-source cache entries for the whole batch are read in one bulk
+        lookup before any network work, so only missing or stale sources
+        are queried. Every provider drains its own queue at its own rate,
+        and each IOC's result is assembled as soon as its last source completes.
+        
+        Args:
+            iocs: List of IOC dictionaries with 'ioc' and 'type' keys
+            concurrency: Maximum in-flight requests per provider (defaults to manager setting)
+            
+        Returns:
+            List of enriched IOC results, in input order
+        """
+        iocs = [ioc for ioc in iocs or [] if isinstance(ioc, dict)]
+        if not iocs:
+            return []
+            
+        cached = self._cached_sources(self._batch_cache_keys(iocs))
+        fresh: Dict[CacheKey, Dict[str, Any]] = {}
+        
+        async def _enrich_one(ioc: Dict[str, Any], scheduler: ProviderScheduler) -> Dict[str, Any]:
+            result, new_entries = await self._aenrich_entry(ioc, cached, scheduler)
+            fresh.update(new_entries)
+            return result
+            
+        workers = concurrency or self.concurrency
+        async with ProviderScheduler(self._enforce_rate_limit, workers=workers) as scheduler:
+            results = list(await asyncio.gather(*(_enrich_one(ioc, scheduler) for ioc in iocs)))
+            
+        self._correlate_batch([result['enrichment'] for result in results])
+        self._cache_results(fresh)
+        self._flush_access()
+        return results
+        
+    def _batch_cache_keys(self, iocs: List[Dict[str, Any]]) -> List[CacheKey]:
+        return [
+            key for ioc in iocs if ioc.get('ioc') and ioc.get('type')
+            for key in self._cache_keys(ioc['ioc'], ioc['type'])
+        ]
+        
+    async def _aenrich_entry(self, ioc: Dict[str, Any], cached: Dict[CacheKey, Dict[str, Any]],
+                             scheduler: ProviderScheduler) -> Tuple[Dict[str, Any], Dict[CacheKey, Dict[str, Any]]]:
+        """Enrich one IOC dictionary, returning its result and fresh entries to cache"""
+        value, ioc_type = ioc.get('ioc', ''), ioc.get('type', '')
+        if not value or not ioc_type:
+            return {**ioc, 'enrichment': {}}, {}
+        results, fresh = await self._afetch(value, ioc_type, cached, scheduler)
+        return {**ioc, 'enrichment': results}, fresh
+        
+    async def aenrich_stream(self, iocs: Iterable[Dict[str, Any]], concurrency: Optional[int] = None,
+                             window: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Enrich a stream of IOCs with bounded memory, yielding results in input order
+        
+        At most `window` IOCs are in flight: as each result is yielded, the
+        input is read ahead to refill the window, with one bulk cache lookup
+        per refill. Fresh entries are written to the cache in chunks.
+        
+        Args:
+            iocs: Iterable (e.g. FileParser.iter_file) of IOC dictionaries
+            concurrency: Maximum in-flight requests per provider (defaults to manager setting)
+            window: Maximum IOCs in flight (defaults to settings.ENRICH_STREAM_WINDOW)
+            
+        Yields:
+            Enriched IOC results, in input order
+        """
+        window = window or settings.ENRICH_STREAM_WINDOW
+        source = (ioc for ioc in iocs if isinstance(ioc, dict))
+        pending: Deque[asyncio.Task] = deque()
+        fresh: Dict[CacheKey, Dict[str, Any]] = {}
+        exhausted = False
+        
+        workers = concurrency or self.concurrency
+        async with ProviderScheduler(self._enforce_rate_limit, workers=workers) as scheduler:
             try:
-                # Enforce rate limiting
-                self._enforce_rate_limit(enricher.__class__.__name__.lower())
-                
-                # Perform enrichment
-                enriched_data = enricher.enrich(ioc, ioc_type)
-                if enriched_data and isinstance(enriched_data, dict):
-                    source = enriched_data.pop("source", None)
-                    if source:
-                        results[source] = enriched_data
-            except Exception as e:
-                print(f"Error enriching {ioc} with {enricher.__class__.__name__}: {str(e)}")
-                continue
+                while True:
+                    if not exhausted and len(pending) < window:
+                        wanted = window - len(pending)
+                        chunk = list(islice(source, wanted))
+                        exhausted = len(chunk) < wanted
+                        if chunk:
+                            cached = self._cached_sources(self._batch_cache_keys(chunk))
+                            pending.extend(
+                                asyncio.ensure_future(self._aenrich_entry(ioc, cached, scheduler))
+                                for ioc in chunk
+                            )
+                    if not pending:
+                        break
+                        
+                    result, new_entries = await pending.popleft()
+                    self._correlate(result['enrichment'])
+                    fresh.update(new_entries)
+                    if len(fresh) >= settings.ENRICH_STREAM_WINDOW:
+                        self._cache_results(fresh)
+                        fresh = {}
+                    yield result
+            finally:
+                for task in pending:
+                    task.cancel()
+                self._cache_results(fresh)
+                self._flush_access()
                 
-        # Add MITRE correlation if we got results
-        if results:
-            try:
-                mitre_data = self.correlator.correlate(results)
-                if mitre_data:
-                    results['mitre'] = mitre_data
-            except Exception as e:
-                print(f"Error performing MITRE correlation: {str(e)}")
+    def enrich_stream(self, iocs: Iterable[Dict[str, Any]],
+                      concurrency: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Synchronous iterator over aenrich_stream, driven by a private event loop
+        
+        Lookups progress while the caller waits for the next result.
+        
+        Args:
+            iocs: Iterable of IOC dictionaries with 'ioc' and 'type' keys
+            concurrency: Maximum in-flight requests per provider (defaults to manager setting)
             
-            # Update cache
-            if self.cache:
+        Yields:
+            Enriched IOC results, in input order
+        """
+        loop = asyncio.new_event_loop()
+        stream = self.aenrich_stream(iocs, concurrency)
+        try:
+            while True:
                 try:
-                    self.cache.set(ioc, results)
-                except Exception as e:
-                    print(f"Error caching results: {str(e)}")
+                    yield loop.run_until_complete(stream.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(stream.aclose())
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
             
-        return results
+    def _flush_access(self) -> None:
+        """Write buffered access counts so refresh-ahead sees memory-tier hits"""
+        if not self.cache:
+            return
+            
+        try:
+            self.cache.flush_access()
+        except Exception as e:
+            print(f"Error recording cache access: {str(e)}")
+            
+    def enrich_ioc(self, ioc: str, ioc_type: str) -> Dict[str, Any]:
+        """
+        Enrich a single IOC with all relevant sources and MITRE correlation
+        
+        Args:
+            ioc: The IOC to enrich (IP, domain, or hash)
+            ioc_type: Type of IOC ('ip', 'domain', or 'hash')
+            
+        Returns:
+            Dictionary containing all enrichment results and MITRE correlation
+        """
+        return asyncio.run(self.aenrich_ioc(ioc, ioc_type))
         
-    def enrich_batch(self, iocs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def enrich_batch(self, iocs: List[Dict[str, Any]],
+                     concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Enrich a batch of IOCs with MITRE correlation
         
         Args:
             iocs: List of IOC dictionaries with 'ioc' and 'type' keys
+            concurrency: Maximum in-flight requests per provider (defaults to manager setting)
             
         Returns:
             List of enriched IOC results
@@ -131,7 +417,4 @@ class EnrichmentManager:
         if not iocs:
             return []
             
-        return [{
-            **ioc,
-            'enrichment': self.enrich_ioc(ioc.get('ioc', ''), ioc.get('type', ''))
-        } for ioc in iocs if isinstance(ioc, dict)]
\ No newline at end of file
+        return asyncio.run(self.aenrich_batch(iocs, concurrency))
@@ -9,6 +9,8 @@ IOC_TYPE = Literal["domain", "hash"]
 class OTXEnricher(BaseEnricher):
     """Enrich domains and hashes using AlienVault OTX"""
     
+    name = "otx"
+    
     def _get_api_key(self) -> str:
         """Get OTX API key from environment variable"""
         api_key = os.getenv("OTX_API_KEY")
@@ -69,7 +71,11 @@ class OTXEnricher(BaseEnricher):
             "source": "otx",
             "pulse_info": {
                 "count": data.get("pulse_info", {}).get("count", 0),
-                "pulses": [p["name"] for p in data.get("pulse_info", {}).get("pulses", [])]
+                # The adversary is kept for MITRE actor correlation
+                "pulses": [
+                    {"name": p.get("name"), "adversary": p.get("adversary") or None}
+                    for p in data.get("pulse_info", {}).get("pulses", [])
+                ]
             }
         }
         
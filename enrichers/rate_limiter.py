@@ -0,0 +1,226 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+from config import settings
+
+class QuotaExceededError(Exception):
+    """Raised when a provider's daily quota has been used up"""
+    
+    def __init__(self, provider: str, reset_at: float):
+        self.provider = provider
+        self.reset_at = reset_at
+        super().__init__(
+            f"Daily quota exhausted for {provider}; resets at "
+            f"{datetime.fromtimestamp(reset_at, timezone.utc).isoformat()}"
+        )
+
+class RateLimiter:
+    """Token-bucket rate limiter with daily quotas, shared across processes
+    
+    Bucket state lives in a SQLite file, and every update runs inside an
+    immediate (write-locked) transaction. The CLI, watcher and API runs on
+    one host therefore draw from the same provider allowance.
+    """
+    
+    def __init__(self, db_path: Optional[Union[str, Path]] = None,
+                 limits: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            db_path: SQLite file holding bucket state (defaults to settings)
+            limits: Per-provider 'rate' (tokens/sec), 'burst' and 'daily_quota'
+        """
+        self.db_path = Path(db_path or settings.RATE_LIMIT_DB)
+        self.limits = settings.RATE_LIMITS if limits is None else limits
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                provider TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                day TEXT NOT NULL,
+                used_today INTEGER NOT NULL
+            )
+        """)
+        
+    @staticmethod
+    def _today(now: float) -> str:
+        """UTC calendar day used for daily quota accounting"""
+        return datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%d')
+        
+    @staticmethod
+    def _next_reset(now: float) -> float:
+        """Timestamp of the next UTC midnight"""
+        return (now // 86400 + 1) * 86400
+        
+    def _load(self, provider: str, limit: Dict[str, Any], now: float) -> Dict[str, Any]:
+        """Read a bucket and apply refill and daily rollover (inside a transaction)"""
+        row = self.conn.execute(
+            "SELECT tokens, updated, day, used_today FROM buckets WHERE provider = ?",
+            (provider,)
+        ).fetchone()
+        burst = float(limit.get('burst') or 1)
+        today = self._today(now)
+        
+        if row is None:
+            return {'tokens': burst, 'updated': now, 'day': today, 'used_today': 0}
+            
+        tokens, updated, day, used_today = row
+        rate = float(limit.get('rate') or 0)
+        tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+        if day != today:
+            day, used_today = today, 0
+        return {'tokens': tokens, 'updated': now, 'day': day, 'used_today': used_today}
+        
+    @staticmethod
+    def _unlimited(limit: Optional[Dict[str, Any]]) -> bool:
+        """No token bucket ('rate' unset or 0) and no daily quota"""
+        return not limit or (not limit.get('rate') and limit.get('daily_quota') is None)
+        
+    def _save(self, provider: str, bucket: Dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO buckets (provider, tokens, updated, day, used_today) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (provider, bucket['tokens'], bucket['updated'], bucket['day'], bucket['used_today'])
+        )
+        
+    def try_acquire(self, provider: str) -> float:
+        """
+        Take one token for a provider if available
+        
+        Args:
+            provider: Provider name (e.g. 'virustotal')
+            
+        Returns:
+            0.0 if a token was taken, otherwise seconds to wait before retrying
+            
+        Raises:
+            QuotaExceededError: If the provider's daily quota is used up
+        """
+        limit = self.limits.get(provider)
+        if self._unlimited(limit):
+            return 0.0
+            
+        with self._lock:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                bucket = self._load(provider, limit, now)
+                quota = limit.get('daily_quota')
+                if quota is not None and bucket['used_today'] >= quota:
+                    raise QuotaExceededError(provider, self._next_reset(now))
+                    
+                if not limit.get('rate'):
+                    # Quota only: calls are counted but never paced
+                    bucket['used_today'] += 1
+                    wait = 0.0
+                elif bucket['tokens'] >= 1.0:
+                    bucket['tokens'] -= 1.0
+                    bucket['used_today'] += 1
+                    wait = 0.0
+                else:
+                    wait = (1.0 - bucket['tokens']) / float(limit['rate'])
+                    
+                self._save(provider, bucket)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return wait
+        
+    def try_acquire_spare(self, provider: str, min_tokens: float = 1.0,
+                          quota_reserve: float = 0.0) -> bool:
+        """
+        Take a token only if the provider is idle, for background work
+        
+        The token is taken only when the bucket holds at least min_tokens
+        (capped at the burst size), so foreground lookups keep their headroom,
+        and only while more than quota_reserve of the daily quota is left.
+        
+        Args:
+            provider: Provider name (e.g. 'virustotal')
+            min_tokens: Tokens that must be available before one is taken
+            quota_reserve: Fraction of the daily quota kept for foreground lookups
+            
+        Returns:
+            True if a token was taken
+        """
+        limit = self.limits.get(provider)
+        if self._unlimited(limit):
+            return True
+            
+        needed = max(1.0, min(float(min_tokens), float(limit.get('burst') or 1)))
+        with self._lock:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                bucket = self._load(provider, limit, now)
+                quota = limit.get('daily_quota')
+                spare = (not limit.get('rate') or bucket['tokens'] >= needed) and (
+                    quota is None or quota - bucket['used_today'] > quota * quota_reserve
+                )
+                if spare:
+                    if limit.get('rate'):
+                        bucket['tokens'] -= 1.0
+                    bucket['used_today'] += 1
+                    self._save(provider, bucket)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return spare
+        
+    def acquire(self, provider: str) -> None:
+        """Block until a token is available for the provider"""
+        while True:
+            wait = self.try_acquire(provider)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+            
+    async def aacquire(self, provider: str) -> None:
+        """Wait without blocking the event loop until a token is available"""
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, provider)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+            
+    def remaining(self, provider: str) -> Dict[str, Any]:
+        """
+        Report the remaining budget for a provider without consuming it
+        
+        Returns:
+            Dict with available burst tokens, calls left today and the quota reset time
+        """
+        limit = self.limits.get(provider)
+        if self._unlimited(limit):
+            return {'provider': provider, 'tokens': None, 'daily_quota': None,
+                    'daily_remaining': None, 'resets_at': None}
+                    
+        with self._lock:
+            now = time.time()
+            bucket = self._load(provider, limit, now)
+        quota = limit.get('daily_quota')
+        return {
+            'provider': provider,
+            'tokens': round(bucket['tokens'], 3) if limit.get('rate') else None,
+            'daily_quota': quota,
+            'daily_remaining': None if quota is None else max(0, quota - bucket['used_today']),
+            'resets_at': datetime.fromtimestamp(self._next_reset(now), timezone.utc).isoformat()
+        }
+        
+    def remaining_all(self) -> Dict[str, Dict[str, Any]]:
+        """Remaining budget for every configured provider"""
+        return {provider: self.remaining(provider) for provider in self.limits}
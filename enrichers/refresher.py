@@ -0,0 +1,115 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+from config import settings
+from cache.backend import NOT_FOUND_ENTRY
+from .base import FOUND, NOT_FOUND
+from .rate_limiter import QuotaExceededError
+
+class RefreshAhead:
+    """Re-enrich frequently accessed cache entries shortly before they expire
+    
+    Each pass takes the hottest entries expiring within the lead time and
+    re-queries their source, but only with rate-limit tokens the provider
+    isn't using, so interactive lookups keep priority. A provider with no
+    spare budget is skipped for the rest of the pass.
+    """
+    
+    def __init__(self, manager: Any, interval: Optional[float] = None,
+                 lead: Optional[float] = None, min_hits: Optional[int] = None,
+                 batch_size: Optional[int] = None):
+        """
+        Args:
+            manager: EnrichmentManager whose cache, enrichers and rate limiter are used
+            interval: Seconds between background passes (defaults to settings)
+            lead: Refresh entries expiring within this many seconds (defaults to settings)
+            min_hits: Access count that makes an entry hot (defaults to settings)
+            batch_size: Entries considered per pass (defaults to settings)
+        """
+        self.manager = manager
+        self.interval = settings.CACHE_REFRESH_INTERVAL if interval is None else interval
+        self.lead = settings.CACHE_REFRESH_LEAD if lead is None else lead
+        self.min_hits = settings.CACHE_REFRESH_MIN_HITS if min_hits is None else min_hits
+        self.batch_size = settings.CACHE_REFRESH_BATCH if batch_size is None else batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+    def _has_budget(self, provider: str) -> bool:
+        try:
+            return self.manager.rate_limiter.try_acquire_spare(
+                provider,
+                settings.CACHE_REFRESH_MIN_TOKENS,
+                settings.CACHE_REFRESH_QUOTA_RESERVE
+            )
+        except QuotaExceededError:
+            return False
+            
+    def refresh_once(self) -> Dict[str, int]:
+        """
+        Run one refresh pass
+        
+        Returns:
+            Counts of refreshed entries, entries skipped for lack of budget, and failures
+        """
+        counts = {'refreshed': 0, 'skipped': 0, 'failed': 0}
+        cache = self.manager.cache
+        if not cache:
+            return counts
+            
+        cache.flush_access()
+        now = time.time()
+        candidates = cache.hot_expiring(
+            now + self.lead, self.min_hits, now - settings.CACHE_REFRESH_WINDOW, self.batch_size
+        )
+        enrichers = {e.name: e for group in self.manager.enrichers.values() for e in group}
+        
+        exhausted = set()
+        fresh = {}
+        for key, _ in candidates:
+            source, ioc_type, ioc = key
+            enricher = enrichers.get(source)
+            if enricher is None or source in exhausted or not self._has_budget(source):
+                exhausted.add(source)
+                counts['skipped'] += 1
+                continue
+                
+            try:
+                outcome = enricher.lookup(ioc, ioc_type)
+            except Exception as e:
+                print(f"Error refreshing {ioc} with {source}: {str(e)}")
+                counts['failed'] += 1
+                continue
+                
+            # Errors leave the old entry to expire normally
+            if outcome.status == FOUND:
+                fresh[key] = outcome.data
+            elif outcome.status == NOT_FOUND:
+                fresh[key] = dict(NOT_FOUND_ENTRY)
+            else:
+                counts['failed'] += 1
+                
+        if fresh:
+            cache.set_many(fresh)
+        counts['refreshed'] = len(fresh)
+        return counts
+        
+    def start(self) -> None:
+        """Run refresh passes on a daemon thread every interval seconds"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-refresher", daemon=True)
+        self._thread.start()
+        
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+            
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh_once()
+            except Exception as e:
+                print(f"Error refreshing cache: {str(e)}")
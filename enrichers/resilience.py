@@ -0,0 +1,131 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from config import settings
+
+class ProviderError(Exception):
+    """A provider request failed in a way that is not 'no data'"""
+
+class TransientProviderError(ProviderError):
+    """A provider request failed after retries (timeouts, 429, 5xx)"""
+
+class CircuitOpenError(ProviderError):
+    """The provider's circuit breaker is open; the request was not sent"""
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (1-based)"""
+    ceiling = min(settings.HTTP_BACKOFF_MAX, settings.HTTP_BACKOFF_BASE * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+def parse_retry_after(headers: Dict[str, str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Work out how long a provider asked us to wait
+    
+    Honors Retry-After (seconds or HTTP date), then X-RateLimit-Reset when
+    X-RateLimit-Remaining is zero (epoch timestamp or seconds).
+    
+    Returns:
+        Seconds to wait, or None if the response gives no hint
+    """
+    now = time.time() if now is None else now
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - now)
+            except (TypeError, ValueError):
+                pass
+                
+    if headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset'):
+        try:
+            reset = float(headers['X-RateLimit-Reset'])
+        except ValueError:
+            return None
+        # Large values are epoch timestamps, small ones are relative seconds
+        return max(0.0, reset - now) if reset > 1e9 else reset
+        
+    return None
+
+class CircuitBreaker:
+    """Per-provider circuit breaker
+    
+    After a run of consecutive failures, or one failure that asks for a long
+    wait (e.g. quota exhausted), the breaker opens. Calls then fail fast
+    until the cooldown passes, after which a single trial call is allowed.
+    """
+    
+    _registry: Dict[str, "CircuitBreaker"] = {}
+    _registry_lock = threading.Lock()
+    
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 cooldown: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.cooldown = cooldown or settings.CIRCUIT_COOLDOWN
+        self.failures = 0
+        self.opened_until = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        
+    @classmethod
+    def for_provider(cls, name: str) -> "CircuitBreaker":
+        """Get the breaker shared by every enricher instance for a provider"""
+        with cls._registry_lock:
+            if name not in cls._registry:
+                cls._registry[name] = cls(name)
+            return cls._registry[name]
+            
+    @classmethod
+    def reset_all(cls) -> None:
+        """Forget all breaker state"""
+        with cls._registry_lock:
+            cls._registry.clear()
+            
+    @property
+    def state(self) -> str:
+        if self.opened_until == 0.0:
+            return 'closed'
+        if time.time() < self.opened_until:
+            return 'open'
+        return 'half-open'
+        
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(
+                f"Circuit open for {self.name}; retry in "
+                f"{max(0.0, self.opened_until - time.time()):.0f}s"
+            )
+            
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_until = 0.0
+            self._trial_in_flight = False
+            
+    def record_failure(self, cooldown: Optional[float] = None) -> None:
+        """
+        Count a failed call
+        
+        Args:
+            cooldown: Wait requested by the provider; opens the breaker at once
+                if it exceeds the retry budget
+        """
+        with self._lock:
+            self.failures += 1
+            trial_failed = self._trial_in_flight
+            self._trial_in_flight = False
+            if cooldown is not None and cooldown > settings.HTTP_MAX_RETRY_DELAY:
+                self.opened_until = time.time() + cooldown
+            elif trial_failed or self.failures >= self.failure_threshold:
+                self.opened_until = time.time() + self.cooldown
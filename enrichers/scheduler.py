@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+class ProviderScheduler:
+    """Dispatch lookups through independent per-provider queues and workers
+    
+    Every provider gets its own queue drained by its own workers, so a
+    provider with a long rate-limit interval only delays its own lookups.
+    """
+    
+    def __init__(self, throttle: Callable[[str], Awaitable[None]], workers: int = 1):
+        """
+        Args:
+            throttle: Coroutine awaited before each provider call to pace it
+            workers: Number of workers draining each provider queue
+        """
+        self.throttle = throttle
+        self.workers = max(1, workers)
+        self.completed: Dict[str, int] = {}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._tasks: List[asyncio.Task] = []
+        
+    async def __aenter__(self) -> "ProviderScheduler":
+        return self
+        
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+        
+    def submit(self, enricher: Any, ioc: str, ioc_type: str) -> asyncio.Future:
+        """
+        Queue a lookup on the enricher's provider queue
+        
+        Args:
+            enricher: Enricher instance to run
+            ioc: The IOC to enrich
+            ioc_type: Type of IOC
+            
+        Returns:
+            Future resolved with the LookupResult (or the lookup's exception)
+        """
+        queue = self._queues.get(enricher.name)
+        if queue is None:
+            queue = self._start_provider(enricher.name)
+            
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((enricher, ioc, ioc_type, future))
+        return future
+        
+    def pending(self, provider: Optional[str] = None) -> int:
+        """Number of queued lookups for one provider, or all providers"""
+        if provider is not None:
+            queue = self._queues.get(provider)
+            return queue.qsize() if queue else 0
+        return sum(queue.qsize() for queue in self._queues.values())
+        
+    def _start_provider(self, provider: str) -> asyncio.Queue:
+        """Create the queue and workers for a provider on first use"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queues[provider] = queue
+        self.completed[provider] = 0
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(provider, queue)))
+        return queue
+        
+    async def _worker(self, provider: str, queue: asyncio.Queue) -> None:
+        """Drain a provider queue at that provider's own pace"""
+        while True:
+            job = await queue.get()
+            try:
+                if job is None:
+                    return
+                    
+                enricher, ioc, ioc_type, future = job
+                if future.cancelled():
+                    continue
+                    
+                try:
+                    await self.throttle(provider)
+                    result = await enricher.alookup(ioc, ioc_type)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+                self.completed[provider] += 1
+            finally:
+                queue.task_done()
+                
+    async def close(self) -> None:
+        """Let workers finish queued lookups, then stop them"""
+        for queue in self._queues.values():
+            for _ in range(self.workers):
+                queue.put_nowait(None)
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        self._tasks = []
+        self._queues = {}
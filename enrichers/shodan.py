@@ -9,6 +9,8 @@ IOC_TYPE = Literal["ip"]
 class ShodanEnricher(BaseEnricher):
     """Enrich IPs using Shodan API"""
     
+    name = "shodan"
+    
     def _get_api_key(self) -> str:
         """Get Shodan API key from environment variable"""
         api_key = os.getenv("SHODAN_API_KEY")
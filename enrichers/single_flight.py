@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key onto one in-flight call
+    
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait for and share its result (or exception). Works across
+    threads and event loops, since each asyncio.run caller gets its own loop.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.saved = 0
+        
+    def in_flight(self) -> int:
+        """Number of keys with a call currently running"""
+        with self._lock:
+            return len(self._calls)
+            
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await call() unless one is already running for key, then share its result
+        
+        Args:
+            key: Identity of the call (e.g. (source, ioc_type, ioc))
+            call: Zero-argument coroutine function doing the real work
+            
+        Returns:
+            The result of the single in-flight call
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.saved += 1
+                
+        if not leader:
+            return await asyncio.wrap_future(future)
+            
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # Don't cancel waiters that live in other tasks or loops
+            future.set_exception(RuntimeError("Coalesced lookup was cancelled"))
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
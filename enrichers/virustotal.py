@@ -9,6 +9,8 @@ IOC_TYPE = Literal["ip", "domain", "hash"]
 class VirusTotalEnricher(BaseEnricher):
     """Enrich IOCs using VirusTotal API"""
     
+    name = "virustotal"
+    
     def _get_api_key(self) -> str:
         """Get VirusTotal API key from environment variable"""
         api_key = os.getenv("VT_API_KEY")
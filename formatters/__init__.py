@@ -1,6 +1,18 @@
-from .json_formatter import format_json
-from .csv_formatter import format_csv
-from .markdown_formatter import format_markdown
-from .splunk_formatter import format_splunk
+from .json_formatter import JSONWriter, format_json, write_json_stream
+from .csv_formatter import CSVWriter, format_csv
+from .markdown_formatter import MarkdownWriter, format_markdown
+from .splunk_formatter import SplunkWriter, format_splunk
+from .ndjson_formatter import NDJSONWriter, format_ndjson
+from .writer import RecordWriter
 
-__all__ = ['format_json', 'format_csv', 'format_markdown', 'format_splunk']
\ No newline at end of file
+# Incremental writer for each --output-format
+WRITERS = {
+    'json': JSONWriter,
+    'csv': CSVWriter,
+    'markdown': MarkdownWriter,
+    'splunk': SplunkWriter,
+    'ndjson': NDJSONWriter
+}
+
+__all__ = ['format_json', 'format_csv', 'format_markdown', 'format_splunk', 'format_ndjson', 'write_json_stream',
+           'RecordWriter', 'JSONWriter', 'CSVWriter', 'MarkdownWriter', 'SplunkWriter', 'NDJSONWriter', 'WRITERS']
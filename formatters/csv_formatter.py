@@ -1,6 +1,62 @@
 import csv
+import json
+import tempfile
 from typing import List, Dict, Optional, TextIO
 from io import StringIO
+from .writer import RecordWriter
+
+def _csv_row(result: Dict) -> Dict[str, str]:
+    """A result's CSV cells, with each enrichment source's fields flattened to source_key"""
+    row = result.copy()
+    if 'enrichment' in result and isinstance(result['enrichment'], dict):
+        for source, data in result['enrichment'].items():
+            if isinstance(data, dict):
+                for key, value in data.items():
+                    row[f"{source}_{key}"] = str(value)
+    # Render cells the way csv.writer would, so spooled rows round-trip exactly
+    return {key: '' if value is None else value if isinstance(value, str) else str(value)
+            for key, value in row.items()}
+
+class CSVWriter(RecordWriter):
+    """Write results as CSV with one column per field seen in any result
+    
+    The header is only known once every result has been seen, so rows are
+    spooled to a temporary file as they arrive and copied out on close;
+    memory holds the column names, not the rows.
+    """
+    
+    newline = ''
+    
+    def __init__(self, out: TextIO, spool_dir: Optional[str] = None):
+        """
+        Args:
+            out: Text stream to write to (left open on close)
+            spool_dir: Directory for the row spool (defaults to the system temp dir)
+        """
+        super().__init__(out)
+        self.spool_dir = spool_dir
+        self._spool: Optional[TextIO] = None
+        self._fieldnames = set()
+        
+    def open(self) -> None:
+        self._spool = tempfile.TemporaryFile('w+', encoding='utf-8', dir=self.spool_dir)
+        
+    def _write(self, result: Dict) -> None:
+        row = _csv_row(result)
+        self._fieldnames.update(row)
+        self._spool.write(json.dumps(row))
+        self._spool.write('\n')
+        
+    def close(self) -> None:
+        try:
+            if self.count:
+                writer = csv.DictWriter(self.out, fieldnames=sorted(self._fieldnames))
+                writer.writeheader()
+                self._spool.seek(0)
+                for line in self._spool:
+                    writer.writerow(json.loads(line))
+        finally:
+            self._spool.close()
 
 def format_csv(results: List[Dict], output_file: Optional[str] = None) -> str:
     """
@@ -13,35 +69,9 @@ def format_csv(results: List[Dict], output_file: Optional[str] = None) -> str:
     Returns:
         CSV string of results
     """
-    if not results:
-        return ""
-
-    # Get all possible field names
-    fieldnames = set()
-    for result in results:
-        fieldnames.update(result.keys())
-        if 'enrichment' in result and isinstance(result['enrichment'], dict):
-            for source, data in result['enrichment'].items():
-                if isinstance(data, dict):
-                    for key in data.keys():
-                        fieldnames.add(f"{source}_{key}")
-
-    fieldnames = sorted(fieldnames)
-    
     # Use StringIO for in-memory CSV writing
     output = StringIO()
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-    
-    for result in results:
-        row = result.copy()
-        if 'enrichment' in result and isinstance(result['enrichment'], dict):
-            for source, data in result['enrichment'].items():
-                if isinstance(data, dict):
-                    for key, value in data.items():
-                        row[f"{source}_{key}"] = str(value)
-        writer.writerow(row)
-    
+    CSVWriter(output).write_all(results)
     csv_content = output.getvalue()
     output.close()
     
@@ -52,5 +82,5 @@ def format_csv(results: List[Dict], output_file: Optional[str] = None) -> str:
                 f.write(csv_content)
         except IOError as e:
             raise IOError(f"Failed to write CSV file: {str(e)}")
-    
-    return csv_content
\ No newline at end of file
+            
+    return csv_content
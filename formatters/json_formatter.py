@@ -1,5 +1,22 @@
 import json
-from typing import List, Dict
+from io import StringIO
+from typing import Dict, Iterable, List, TextIO
+from .writer import RecordWriter
+
+class JSONWriter(RecordWriter):
+    """Write results as a JSON array, matching json.dumps(results, indent=2)"""
+    
+    def _write(self, result: Dict) -> None:
+        self.out.write('[\n' if self.count == 0 else ',\n')
+        # Indent each record one level to match json.dumps(results, indent=2)
+        self.out.write('  ' + json.dumps(self._transform(result), indent=2).replace('\n', '\n  '))
+        
+    def _transform(self, result: Dict) -> Dict:
+        """The object written for a result"""
+        return result
+        
+    def close(self) -> None:
+        self.out.write('\n]' if self.count else '[]')
 
 def format_json(results: List[Dict], output_file: str = None) -> str:
     """
@@ -10,8 +27,25 @@ def format_json(results: List[Dict], output_file: str = None) -> str:
     Returns:
         JSON string of results
     """
-    output = json.dumps(results, indent=2)
+    output = StringIO()
+    JSONWriter(output).write_all(results)
+    output = output.getvalue()
     if output_file:
         with open(output_file, 'w') as f:
             f.write(output)
-    return output
\ No newline at end of file
+    return output
+
+def write_json_stream(results: Iterable[Dict], out: TextIO) -> int:
+    """
+    Write results as a JSON array incrementally, one record at a time
+    
+    The output matches format_json, but only the current record is held in memory.
+    
+    Args:
+        results: Iterable of enriched IOC dictionaries (e.g. a live enrichment stream)
+        out: Text stream to write to
+        
+    Returns:
+        Number of records written
+    """
+    return JSONWriter(out).write_all(results)
@@ -1,44 +1,62 @@
+from io import StringIO
 from typing import List, Dict
+from .writer import RecordWriter
 
-def format_markdown(results: List[Dict], output_file: str = None) -> str:
-    """
-    Format results as Markdown
-    Args:
-        results: List of enriched IOC dictionaries
-        output_file: Optional file path to write output
-    Returns:
-        Markdown string of results
-    """
-    output = []
-    for result in results:
-        output.append(f"### {result['ioc']} ({result['type']})")
-        output.append("")
+class MarkdownWriter(RecordWriter):
+    """Write results as Markdown, one section per IOC"""
+    
+    _first_line = True
+    
+    def open(self) -> None:
+        self._first_line = True
+        
+    def _line(self, line: str) -> None:
+        # Lines are joined with newlines, without a trailing one
+        if not self._first_line:
+            self.out.write("\n")
+        self.out.write(line)
+        self._first_line = False
+        
+    def _write(self, result: Dict) -> None:
+        self._line(f"### {result['ioc']} ({result['type']})")
+        self._line("")
         
         if not result.get('enrichment'):
-            output.append("No enrichment data available")
-            output.append("")
-            continue
+            self._line("No enrichment data available")
+            self._line("")
+            return
             
         for source, data in result['enrichment'].items():
-            output.append(f"#### {source.upper()}")
+            self._line(f"#### {source.upper()}")
             for key, value in data.items():
-                output.append(f"- **{key}**: {value}")
-            output.append("")
-        
+                self._line(f"- **{key}**: {value}")
+            self._line("")
+            
         if 'mitre' in result:
             mitre = result['mitre']
-            output.append("#### MITRE ATT&CK")
+            self._line("#### MITRE ATT&CK")
             if mitre['techniques']:
-                output.append("**Techniques:**")
+                self._line("**Techniques:**")
                 for tech in mitre['techniques']:
-                    output.append(f"- {tech['id']}: {tech['name']}")
-                    output.append(f"  - Tactics: {', '.join(tech['tactics'])}")
+                    self._line(f"- {tech['id']}: {tech['name']}")
+                    self._line(f"  - Tactics: {', '.join(tech['tactics'])}")
             if mitre['actors']:
-                output.append("**Associated Actors:**")
-                output.append("- " + ", ".join(mitre['actors']))
-            output.append("")
-    
-    md_output = "\n".join(output)
+                self._line("**Associated Actors:**")
+                self._line("- " + ", ".join(mitre['actors']))
+            self._line("")
+
+def format_markdown(results: List[Dict], output_file: str = None) -> str:
+    """
+    Format results as Markdown
+    Args:
+        results: List of enriched IOC dictionaries
+        output_file: Optional file path to write output
+    Returns:
+        Markdown string of results
+    """
+    output = StringIO()
+    MarkdownWriter(output).write_all(results)
+    md_output = output.getvalue()
     if output_file:
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(md_output)
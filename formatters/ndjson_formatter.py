@@ -0,0 +1,28 @@
+import json
+from io import StringIO
+from typing import Dict, List
+from .writer import RecordWriter
+
+class NDJSONWriter(RecordWriter):
+    """Write results as newline-delimited JSON, one compact object per line"""
+    
+    def _write(self, result: Dict) -> None:
+        self.out.write(json.dumps(result))
+        self.out.write('\n')
+
+def format_ndjson(results: List[Dict], output_file: str = None) -> str:
+    """
+    Format results as NDJSON
+    Args:
+        results: List of enriched IOC dictionaries
+        output_file: Optional file path to write output
+    Returns:
+        NDJSON string of results
+    """
+    output = StringIO()
+    NDJSONWriter(output).write_all(results)
+    output = output.getvalue()
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(output)
+    return output
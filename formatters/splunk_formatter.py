@@ -1,18 +1,12 @@
-import json
+from io import StringIO
 from typing import List, Dict
 from datetime import datetime
+from .json_formatter import JSONWriter
 
-def format_splunk(results: List[Dict], output_file: str = None) -> str:
-    """
-    Format results as Splunk-compatible JSON
-    Args:
-        results: List of enriched IOC dictionaries
-        output_file: Optional file path to write output
-    Returns:
-        JSON string in Splunk format
-    """
-    splunk_results = []
-    for result in results:
+class SplunkWriter(JSONWriter):
+    """Write results as a JSON array of flat, Splunk-compatible events"""
+    
+    def _transform(self, result: Dict) -> Dict:
         splunk_result = {
             'ioc': result['ioc'],
             'type': result['type'],
@@ -23,15 +17,26 @@ def format_splunk(results: List[Dict], output_file: str = None) -> str:
             for source, data in result['enrichment'].items():
                 for key, value in data.items():
                     splunk_result[f"{source}.{key}"] = value
-        
+                    
         if 'mitre' in result:
             splunk_result['mitre.techniques'] = [t['id'] for t in result['mitre']['techniques']]
             splunk_result['mitre.actors'] = result['mitre']['actors']
-        
-        splunk_results.append(splunk_result)
-    
-    output = json.dumps(splunk_results, indent=2)
+            
+        return splunk_result
+
+def format_splunk(results: List[Dict], output_file: str = None) -> str:
+    """
+    Format results as Splunk-compatible JSON
+    Args:
+        results: List of enriched IOC dictionaries
+        output_file: Optional file path to write output
+    Returns:
+        JSON string in Splunk format
+    """
+    output = StringIO()
+    SplunkWriter(output).write_all(results)
+    output = output.getvalue()
     if output_file:
         with open(output_file, 'w') as f:
             f.write(output)
-    return output
\ No newline at end of file
+    return output
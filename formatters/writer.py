@@ -0,0 +1,64 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, TextIO
+
+class RecordWriter(ABC):
+    """Write results incrementally: open(), write_record() per result, close()
+    
+    Only the record being written is held in memory, so results can reach
+    disk as they are enriched. Writers are also context managers that open
+    on entry and close on exit, so temporary state is always released.
+    """
+    
+    # newline argument for open() on the output file (csv needs '')
+    newline: Optional[str] = None
+    
+    def __init__(self, out: TextIO):
+        """
+        Args:
+            out: Text stream to write to (left open on close)
+        """
+        self.out = out
+        self.count = 0
+        
+    def open(self) -> None:
+        """Write anything that precedes the first record"""
+        pass
+        
+    def write_record(self, result: Dict) -> None:
+        """Write one enriched IOC"""
+        self._write(result)
+        self.count += 1
+        
+    @abstractmethod
+    def _write(self, result: Dict) -> None:
+        """Format one result onto the output"""
+        pass
+        
+    def close(self) -> None:
+        """Write anything that follows the last record"""
+        pass
+        
+    def write_all(self, results: Iterable[Dict]) -> int:
+        """
+        Open, write every result as it arrives, and close (even if results raises)
+        
+        Args:
+            results: Iterable of enriched IOC dictionaries (e.g. a live enrichment stream)
+            
+        Returns:
+            Number of records written
+        """
+        self.open()
+        try:
+            for result in results:
+                self.write_record(result)
+        finally:
+            self.close()
+        return self.count
+        
+    def __enter__(self) -> 'RecordWriter':
+        self.open()
+        return self
+        
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
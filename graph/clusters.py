@@ -0,0 +1,348 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Union
+from config import settings
+from .union_find import UnionFind
+
+# Bump when the table layout changes; graphs saved with an older one are discarded
+_SCHEMA_VERSION = 1
+
+# Rows per executemany when saving
+_SAVE_CHUNK = 10000
+
+def _text(value: Any) -> str:
+    return str(value).strip().lower() if value is not None else ''
+
+def result_attributes(result: Dict[str, Any]) -> Iterator[str]:
+    """
+    Infrastructure attributes of an enriched IOC that can link it to others
+    
+    Every IOC carries 'ioc:<value>'; hostnames and passive DNS records
+    reference other IOCs the same way, so a domain links to the IPs it
+    resolved to. Shodan ASN and organisation, OTX pulses and VirusTotal
+    file names link IOCs that share them.
+    """
+    ioc = _text(result.get('ioc'))
+    if ioc:
+        yield f"ioc:{ioc}"
+        
+    enrichment = result.get('enrichment') or {}
+    
+    shodan = enrichment.get('shodan') or {}
+    if shodan.get('asn'):
+        yield f"asn:{_text(shodan['asn'])}"
+    if shodan.get('org'):
+        yield f"org:{_text(shodan['org'])}"
+    for hostname in shodan.get('hostnames') or []:
+        if hostname:
+            yield f"ioc:{_text(hostname)}"
+            
+    otx = enrichment.get('otx') or {}
+    for pulse in (otx.get('pulse_info') or {}).get('pulses') or []:
+        # Normalized pulses carry a name (raw ones an id too); older cached results are bare names
+        name = (pulse.get('id') or pulse.get('name')) if isinstance(pulse, dict) else pulse
+        if name:
+            yield f"pulse:{_text(name)}"
+    for record in otx.get('passive_dns') or []:
+        if isinstance(record, dict):
+            for field in ('address', 'hostname'):
+                if record.get(field):
+                    yield f"ioc:{_text(record[field])}"
+        elif record:
+            yield f"ioc:{_text(record)}"
+            
+    virustotal = enrichment.get('virustotal') or {}
+    for name in virustotal.get('names') or []:
+        if name:
+            yield f"vtname:{_text(name)}"
+
+def _mitre_sets(result: Dict[str, Any]) -> Iterator[Set[str]]:
+    """Technique ids and actor names from a result's MITRE correlation"""
+    mitre = (result.get('enrichment') or {}).get('mitre') or {}
+    yield {t['id'] for t in mitre.get('techniques') or [] if isinstance(t, dict) and t.get('id')}
+    yield {actor for actor in mitre.get('actors') or [] if isinstance(actor, str)}
+
+class ClusterGraph:
+    """Incremental clustering of enriched IOCs on shared infrastructure
+    
+    IOCs are nodes in a union-find structure. An inverted index maps each
+    attribute to the first IOC seen with it, so a new IOC is joined to
+    every cluster it shares an attribute with in one pass over its own
+    attributes, never by comparing IOCs pairwise. MITRE techniques and
+    actors are aggregated per cluster as clusters merge.
+    
+    Attributes shared by more than max_fanout IOCs (CDNs, big hosting
+    ASNs) stop linking further IOCs, so they can't collapse everything
+    into one cluster.
+    
+    With a path, the graph is loaded from and saved incrementally to
+    SQLite, so clusters keep growing across runs (e.g. watcher files).
+    """
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None, max_fanout: Optional[int] = None):
+        """
+        Args:
+            path: SQLite file to load from and save to (in-memory only if None)
+            max_fanout: IOCs an attribute may link (defaults to settings.GRAPH_MAX_FANOUT)
+        """
+        self.path = Path(path) if path else None
+        self.max_fanout = max_fanout or settings.GRAPH_MAX_FANOUT
+        self._sets = UnionFind()
+        self._nodes: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._anchors: Dict[str, int] = {}
+        self._fanout: Dict[str, int] = {}
+        self._techniques: Dict[int, Set[str]] = {}
+        self._actors: Dict[int, Set[str]] = {}
+        
+        # Changes since the last load or save
+        self._saved_nodes = 0
+        self._revision = 0
+        self._dirty_nodes: Set[int] = set()
+        self._dirty_attributes: Set[str] = set()
+        self._dirty_roots: Set[int] = set()
+        
+        if self.path and self.path.exists():
+            self._load()
+            
+    def __len__(self) -> int:
+        return len(self._keys)
+        
+    @staticmethod
+    def _node_key(ioc_type: str, ioc: str) -> str:
+        return f"{ioc_type}:{ioc}"
+        
+    def _cluster_name(self, root: int) -> str:
+        return f"cluster-{self._sets.first[root]}"
+        
+    def add(self, result: Dict[str, Any]) -> Optional[str]:
+        """
+        Add an enriched IOC, linking it to every cluster it shares an attribute with
+        
+        Adding an IOC again merges in any new attributes and techniques.
+        
+        Args:
+            result: Enriched IOC dictionary ('ioc', 'type', 'enrichment')
+            
+        Returns:
+            The IOC's cluster id (None if the result has no IOC). Ids are
+            named after a cluster's oldest IOC, so they only change when
+            a cluster merges into an older one.
+        """
+        if not result.get('ioc') or not result.get('type'):
+            return None
+            
+        key = self._node_key(result['type'], result['ioc'])
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._sets.add()
+            self._nodes[key] = node
+            self._keys.append(key)
+            
+        find = self._sets.find
+        for attribute in result_attributes(result):
+            anchor = self._anchors.get(attribute)
+            if anchor is None:
+                self._anchors[attribute] = node
+                self._fanout[attribute] = 1
+                self._dirty_attributes.add(attribute)
+                continue
+                
+            fanout = self._fanout[attribute]
+            if fanout >= self.max_fanout or find(anchor) == find(node):
+                continue
+            self._fanout[attribute] = fanout + 1
+            self._dirty_attributes.add(attribute)
+            self._union(node, anchor)
+            
+        root = find(node)
+        for store, values in zip((self._techniques, self._actors), _mitre_sets(result)):
+            if values and not values <= store.get(root, set()):
+                store.setdefault(root, set()).update(values)
+                self._dirty_roots.add(root)
+        return self._cluster_name(root)
+        
+    def add_many(self, results: Iterable[Dict[str, Any]]) -> List[Optional[str]]:
+        """Add several enriched IOCs, returning each one's cluster id at the time it was added"""
+        return [self.add(result) for result in results]
+        
+    def annotate(self, results: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Add results as they stream past, setting each one's 'cluster' field"""
+        for result in results:
+            cluster = self.add(result)
+            if cluster:
+                result['cluster'] = cluster
+            yield result
+            
+    def _union(self, a: int, b: int) -> None:
+        merged = self._sets.union(a, b)
+        if merged is None:
+            return
+        root, absorbed = merged
+        self._dirty_nodes.update(merged)
+        # Fold the absorbed cluster's MITRE aggregates into the surviving root
+        for store in (self._techniques, self._actors):
+            values = store.pop(absorbed, None)
+            if values:
+                store.setdefault(root, set()).update(values)
+        self._dirty_roots.update(merged)
+        
+    def cluster_id(self, ioc_type: str, ioc: str) -> Optional[str]:
+        """Current cluster id of an IOC, or None if it hasn't been added"""
+        node = self._nodes.get(self._node_key(ioc_type, ioc))
+        return None if node is None else self._cluster_name(self._sets.find(node))
+        
+    def clusters(self, min_size: int = 2) -> List[Dict[str, Any]]:
+        """
+        Current clusters, largest first
+        
+        Args:
+            min_size: Smallest cluster to report (1 includes unlinked IOCs)
+            
+        Returns:
+            List of {'id', 'size', 'iocs', 'techniques', 'actors'} dictionaries
+        """
+        members: Dict[int, List[str]] = {}
+        sizes = self._sets.size
+        for node, key in enumerate(self._keys):
+            root = self._sets.find(node)
+            if sizes[root] >= min_size:
+                members.setdefault(root, []).append(key)
+                
+        clusters = [{
+            'id': self._cluster_name(root),
+            'size': len(keys),
+            'iocs': keys,
+            'techniques': sorted(self._techniques.get(root, ())),
+            'actors': sorted(self._actors.get(root, ()))
+        } for root, keys in members.items()]
+        clusters.sort(key=lambda cluster: (-cluster['size'], self._nodes[cluster['iocs'][0]]))
+        return clusters
+        
+    def stats(self) -> Dict[str, int]:
+        roots = sum(1 for node in range(len(self._keys)) if self._sets.parent[node] == node)
+        return {'iocs': len(self._keys), 'clusters': roots, 'attributes': len(self._anchors)}
+        
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            for table in ('meta', 'nodes', 'attributes', 'cluster_techniques', 'cluster_actors'):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER) WITHOUT ROWID")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS nodes (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL,
+                parent INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                first INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS attributes (
+                key TEXT PRIMARY KEY,
+                anchor INTEGER NOT NULL,
+                fanout INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        for table, column in (('cluster_techniques', 'technique'), ('cluster_actors', 'actor')):
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    root INTEGER NOT NULL,
+                    {column} TEXT NOT NULL,
+                    PRIMARY KEY (root, {column})
+                ) WITHOUT ROWID
+            """)
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        return conn
+        
+    @staticmethod
+    def _stored_revision(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return row[0] if row else 0
+        
+    def _load(self) -> None:
+        conn = self._connect()
+        try:
+            self._revision = self._stored_revision(conn)
+            for key, parent, size, first in conn.execute("SELECT key, parent, size, first FROM nodes ORDER BY id"):
+                self._nodes[key] = self._sets.load(parent, size, first)
+                self._keys.append(key)
+            for key, anchor, fanout in conn.execute("SELECT key, anchor, fanout FROM attributes"):
+                self._anchors[key] = anchor
+                self._fanout[key] = fanout
+            for table, store in (('cluster_techniques', self._techniques), ('cluster_actors', self._actors)):
+                for root, value in conn.execute(f"SELECT * FROM {table}"):
+                    store.setdefault(root, set()).add(value)
+        finally:
+            conn.close()
+        self._saved_nodes = len(self._keys)
+        
+    def save(self) -> int:
+        """
+        Write changes since the last load or save in one transaction
+        
+        Returns:
+            Number of IOCs added since then
+            
+        Raises:
+            RuntimeError: If another process saved the graph after it was loaded
+        """
+        if not self.path:
+            return 0
+            
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._stored_revision(conn) != self._revision:
+                conn.execute("ROLLBACK")
+                raise RuntimeError(f"Cluster graph {self.path} was updated by another process; reload it")
+                
+            sets = self._sets
+            new_nodes = range(self._saved_nodes, len(self._keys))
+            self._executemany(conn, "INSERT INTO nodes VALUES (?, ?, ?, ?, ?)", (
+                (node, self._keys[node], sets.parent[node], sets.size[node], sets.first[node])
+                for node in new_nodes
+            ))
+            self._executemany(conn, "UPDATE nodes SET parent = ?, size = ?, first = ? WHERE id = ?", (
+                (sets.parent[node], sets.size[node], sets.first[node], node)
+                for node in self._dirty_nodes if node < self._saved_nodes
+            ))
+            self._executemany(conn, "INSERT OR REPLACE INTO attributes VALUES (?, ?, ?)", (
+                (key, self._anchors[key], self._fanout[key]) for key in self._dirty_attributes
+            ))
+            for table, store in (('cluster_techniques', self._techniques), ('cluster_actors', self._actors)):
+                self._executemany(conn, f"DELETE FROM {table} WHERE root = ?",
+                                  ((root,) for root in self._dirty_roots))
+                self._executemany(conn, f"INSERT INTO {table} VALUES (?, ?)", (
+                    (root, value) for root in self._dirty_roots for value in store.get(root, ())
+                ))
+            self._revision += 1
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('revision', ?)", (self._revision,))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+            
+        added = len(new_nodes)
+        self._saved_nodes = len(self._keys)
+        self._dirty_nodes.clear()
+        self._dirty_attributes.clear()
+        self._dirty_roots.clear()
+        return added
+        
+    @staticmethod
+    def _executemany(conn: sqlite3.Connection, sql: str, rows: Iterable[tuple]) -> None:
+        """Run executemany in bounded chunks so large saves don't build one huge list"""
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= _SAVE_CHUNK:
+                conn.executemany(sql, chunk)
+                chunk = []
+        if chunk:
+            conn.executemany(sql, chunk)
@@ -0,0 +1,60 @@
+from array import array
+from typing import Optional, Tuple
+
+class UnionFind:
+    """Disjoint sets over dense integer ids, stored in flat arrays
+    
+    Union by size with path halving keeps every operation near-constant,
+    and three 8-byte slots per element keep millions of elements compact.
+    Each set also tracks its smallest member, a stable name for the set.
+    """
+    
+    def __init__(self):
+        self.parent = array('q')
+        self.size = array('q')
+        self.first = array('q')
+        
+    def __len__(self) -> int:
+        return len(self.parent)
+        
+    def add(self) -> int:
+        """Create a singleton set, returning its element id"""
+        element = len(self.parent)
+        self.parent.append(element)
+        self.size.append(1)
+        self.first.append(element)
+        return element
+        
+    def load(self, parent: int, size: int, first: int) -> int:
+        """Append an element with previously saved state"""
+        element = len(self.parent)
+        self.parent.append(parent)
+        self.size.append(size)
+        self.first.append(first)
+        return element
+        
+    def find(self, element: int) -> int:
+        """Root of the element's set"""
+        parent = self.parent
+        while parent[element] != element:
+            # Path halving: point every other node at its grandparent
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+        
+    def union(self, a: int, b: int) -> Optional[Tuple[int, int]]:
+        """
+        Merge the sets holding a and b
+        
+        Returns:
+            (new root, absorbed root), or None if they were already together
+        """
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return None
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        self.first[root_a] = min(self.first[root_a], self.first[root_b])
+        return root_a, root_b
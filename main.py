@@ -1,18 +1,33 @@
 #!/usr/bin/env python
 import click
 import json
+import time
+from itertools import chain
 from pathlib import Path
 from typing import List, Dict
 from datetime import datetime
 from config import settings
-from utils.file_parser import FileParser
+from utils.file_parser import FileParser, INPUT_FORMATS
+from utils.extractor import IOCExtractor
+from utils.dedup import Deduplicator
 from enrichers.manager import EnrichmentManager
-from formatters import (
-    format_json,
-    format_csv,
-    format_markdown,
-    format_splunk
+from enrichers.rate_limiter import RateLimiter
+from enrichers.refresher import RefreshAhead
+from cache.db import CacheDB
+from cache.maintenance import CacheMaintainer
+from cache.migrate import import_tinydb
+from cache.snapshot import export_snapshot, import_snapshot
+from mitre.index import (
+    build_index,
+    bundle_versions,
+    index_is_current,
+    install_bundle,
+    load_bundle,
+    update_index
 )
+from mitre.reloader import AttackReloader
+from graph.clusters import ClusterGraph
+from formatters import WRITERS
 import sys
 
 # Add these two lines at the top of your script to force UTF-8 encoding
@@ -24,16 +39,6 @@ def cli():
     """IOC Enrichment & Correlation Tool"""
     pass
 
-def _get_output_formatter(format_type: str):
-    """Select the appropriate output formatter"""
-    formatters = {
-        'json': format_json,
-        'csv': format_csv,
-        'markdown': format_markdown,
-        'splunk': format_splunk
-    }
-    return formatters.get(format_type.lower(), format_json)
-
 def _validate_output_dir(output_file: str):
     """Ensure output directory exists"""
     if output_file:
@@ -41,51 +46,79 @@ def _validate_output_dir(output_file: str):
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
 @cli.command()
-@click.argument('input_file', type=click.Path(exists=True))
+@click.argument('input_files', nargs=-1, required=True, type=click.Path(exists=True))
 @click.option('--output-format', default=settings.DEFAULT_OUTPUT_FORMAT,
-              type=click.Choice(['json', 'csv', 'markdown', 'splunk']),
+              type=click.Choice(list(WRITERS)),
               help='Output format')
 @click.option('--output-file', type=click.Path(),
               help='Output file path')
-def enrich(input_file, output_format, output_file):
-    """Enrich IOCs from input file"""
+@click.option('--concurrency', default=settings.ENRICH_CONCURRENCY, type=int,
+              help='Maximum in-flight requests per provider')
+@click.option('--input-format', default='auto',
+              type=click.Choice(['auto'] + list(INPUT_FORMATS)),
+              help='Input format (detected from suffix and content by default)')
+@click.option('--extract', is_flag=True,
+              help='Treat input as free text (logs, emails, reports) and extract IOCs')
+@click.option('--workers', default=None, type=int,
+              help='Extraction worker processes (defaults to CPU count)')
+@click.option('--graph', 'use_graph', is_flag=True,
+              help='Cluster results on shared infrastructure in the persistent IOC graph')
+def enrich(input_files, output_format, output_file, concurrency, input_format, extract, workers, use_graph):
+    """Enrich IOCs from one or more input files"""
+    # Shared across files so an IOC repeated in several inputs is enriched once
+    dedup = Deduplicator()
+    reloader = None
     try:
-        # Parse input file
-        click.secho(f"🔍 Parsing input file: {input_file}", fg='blue')
-        iocs = FileParser.parse_file(input_file)
+        # Stream IOCs from the input files; parsing proceeds as results are consumed
+        click.secho(f"🔍 Parsing input file: {', '.join(input_files)}", fg='blue')
+        if extract:
+            extractor = IOCExtractor(workers=workers)
+            iocs = chain.from_iterable(extractor.iter_file(path, dedup) for path in input_files)
+        else:
+            iocs = FileParser.iter_files(input_files, dedup,
+                                         None if input_format == 'auto' else input_format)
+        first = next(iocs, None)
         
-        if not iocs:
+        if first is None:
             click.secho("❌ No valid IOCs found in input file", fg='red', err=True)
             return
         
-        click.secho(f"✅ Found {len(iocs)} valid IOCs to process", fg='green')
+        click.secho("✅ Found valid IOCs, enriching as they stream in", fg='green')
         
         # Initialize enrichment pipeline
-        manager = EnrichmentManager()
-        enriched_results = []
+        manager = EnrichmentManager(concurrency=concurrency)
+        
+        # Pick up ATT&CK updates during long runs without stalling enrichment
+        reloader = AttackReloader(manager.correlator.mitre)
+        reloader.start()
         
-        # Process IOCs
-        for ioc in iocs:
-            enriched_data = manager.enrich_ioc(ioc['ioc'], ioc['type'])
-            enriched_results.append({
-                'original': ioc['original'],
-                'ioc': ioc['ioc'],
-                'type': ioc['type'],
-                'enrichment': enriched_data
-            })
+        # Enrich with a bounded in-flight window, in input order
+        enriched_stream = manager.enrich_stream(chain([first], iocs))
         
+        # Link results into the cluster graph as they stream past
+        graph = ClusterGraph(settings.GRAPH_PATH) if use_graph else None
+        if graph:
+            enriched_stream = graph.annotate(enriched_stream)
+            
         # Format output
-        formatter = _get_output_formatter(output_format)
         try:
-            output = formatter(enriched_results, output_file)
-            
-            # Print to console if no output file specified
-            if not output_file:
-                click.echo(output)
+            # Written record by record as results arrive, in every format
+            _validate_output_dir(output_file)
+            writer_class = WRITERS[output_format]
+            if output_file:
+                with open(output_file, 'w', newline=writer_class.newline, encoding='utf-8') as f:
+                    processed = writer_class(f).write_all(enriched_stream)
+            else:
+                processed = writer_class(sys.stdout).write_all(enriched_stream)
+                click.echo()
             
             click.secho("\n🎉 Enrichment Complete!", fg='green', bold=True)
-            click.echo(f"┣ Processed: {len(enriched_results)} IOCs")
+            click.echo(f"┣ Processed: {processed} IOCs")
             click.echo(f"┣ Output Format: {output_format.upper()}")
+            if graph:
+                graph.save()
+                stats = graph.stats()
+                click.echo(f"┣ Graph: {stats['iocs']} IOCs in {stats['clusters']} clusters")
             click.echo(f"┗ Output: {output_file if output_file else 'Console'}")
             
         except IOError as e:
@@ -94,6 +127,181 @@ def enrich(input_file, output_format, output_file):
     except Exception as e:
         click.secho(f"\n❌ Error: {str(e)}", fg='red', err=True)
         raise click.Abort()
+    finally:
+        if reloader:
+            reloader.stop()
+        dedup.close()
+
+@cli.command()
+def quota():
+    """Show remaining rate-limit budget per provider"""
+    limiter = RateLimiter()
+    for provider, budget in limiter.remaining_all().items():
+        if budget['resets_at'] is None:
+            click.echo(f"{provider}: unlimited")
+            continue
+        daily = 'unlimited' if budget['daily_quota'] is None else \
+            f"{budget['daily_remaining']}/{budget['daily_quota']}"
+        tokens = 'unpaced' if budget['tokens'] is None else budget['tokens']
+        click.echo(f"{provider}: burst tokens {tokens}, "
+                   f"daily {daily} (resets {budget['resets_at']})")
+
+@cli.group(name='cache')
+def cache_group():
+    """Inspect and maintain the enrichment cache"""
+    pass
+
+@cache_group.command(name='stats')
+def cache_stats():
+    """Show entry counts and bytes per source"""
+    stats = CacheMaintainer(CacheDB()).stats()
+    for source, info in stats['sources'].items():
+        click.echo(f"{source}: {info['entries']} entries ({info['expired']} expired), {info['bytes']} bytes")
+    click.echo(f"Total: {stats['entries']} entries, {stats['payload_bytes']} payload bytes, "
+               f"{stats['file_bytes']} file bytes")
+
+@cache_group.command(name='sweep')
+@click.option('--max-bytes', type=int, default=None,
+              help='Payload size cap (defaults to CACHE_MAX_BYTES)')
+def cache_sweep(max_bytes):
+    """Remove expired entries and evict least recently used ones over the cap"""
+    result = CacheMaintainer(CacheDB(), max_bytes=max_bytes).sweep()
+    click.echo(f"Expired: {result['expired']}, evicted: {result['evicted']}")
+
+@cache_group.command(name='vacuum')
+def cache_vacuum():
+    """Sweep, then compact the cache file"""
+    result = CacheMaintainer(CacheDB()).compact()
+    click.echo(f"Expired: {result['expired']}, evicted: {result['evicted']}, "
+               f"size: {result['bytes_before']} -> {result['bytes_after']} bytes")
+
+@cache_group.command(name='migrate')
+@click.option('--codec', default=None,
+              help='Target payload codec (defaults to CACHE_CODEC)')
+@click.option('--from-tinydb', 'tinydb_file', type=click.Path(exists=True), default=None,
+              help='Import a legacy TinyDB JSON cache file first')
+def cache_migrate(codec, tinydb_file):
+    """Convert cached payloads to the configured codec"""
+    cache = CacheDB(codec=codec)
+    if tinydb_file:
+        result = import_tinydb(cache, tinydb_file)
+        click.echo(f"Imported {result['imported']} entries from {tinydb_file} "
+                   f"({result['skipped']} documents skipped)")
+    result = cache.recode()
+    click.echo(f"Re-encoded {result['converted']} entries as {cache.codec.name} "
+               f"({result['unchanged']} already current)")
+
+@cache_group.command(name='export')
+@click.argument('output_file', type=click.Path())
+@click.option('--source', 'sources', multiple=True,
+              help='Only export this source (repeatable)')
+def cache_export(output_file, sources):
+    """Write unexpired cache entries to a snapshot file"""
+    count = export_snapshot(CacheDB(), output_file, sources or None)
+    click.echo(f"Exported {count} entries to {output_file}")
+
+@cache_group.command(name='import')
+@click.argument('input_file', type=click.Path(exists=True))
+def cache_import(input_file):
+    """Merge a snapshot into the cache, keeping the newest entry per source"""
+    try:
+        result = import_snapshot(CacheDB(), input_file)
+    except ValueError as e:
+        click.secho(f"❌ Error: {str(e)}", fg='red', err=True)
+        raise click.Abort()
+    click.echo(f"Merged {result['merged']} entries ({result['skipped']} expired or older skipped)")
+
+@cache_group.command(name='refresh')
+@click.option('--watch', is_flag=True, help='Keep running passes until interrupted')
+def cache_refresh(watch):
+    """Re-enrich hot cache entries that are about to expire"""
+    refresher = RefreshAhead(EnrichmentManager())
+    if not watch:
+        result = refresher.refresh_once()
+        click.echo(f"Refreshed: {result['refreshed']}, skipped (no budget): {result['skipped']}, "
+                   f"failed: {result['failed']}")
+        return
+        
+    refresher.start()
+    click.echo(f"Refreshing hot entries every {refresher.interval}s (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        refresher.stop()
+
+@cli.group(name='mitre')
+def mitre_group():
+    """Manage the MITRE ATT&CK data"""
+    pass
+
+@mitre_group.command(name='index')
+@click.option('--force', is_flag=True, help='Rebuild even if the index is current')
+def mitre_index(force):
+    """Compile enterprise-attack.json into the lookup index if it changed"""
+    try:
+        if not force and index_is_current():
+            click.echo(f"Index is current: {settings.MITRE_INDEX_PATH}")
+            return
+        result = build_index()
+    except (OSError, ValueError) as e:
+        click.secho(f"❌ Error: {str(e)}", fg='red', err=True)
+        raise click.Abort()
+    click.echo(f"Indexed {result['techniques']} techniques in {result['seconds']:.2f}s "
+               f"into {settings.MITRE_INDEX_PATH}")
+
+@mitre_group.command(name='update')
+@click.argument('new_bundle', type=click.Path(exists=True, dir_okay=False))
+@click.option('--old', 'old_bundle', type=click.Path(exists=True, dir_okay=False),
+              help='Previous bundle to diff against (default: the current index)')
+def mitre_update(new_bundle, old_bundle):
+    """Install a new enterprise-attack.json, applying only changed techniques to the index"""
+    try:
+        # Read the previous versions first: it may be the bundle being replaced
+        old_versions = bundle_versions(load_bundle(old_bundle)) if old_bundle else None
+        source = install_bundle(new_bundle)
+        result = update_index(source, old_versions=old_versions)
+    except (OSError, ValueError) as e:
+        click.secho(f"❌ Error: {str(e)}", fg='red', err=True)
+        raise click.Abort()
+        
+    if result['rebuilt']:
+        click.echo(f"No usable index; indexed {result['techniques']} techniques in {result['seconds']:.2f}s")
+        return
+    click.echo(f"Updated {settings.MITRE_INDEX_PATH} in {result['seconds']:.2f}s")
+    click.echo(f"┣ Added: {result['added']}")
+    click.echo(f"┣ Modified: {result['modified']}")
+    click.echo(f"┣ Removed: {result['removed']}")
+    click.echo(f"┗ Techniques: {result['techniques']}")
+
+@cli.group(name='graph')
+def graph_group():
+    """Inspect IOC clusters built by enrich --graph"""
+    pass
+
+@graph_group.command(name='clusters')
+@click.option('--min-size', default=2, type=int, help='Smallest cluster to show')
+@click.option('--output-file', type=click.Path(), help='Write clusters as JSON to this file')
+def graph_clusters(min_size, output_file):
+    """List clusters of IOCs that share infrastructure"""
+    graph = ClusterGraph(settings.GRAPH_PATH)
+    clusters = graph.clusters(min_size)
+    if output_file:
+        _validate_output_dir(output_file)
+        with open(output_file, 'w') as f:
+            json.dump(clusters, f, indent=2)
+        click.echo(f"Wrote {len(clusters)} clusters to {output_file}")
+        return
+        
+    for cluster in clusters:
+        shown = ', '.join(cluster['iocs'][:5]) + (', ...' if cluster['size'] > 5 else '')
+        click.echo(f"{cluster['id']}: {cluster['size']} IOCs ({shown})")
+        if cluster['techniques']:
+            click.echo(f"  techniques: {', '.join(cluster['techniques'])}")
+        if cluster['actors']:
+            click.echo(f"  actors: {', '.join(cluster['actors'])}")
+    stats = graph.stats()
+    click.echo(f"Total: {stats['iocs']} IOCs in {stats['clusters']} clusters, {len(clusters)} shown")
 
 if __name__ == '__main__':
-    cli()
\ No newline at end of file
+    cli()
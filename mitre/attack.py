@@ -1,49 +1,158 @@
 import json
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
 from config import settings
+from .index import AttackIndex, ensure_index
+
+def _signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Identity of a file's current contents (None if missing); changes on edit or replace"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
 
 class MITREAttack:
-    """Handle MITRE ATT&CK data loading and lookup"""
+    """Handle MITRE ATT&CK data loading and lookup
+    
+    Techniques are read from a SQLite index compiled from the STIX bundle
+    (rebuilt only when the bundle changes) and opened on the first lookup,
+    so creating an instance costs nothing until correlation needs it.
+    
+    Long-running processes pick up a new bundle, index or actor file
+    without restarting by calling refresh(), usually from an AttackReloader.
+    """
     
-    def __init__(self):
-        self.dataset = self._load_dataset()
-        self.techniques = self._index_techniques()
-        self.actors = self._load_threat_actors()
-        
-    def _load_dataset(self) -> Dict:
-        """Load MITRE ATT&CK dataset"""
-        attack_file = Path(__file__).parent / 'data' / 'enterprise-attack.json'
-        with open(attack_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-            
-    def _index_techniques(self) -> Dict[str, Dict]:
-        """Create lookup index for techniques"""
-        techniques = {}
-        for item in self.dataset['objects']:
-            if item['type'] == 'attack-pattern':
-                for ref in item.get('external_references', []):
-                    if ref.get('source_name') == 'mitre-attack':
-                        techniques[ref['external_id']] = {
-                            'name': item['name'],
-                            'tactic': [phase['phase_name'] for phase in item.get('kill_chain_phases', [])],
-                            'url': ref['url'],
-                            'platforms': item.get('x_mitre_platforms', [])
-                        }
-        return techniques
+    def __init__(self, attack_file: Optional[Union[str, Path]] = None,
+                 index_path: Optional[Union[str, Path]] = None,
+                 actors_file: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            attack_file: enterprise-attack.json bundle (defaults to settings.MITRE_ATTACK_FILE)
+            index_path: Compiled index (defaults to settings.MITRE_INDEX_PATH)
+            actors_file: Threat actor mappings (defaults to settings.MITRE_ACTORS_FILE)
+        """
+        self.attack_file = Path(attack_file or settings.MITRE_ATTACK_FILE)
+        self.index_path = Path(index_path or settings.MITRE_INDEX_PATH)
+        self.actors_file = Path(actors_file or settings.MITRE_ACTORS_FILE)
+        self._index: Optional[AttackIndex] = None
+        self._index_missing = False
+        self._actors: Optional[Dict[str, Dict]] = None
+        self._lock = threading.Lock()
+        # Serializes refresh(); lookups never take it
+        self._refresh_lock = threading.Lock()
+        # File signatures of the data in use, compared by refresh()
+        self._source_signature: Optional[Tuple[int, int, int]] = None
+        self._index_signature: Optional[Tuple[int, int, int]] = None
+        self._actors_signature: Optional[Tuple[int, int, int]] = None
+        self._generation = 0
+        
+    @property
+    def generation(self) -> int:
+        """Incremented every time refresh() swaps in new techniques or actors"""
+        return self._generation
+        
+    @property
+    def index(self) -> Optional[AttackIndex]:
+        """Technique index, built or refreshed and opened on first use (None without data)"""
+        if self._index is None and not self._index_missing:
+            with self._lock:
+                if self._index is None and not self._index_missing:
+                    self._index = self._open_index()
+        return self._index
+        
+    def _open_index(self) -> Optional[AttackIndex]:
+        try:
+            ensure_index(self.attack_file, self.index_path)
+        except FileNotFoundError as e:
+            # Correlate without technique details rather than failing every IOC
+            print(f"Error loading MITRE ATT&CK data: {str(e)}")
+            self._index_missing = True
+            return None
+        self._source_signature = _signature(self.attack_file)
+        self._index_signature = _signature(self.index_path)
+        return AttackIndex(self.index_path)
+        
+    def refresh(self) -> bool:
+        """
+        Swap in a changed ATT&CK bundle, index or threat actor file
+        
+        A changed bundle is applied to the index incrementally, then the
+        new index and actor set each replace the old ones in a single
+        assignment. Lookups hold no lock this waits on, so correlations
+        running meanwhile carry on with the data they started with.
+        This does the slow work itself; call it off the lookup path.
+        
+        Returns:
+            True if new data was swapped in
+        """
+        changed = False
+        with self._refresh_lock:
+            if self._index_missing and (self.attack_file.exists() or self.index_path.exists()):
+                # Data has appeared since the last attempt; open it on the next lookup
+                self._index_missing = False
+                changed = True
+                
+            if self._index is not None:
+                source_signature = _signature(self.attack_file)
+                if source_signature != self._source_signature:
+                    try:
+                        ensure_index(self.attack_file, self.index_path)
+                    except (OSError, ValueError) as e:
+                        print(f"Error updating MITRE ATT&CK index: {str(e)}")
+                    self._source_signature = source_signature
+                    
+                index_signature = _signature(self.index_path)
+                if index_signature is not None and index_signature != self._index_signature:
+                    # The previous index is closed once nothing references it
+                    self._index = AttackIndex(self.index_path)
+                    self._index_signature = index_signature
+                    changed = True
+                    
+            if self._actors is not None and _signature(self.actors_file) != self._actors_signature:
+                try:
+                    self._actors = self._load_threat_actors()
+                    changed = True
+                except ValueError as e:
+                    # Keep the previous actors while the file is mid-edit
+                    print(f"Error loading threat actors: {str(e)}")
+                    
+            if changed:
+                self._generation += 1
+        return changed
+        
+    @property
+    def techniques(self) -> Dict[str, Dict]:
+        """Every technique keyed by ID (reads the whole index; prefer get_technique)"""
+        index = self.index
+        return index.techniques() if index else {}
+        
+    @property
+    def actors(self) -> Dict[str, Dict]:
+        """Custom threat actor mappings, loaded on first use"""
+        if self._actors is None:
+            self._actors = self._load_threat_actors()
+        return self._actors
         
     def _load_threat_actors(self) -> Dict[str, Dict]:
         """Load custom threat actor mappings"""
-        actors_file = Path(__file__).parent / 'data' / 'threat_actors.json'
-        if actors_file.exists():
-            with open(actors_file, 'r', encoding='utf-8') as f:
+        self._actors_signature = _signature(self.actors_file)
+        if self.actors_file.exists():
+            with open(self.actors_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
         return {}
         
-    def get_technique(self, technique_id: str) -> Dict:
+    def get_technique(self, technique_id: str) -> Optional[Dict]:
         """Get technique details by ID (e.g., T1059)"""
-        return self.techniques.get(technique_id.upper())
+        index = self.index
+        return index.get_technique(technique_id) if index else None
         
     def get_actor_techniques(self, actor_name: str) -> List[str]:
         """Get techniques associated with a threat actor"""
-        return self.actors.get(actor_name.lower(), {}).get('techniques', [])
\ No newline at end of file
+        return self.actors.get(actor_name.lower(), {}).get('techniques', [])
+        
+    def close(self) -> None:
+        if self._index is not None:
+            self._index.close()
+            self._index = None
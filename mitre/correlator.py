@@ -1,19 +1,67 @@
-from typing import Dict, List, Optional
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from mitre.attack import MITREAttack
+from mitre.matcher import NameMatcher
+
+# Technique and sub-technique IDs, e.g. T1059 and T1059.003
+_TECHNIQUE_ID_RE = re.compile(r'T\d{4}(?:\.\d{3})?', re.IGNORECASE)
+
+# A technique as reported in correlations (shared between results; never mutated)
+TechniqueEntry = Dict[str, Any]
+
+class _ActorTables:
+    """Actor name automaton and per-actor technique expansions, built once per actor set"""
+    
+    def __init__(self, matcher: NameMatcher,
+                 expansions: Dict[str, List[Tuple[str, TechniqueEntry]]]):
+        self.matcher = matcher
+        self.expansions = expansions
+        # Actors found per adversary string, shared across batches
+        self.adversaries: Dict[str, List[str]] = {}
+        
+    def match(self, adversary: str) -> List[str]:
+        actors = self.adversaries.get(adversary)
+        if actors is None:
+            actors = self.adversaries[adversary] = self.matcher.find(adversary)
+        return actors
 
 class MITRECorrelator:
-    """Correlate enriched IOCs with MITRE ATT&CK framework"""
+    """Correlate enriched IOCs with MITRE ATT&CK framework
+    
+    Actor names and aliases are matched with one automaton, and each
+    actor's techniques are resolved once, the first time correlation
+    runs against a given actor set; afterwards correlating an IOC is a
+    few dictionary lookups.
+    """
     
-    def __init__(self):
-        self.mitre = MITREAttack()
+    def __init__(self, mitre: Optional[MITREAttack] = None):
+        self.mitre = mitre or MITREAttack()
+        self._tables: Optional[_ActorTables] = None
+        self._tables_for: Tuple[Any, Any, Any] = (None, None, None)
+        self._technique_entries: Dict[Tuple[str, Optional[str]], Optional[TechniqueEntry]] = {}
         
     def correlate(self, enriched_data: Dict) -> Dict:
         """Correlate enriched IOC data with MITRE ATT&CK"""
-        correlations = {
-            'techniques': [],
-            'tactics': set(),
-            'actors': set()
-        }
+        return self.correlate_batch([enriched_data])[0]
+        
+    def correlate_batch(self, batch: Iterable[Dict]) -> List[Dict]:
+        """
+        Correlate many enriched IOCs, sharing actor and technique lookups across them
+        
+        Args:
+            batch: Enriched IOC data, one dictionary of source results per IOC
+            
+        Returns:
+            One {'techniques', 'tactics', 'actors'} correlation per IOC, in order;
+            techniques are deduplicated per IOC, tag matches first
+        """
+        tables = self._actor_tables()
+        return [self._correlate_one(enriched_data, tables) for enriched_data in batch]
+        
+    def _correlate_one(self, enriched_data: Dict, tables: _ActorTables) -> Dict:
+        techniques: Dict[str, TechniqueEntry] = {}
+        tactics: Set[str] = set()
+        actors: Set[str] = set()
         
         if not enriched_data:
             return {
@@ -21,51 +69,91 @@ class MITRECorrelator:
                 'tactics': [],
                 'actors': []
             }
-        
+            
         # Check VirusTotal for MITRE references
         if 'virustotal' in enriched_data:
-            self._process_virustotal(enriched_data['virustotal'], correlations)
-            
+            for tag in enriched_data['virustotal'].get('tags', []):
+                if isinstance(tag, str) and _TECHNIQUE_ID_RE.fullmatch(tag):
+                    technique_id = tag.upper()
+                    entry = self._technique_entry(technique_id)
+                    if entry and technique_id not in techniques:
+                        techniques[technique_id] = entry
+                        tactics.update(entry['tactics'])
+                        
         # Check OTX for threat actor references
         if 'otx' in enriched_data:
-            self._process_otx(enriched_data['otx'], correlations)
-            
+            for pulse in enriched_data['otx'].get('pulse_info', {}).get('pulses', []):
+                # Results cached before pulses kept their adversary are bare names
+                if not isinstance(pulse, dict):
+                    continue
+                adversary = pulse.get('adversary')
+                if not adversary or not isinstance(adversary, str):
+                    continue
+                for actor in tables.match(adversary):
+                    actors.add(actor)
+                    # Add actor's known techniques
+                    for technique_id, entry in tables.expansions.get(actor, []):
+                        if technique_id not in techniques:
+                            techniques[technique_id] = entry
+                            tactics.update(entry['tactics'])
+                            
         # Convert sets to lists for JSON serialization
-        correlations['tactics'] = sorted(correlations['tactics'])
-        correlations['actors'] = sorted(correlations['actors'])
+        return {
+            'techniques': list(techniques.values()),
+            'tactics': sorted(tactics),
+            'actors': sorted(actors)
+        }
+        
+    def _actor_tables(self) -> _ActorTables:
+        """Actor tables for the current ATT&CK data, rebuilt only when it is swapped"""
+        actors = self.mitre.actors
+        generation = self.mitre.generation
+        mitre, tables_actors, tables_generation = self._tables_for
+        if self._tables is None or mitre is not self.mitre or tables_actors is not actors \
+                or tables_generation != generation:
+            # Batches already running keep the tables they started with
+            self._technique_entries = {}
+            self._tables = self._build_actor_tables(actors)
+            self._tables_for = (self.mitre, actors, generation)
+        return self._tables
         
-        return correlations
+    def _build_actor_tables(self, actors: Dict[str, Dict]) -> _ActorTables:
+        names: List[Tuple[str, str]] = []
+        expansions: Dict[str, List[Tuple[str, TechniqueEntry]]] = {}
         
-    def _process_virustotal(self, vt_data: Dict, correlations: Dict):
-        """Extract MITRE references from VirusTotal data"""
-        for tag in vt_data.get('tags', []):
-            if tag.startswith('T') and tag[1:].isdigit():
-                technique = self.mitre.get_technique(tag)
-                if technique:
-                    correlations['techniques'].append({
-                        'id': tag,
-                        'name': technique['name'],
-                        'tactics': technique['tactic'],
-                        'url': technique['url']
-                    })
-                    correlations['tactics'].update(technique['tactic'])
+        for key, profile in actors.items():
+            key = key.lower()
+            names.append((key, key))
+            name = profile.get('name') or ''
+            # "APT28 (Fancy Bear)" is also matched as "APT28" and "Fancy Bear"
+            for alias in [name, *re.split(r'\s*[()]\s*', name), *profile.get('aliases', [])]:
+                if alias:
+                    names.append((alias, key))
                     
-    def _process_otx(self, otx_data: Dict, correlations: Dict):
-        """Extract threat actor info from OTX data"""
-        for pulse in otx_data.get('pulse_info', {}).get('pulses', []):
-            for actor in pulse.get('adversary', '').split(','):
-                actor = actor.strip().lower()
-                if actor in self.mitre.actors:
-                    correlations['actors'].add(actor)
-                    # Add actor's known techniques
-                    for tech_id in self.mitre.get_actor_techniques(actor):
-                        technique = self.mitre.get_technique(tech_id)
-                        if technique:
-                            correlations['techniques'].append({
-                                'id': tech_id,
-                                'name': technique['name'],
-                                'tactics': technique['tactic'],
-                                'url': technique['url'],
-                                'source': 'actor_profile'
-                            })
-                            correlations['tactics'].update(technique['tactic'])
\ No newline at end of file
+            expansion = {}
+            for technique_id in self.mitre.get_actor_techniques(key):
+                technique_id = technique_id.upper()
+                entry = self._technique_entry(technique_id, 'actor_profile')
+                if entry:
+                    expansion.setdefault(technique_id, entry)
+            expansions[key] = list(expansion.items())
+            
+        return _ActorTables(NameMatcher(names), expansions)
+        
+    def _technique_entry(self, technique_id: str, source: Optional[str] = None) -> Optional[TechniqueEntry]:
+        """Correlation entry for a technique, looked up once per ID and source"""
+        memo_key = (technique_id, source)
+        if memo_key not in self._technique_entries:
+            technique = self.mitre.get_technique(technique_id)
+            entry = None
+            if technique:
+                entry = {
+                    'id': technique_id,
+                    'name': technique['name'],
+                    'tactics': technique['tactic'],
+                    'url': technique['url']
+                }
+                if source:
+                    entry['source'] = source
+            self._technique_entries[memo_key] = entry
+        return self._technique_entries[memo_key]
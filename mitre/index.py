@@ -0,0 +1,398 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from config import settings
+
+# Bump when the index layout changes; indexes built with an older one are rebuilt
+_SCHEMA_VERSION = 1
+
+# A technique row: (external id, details, STIX object id, STIX modified timestamp)
+TechniqueRecord = Tuple[str, Dict[str, Any], Optional[str], Optional[str]]
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def technique_records(objects: Iterable[Dict[str, Any]]) -> Iterator[TechniqueRecord]:
+    """
+    ATT&CK techniques among STIX objects
+    
+    Args:
+        objects: The 'objects' of an ATT&CK STIX bundle
+        
+    Returns:
+        Iterator of (technique id, details, STIX id, modified) tuples
+    """
+    for item in objects:
+        if item.get('type') != 'attack-pattern':
+            continue
+        for ref in item.get('external_references', []):
+            if ref.get('source_name') == 'mitre-attack':
+                yield ref['external_id'], {
+                    'name': item['name'],
+                    'tactic': [phase['phase_name'] for phase in item.get('kill_chain_phases', [])],
+                    'url': ref['url'],
+                    'platforms': item.get('x_mitre_platforms', [])
+                }, item.get('id'), item.get('modified')
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID")
+    conn.execute("""
+        CREATE TABLE techniques (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            tactics TEXT NOT NULL,
+            url TEXT,
+            platforms TEXT NOT NULL,
+            stix_id TEXT,
+            modified TEXT
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+def _technique_row(record: TechniqueRecord) -> Tuple[Any, ...]:
+    technique_id, technique, stix_id, modified = record
+    return (technique_id.upper(), technique['name'], json.dumps(technique['tactic']), technique['url'],
+            json.dumps(technique['platforms']), stix_id, modified)
+
+def _source_meta(source: Path) -> Dict[str, str]:
+    stat = source.stat()
+    return {
+        'source': str(source),
+        'source_mtime_ns': str(stat.st_mtime_ns),
+        'source_size': str(stat.st_size),
+        'source_sha256': _file_sha256(source)
+    }
+
+def load_bundle(source: Union[str, Path]) -> List[Dict[str, Any]]:
+    """The 'objects' of an ATT&CK STIX bundle"""
+    with open(source, 'r', encoding='utf-8') as f:
+        return json.load(f).get('objects', [])
+
+def bundle_versions(objects: Iterable[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """STIX id -> 'modified' timestamp of every object in a bundle"""
+    return {item['id']: item.get('modified') for item in objects if 'id' in item}
+
+def diff_objects(old_versions: Dict[str, Optional[str]],
+                 new_objects: Iterable[Dict[str, Any]]) -> Dict[str, List]:
+    """
+    Compare a bundle's objects with an earlier version of it by STIX id and 'modified'
+    
+    Args:
+        old_versions: STIX id -> 'modified' of the earlier objects (see bundle_versions)
+        new_objects: Objects of the newer bundle
+        
+    Returns:
+        {'added': [objects], 'modified': [objects], 'removed': [STIX ids]}
+    """
+    added, modified = [], []
+    seen = set()
+    for item in new_objects:
+        stix_id = item.get('id')
+        if not stix_id:
+            continue
+        seen.add(stix_id)
+        if stix_id not in old_versions:
+            added.append(item)
+        elif item.get('modified') != old_versions[stix_id]:
+            modified.append(item)
+    removed = [stix_id for stix_id in old_versions if stix_id not in seen]
+    return {'added': added, 'modified': modified, 'removed': removed}
+
+def install_bundle(new_bundle: Union[str, Path], target: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Copy a bundle over the configured one, atomically
+    
+    Args:
+        new_bundle: Downloaded enterprise-attack.json
+        target: Bundle to replace (defaults to settings.MITRE_ATTACK_FILE)
+        
+    Returns:
+        The installed bundle's path
+    """
+    new_bundle = Path(new_bundle)
+    target = Path(target or settings.MITRE_ATTACK_FILE)
+    if new_bundle.resolve() == target.resolve():
+        return target
+        
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=target.name + '.', suffix='.tmp', dir=target.parent)
+    os.close(fd)
+    try:
+        shutil.copyfile(new_bundle, tmp_name)
+        os.replace(tmp_name, target)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return target
+
+def _replace_index(index_path: Path, write: Callable[[sqlite3.Connection], None]) -> None:
+    """Write an index to a temporary file with write(conn) and move it into place
+    
+    Processes reading the previous index keep their open file and are
+    never disturbed; new readers see the new index.
+    """
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=index_path.name + '.', suffix='.tmp', dir=index_path.parent)
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_name, isolation_level=None)
+        try:
+            write(conn)
+        finally:
+            conn.close()
+        os.replace(tmp_name, index_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+def build_index(source: Optional[Union[str, Path]] = None,
+                index_path: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """
+    Compile an ATT&CK STIX bundle into a SQLite technique index
+    
+    The index is written to a temporary file and moved into place, so
+    processes reading the previous index are never disturbed.
+    
+    Args:
+        source: enterprise-attack.json bundle (defaults to settings.MITRE_ATTACK_FILE)
+        index_path: Index file (defaults to settings.MITRE_INDEX_PATH)
+        
+    Returns:
+        Technique count and build time in seconds
+    """
+    source = Path(source or settings.MITRE_ATTACK_FILE)
+    index_path = Path(index_path or settings.MITRE_INDEX_PATH)
+    started = time.perf_counter()
+    
+    objects = load_bundle(source)
+    meta = _source_meta(source)
+    count = 0
+    
+    def write(conn: sqlite3.Connection) -> None:
+        nonlocal count
+        _create_schema(conn)
+        conn.execute("BEGIN")
+        rows = [_technique_row(record) for record in technique_records(objects)]
+        conn.executemany("INSERT OR REPLACE INTO techniques VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        conn.execute("COMMIT")
+        count = conn.execute("SELECT COUNT(*) FROM techniques").fetchone()[0]
+        
+    _replace_index(index_path, write)
+    return {'techniques': count, 'seconds': time.perf_counter() - started}
+
+def update_index(source: Optional[Union[str, Path]] = None,
+                 index_path: Optional[Union[str, Path]] = None,
+                 old_versions: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Any]:
+    """
+    Apply only the techniques that changed in a new ATT&CK bundle to the index
+    
+    Techniques are compared with the index's own STIX ids and 'modified'
+    timestamps unless the previous bundle's versions are given. The
+    updated index is a copy moved into place, like a full build, so
+    readers of the previous index are never disturbed. Without a usable
+    index this falls back to build_index.
+    
+    Args:
+        source: The new enterprise-attack.json bundle (defaults to settings.MITRE_ATTACK_FILE)
+        index_path: Index file (defaults to settings.MITRE_INDEX_PATH)
+        old_versions: STIX id -> 'modified' of the previous bundle (see bundle_versions)
+        
+    Returns:
+        Counts of added, modified and removed techniques, the technique
+        total and the update time in seconds
+    """
+    source = Path(source or settings.MITRE_ATTACK_FILE)
+    index_path = Path(index_path or settings.MITRE_INDEX_PATH)
+    started = time.perf_counter()
+    
+    if _read_meta(index_path) is None:
+        result = build_index(source, index_path)
+        return dict(result, added=result['techniques'], modified=0, removed=0, rebuilt=True)
+        
+    objects = [item for item in load_bundle(source) if item.get('type') == 'attack-pattern']
+    meta = _source_meta(source)
+    if old_versions is None:
+        conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        try:
+            old_versions = dict(conn.execute(
+                "SELECT stix_id, modified FROM techniques WHERE stix_id IS NOT NULL"
+            ).fetchall())
+        finally:
+            conn.close()
+    else:
+        # STIX ids are prefixed with their type; only techniques are indexed
+        old_versions = {stix_id: modified for stix_id, modified in old_versions.items()
+                        if stix_id.startswith('attack-pattern--')}
+    changes = diff_objects(old_versions, objects)
+    count = 0
+    
+    def write(conn: sqlite3.Connection) -> None:
+        nonlocal count
+        current = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        try:
+            current.backup(conn)
+        finally:
+            current.close()
+        conn.execute("BEGIN")
+        # A changed object may carry a different technique id, so drop it by STIX id first
+        stale = [item['id'] for item in changes['modified']] + changes['removed']
+        conn.executemany("DELETE FROM techniques WHERE stix_id = ?", [(stix_id,) for stix_id in stale])
+        rows = [_technique_row(record) for record in technique_records(changes['added'] + changes['modified'])]
+        conn.executemany("INSERT OR REPLACE INTO techniques VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", meta.items())
+        conn.execute("COMMIT")
+        count = conn.execute("SELECT COUNT(*) FROM techniques").fetchone()[0]
+        
+    _replace_index(index_path, write)
+    return {
+        'added': len(changes['added']),
+        'modified': len(changes['modified']),
+        'removed': len(changes['removed']),
+        'techniques': count,
+        'seconds': time.perf_counter() - started,
+        'rebuilt': False
+    }
+
+def _read_meta(index_path: Path) -> Optional[Dict[str, str]]:
+    """Build metadata of an index, or None if it's missing or has an older layout"""
+    if not index_path.exists():
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                return None
+            return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+def index_is_current(source: Optional[Union[str, Path]] = None,
+                     index_path: Optional[Union[str, Path]] = None) -> bool:
+    """
+    Whether the index was built from the current source file
+    
+    A matching mtime and size is trusted without reading the source; if
+    either changed, the content hash decides, and a touched but unchanged
+    file just has its recorded mtime updated.
+    """
+    source = Path(source or settings.MITRE_ATTACK_FILE)
+    index_path = Path(index_path or settings.MITRE_INDEX_PATH)
+    meta = _read_meta(index_path)
+    if meta is None:
+        return False
+        
+    stat = source.stat()
+    if meta.get('source_mtime_ns') == str(stat.st_mtime_ns) and meta.get('source_size') == str(stat.st_size):
+        return True
+    if meta.get('source_sha256') != _file_sha256(source):
+        return False
+        
+    try:
+        conn = sqlite3.connect(str(index_path), timeout=5, isolation_level=None)
+        try:
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+                ('source_mtime_ns', str(stat.st_mtime_ns)), ('source_size', str(stat.st_size))
+            ])
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        # Read-only deployments just re-hash next time
+        pass
+    return True
+
+def ensure_index(source: Optional[Union[str, Path]] = None,
+                 index_path: Optional[Union[str, Path]] = None, force: bool = False) -> bool:
+    """
+    Build the index if it is missing, or update it if the bundle changed
+    
+    A changed bundle is applied incrementally (see update_index); force
+    rebuilds from scratch. An existing index is used as-is when the
+    source bundle isn't present, so deployments can ship the index alone.
+    
+    Returns:
+        True if the index was (re)built or updated
+        
+    Raises:
+        FileNotFoundError: If neither the bundle nor an index exists
+    """
+    source = Path(source or settings.MITRE_ATTACK_FILE)
+    index_path = Path(index_path or settings.MITRE_INDEX_PATH)
+    
+    if not source.exists():
+        if _read_meta(index_path) is not None:
+            return False
+        raise FileNotFoundError(f"MITRE ATT&CK data not found: {source}")
+        
+    if force:
+        build_index(source, index_path)
+    elif not index_is_current(source, index_path):
+        update_index(source, index_path)
+    else:
+        return False
+    return True
+
+class AttackIndex:
+    """Read-only, memory-mapped view of a compiled ATT&CK technique index"""
+    
+    def __init__(self, index_path: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            index_path: Index file built by build_index (defaults to settings.MITRE_INDEX_PATH)
+        """
+        self.path = Path(index_path or settings.MITRE_INDEX_PATH)
+        self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size = {int(settings.MITRE_INDEX_MMAP_BYTES)}")
+        self._lock = threading.Lock()
+        # Techniques already looked up (None for unknown ids)
+        self._techniques: Dict[str, Optional[Dict[str, Any]]] = {}
+        
+    @staticmethod
+    def _technique(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        name, tactics, url, platforms = row
+        return {'name': name, 'tactic': json.loads(tactics), 'url': url, 'platforms': json.loads(platforms)}
+        
+    def get_technique(self, technique_id: str) -> Optional[Dict[str, Any]]:
+        """Technique details by ID (e.g. T1059 or T1059.003), or None if unknown"""
+        technique_id = technique_id.upper()
+        if technique_id in self._techniques:
+            return self._techniques[technique_id]
+            
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT name, tactics, url, platforms FROM techniques WHERE id = ?", (technique_id,)
+            ).fetchone()
+        technique = self._technique(row) if row else None
+        self._techniques[technique_id] = technique
+        return technique
+        
+    def techniques(self) -> Dict[str, Dict[str, Any]]:
+        """Every technique, keyed by ID"""
+        with self._lock:
+            rows = self.conn.execute("SELECT id, name, tactics, url, platforms FROM techniques").fetchall()
+        return {row[0]: self._technique(row[1:]) for row in rows}
+        
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM techniques").fetchone()[0]
+            
+    def meta(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+            
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
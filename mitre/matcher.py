@@ -0,0 +1,83 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+# Runs of anything but letters and digits compare equal ("APT-28" == "apt 28")
+_SEPARATORS_RE = re.compile(r'[^0-9a-z]+')
+
+def normalize_name(text: str) -> str:
+    """Lowercase a name and collapse punctuation and whitespace to single spaces"""
+    return _SEPARATORS_RE.sub(' ', text.lower()).strip()
+
+class NameMatcher:
+    """Aho-Corasick automaton that finds every known name in a text in one pass
+    
+    Names and texts are normalized the same way, and matches must start and
+    end on a word boundary, so 'Fancy Bear' is found in "APT28/fancy-bear group"
+    but 'APT2' is not found in 'APT28'.
+    """
+    
+    def __init__(self, names: Iterable[Tuple[str, str]]):
+        """
+        Args:
+            names: (name, value) pairs; a match on a name reports its value
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (name length, value) for every name ending at each state
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        
+        for name, value in names:
+            name = normalize_name(name)
+            if name:
+                self._add(name, value)
+        self._link()
+        
+    def __len__(self) -> int:
+        return len(self._goto)
+        
+    def _add(self, name: str, value: str) -> None:
+        state = 0
+        for char in name:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(name), value))
+        
+    def _link(self) -> None:
+        """Compute failure links breadth-first, merging the outputs they reach"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[child] = link if link != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                
+    def find(self, text: str) -> List[str]:
+        """Values of every name found in the text, ordered by where each first match ends"""
+        text = normalize_name(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Dict[str, None] = {}
+        state = 0
+        
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state] or (end < len(text) and text[end] != ' '):
+                continue
+            for length, value in out[state]:
+                start = end - length
+                if start == 0 or text[start - 1] == ' ':
+                    found.setdefault(value)
+        return list(found)
@@ -0,0 +1,44 @@
+import threading
+from typing import Optional
+from config import settings
+from .attack import MITREAttack
+
+class AttackReloader:
+    """Swap changed ATT&CK and threat actor data into a MITREAttack in the background
+    
+    Applying a new bundle reads it in full, so it runs here instead of on
+    the threads (or event loop) doing lookups; they only see the new index
+    and actors once refresh() assigns them.
+    """
+    
+    def __init__(self, mitre: MITREAttack, interval: Optional[float] = None):
+        """
+        Args:
+            mitre: ATT&CK data to keep current
+            interval: Seconds between checks (defaults to settings.MITRE_RELOAD_INTERVAL; 0 disables)
+        """
+        self.mitre = mitre
+        self.interval = settings.MITRE_RELOAD_INTERVAL if interval is None else interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+    def start(self) -> None:
+        """Check for changed data on a daemon thread every interval seconds"""
+        if not self.interval or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mitre-reloader", daemon=True)
+        self._thread.start()
+        
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+            
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.mitre.refresh()
+            except Exception as e:
+                print(f"Error reloading MITRE ATT&CK data: {str(e)}")
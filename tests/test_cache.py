@@ -0,0 +1,109 @@
+import sqlite3
+import time
+import pytest
+from unittest.mock import patch
+from cache.db import CacheDB, NOT_FOUND_ENTRY, is_not_found
+
+@pytest.fixture
+def cache(tmp_path):
+    db = CacheDB(tmp_path / 'cache.sqlite', ttl=60)
+    yield db
+    db.close()
+
+def test_set_and_get(cache):
+    cache.set('shodan', 'ip', '8.8.8.8', {'ports': [53]})
+    assert cache.get('shodan', 'ip', '8.8.8.8') == {'ports': [53]}
+    assert cache.get('virustotal', 'ip', '8.8.8.8') is None
+    assert cache.get('shodan', 'ip', '1.1.1.1') is None
+
+def test_bulk_get_and_set(cache):
+    items = {('shodan', 'ip', f'10.0.{i // 256}.{i % 256}'): {'n': i} for i in range(1200)}
+    cache.set_many(items)
+
+    found = cache.get_many(list(items) + [('otx', 'domain', 'missing.example')])
+    assert len(found) == 1200
+    assert found[('shodan', 'ip', '10.0.0.7')] == {'n': 7}
+    assert ('otx', 'domain', 'missing.example') not in found
+
+def test_expired_entries_are_ignored_and_cleared(cache):
+    cache.set('otx', 'domain', 'example.com', {})
+    cache.conn.execute("UPDATE entries SET expires_at = ?", (time.time() - 1,))
+
+    assert cache.get('otx', 'domain', 'example.com') is None
+    assert cache.clear_expired() == 1
+
+def test_zero_ttl_never_expires(tmp_path):
+    cache = CacheDB(tmp_path / 'cache.sqlite', ttl=0)
+    cache.set('otx', 'domain', 'example.com', {'a': 1})
+    assert cache.clear_expired() == 0
+    assert cache.get('otx', 'domain', 'example.com') == {'a': 1}
+    cache.close()
+
+def test_per_source_ttls(tmp_path):
+    ttls = {'virustotal': {'hash': 1000, 'default': 100}, 'abuseipdb': {'default': 10}}
+    with patch('cache.db.settings.CACHE_TTLS', ttls):
+        cache = CacheDB(tmp_path / 'cache.sqlite')
+        cache.set_many({
+            ('virustotal', 'hash', 'a' * 64): {},
+            ('virustotal', 'ip', '1.2.3.4'): {},
+            ('abuseipdb', 'ip', '1.2.3.4'): {}
+        })
+    rows = dict(cache.conn.execute("SELECT source || ':' || ioc_type, expires_at - timestamp FROM entries"))
+    assert rows == {'virustotal:hash': 1000, 'virustotal:ip': 100, 'abuseipdb:ip': 10}
+    cache.close()
+
+def test_wal_allows_concurrent_readers(cache):
+    cache.set('shodan', 'ip', '8.8.8.8', {'a': 1})
+    assert cache.conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+    reader = sqlite3.connect(str(cache.db_path))
+    reader.execute("BEGIN")
+    assert reader.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 1
+    cache.set('shodan', 'ip', '1.1.1.1', {'a': 2})  # writer is not blocked by the open read transaction
+    reader.close()
+    assert cache.get('shodan', 'ip', '1.1.1.1') == {'a': 2}
+
+def test_not_found_entries_use_negative_ttl(tmp_path):
+    with patch('cache.db.settings.CACHE_NEGATIVE_TTL', 30), \
+         patch('cache.db.settings.CACHE_TTLS', {'otx': {'default': 1000}}):
+        cache = CacheDB(tmp_path / 'cache.sqlite')
+        cache.set('otx', 'domain', 'fresh.example', dict(NOT_FOUND_ENTRY))
+        cache.set('otx', 'domain', 'known.example', {'pulse_info': {}})
+
+    rows = dict(cache.conn.execute("SELECT ioc, expires_at - timestamp FROM entries"))
+    assert rows == {'fresh.example': 30, 'known.example': 1000}
+    assert is_not_found(cache.get('otx', 'domain', 'fresh.example'))
+    cache.close()
+
+def test_access_frequency_and_hot_expiring(cache):
+    cache.set('shodan', 'ip', '1.1.1.1', {'a': 1})
+    cache.set('shodan', 'ip', '2.2.2.2', {'a': 2})
+    for _ in range(3):
+        cache.get('shodan', 'ip', '1.1.1.1')
+    cache.record_access({('shodan', 'ip', '2.2.2.2'): 1})
+
+    now = time.time()
+    hot = cache.hot_expiring(now + 120, min_hits=2, accessed_since=now - 10)
+    assert [key for key, _ in hot] == [('shodan', 'ip', '1.1.1.1')]
+    assert cache.hot_expiring(now + 30, min_hits=2, accessed_since=now - 10) == []
+
+    # Rewriting an entry decays its count
+    cache.set('shodan', 'ip', '1.1.1.1', {'a': 3})
+    assert cache.conn.execute("SELECT hits FROM entries WHERE ioc = '1.1.1.1'").fetchone()[0] == 1
+
+def test_reads_buffer_access_stamps(cache):
+    cache.set('shodan', 'ip', '1.1.1.1', {'a': 1})
+    writes = cache.conn.total_changes
+    for _ in range(3):
+        cache.get('shodan', 'ip', '1.1.1.1')
+    # Hits are kept in memory, so reads never start a write transaction
+    assert cache.conn.total_changes == writes
+
+    cache.flush_access()
+    assert cache.conn.execute("SELECT hits FROM entries WHERE ioc = '1.1.1.1'").fetchone()[0] == 3
+
+def test_access_stamps_flush_after_interval(cache):
+    cache.set('shodan', 'ip', '1.1.1.1', {'a': 1})
+    with patch('cache.db.settings.CACHE_ACCESS_FLUSH_INTERVAL', 0):
+        cache.get('shodan', 'ip', '1.1.1.1')
+    assert cache.conn.execute("SELECT hits FROM entries WHERE ioc = '1.1.1.1'").fetchone()[0] == 1
@@ -0,0 +1,68 @@
+import json
+import time
+import pytest
+from cache.codec import CODECS, FORMAT_VERSION, codec_of, decode, get_codec
+from cache.db import CacheDB
+from cache.migrate import import_tinydb
+
+PAYLOAD = {'ports': [22, 443], 'tags': ['vpn'], 'score': 0.5, 'nested': {'ok': True, 'none': None}}
+
+@pytest.mark.parametrize('name', sorted(CODECS))
+def test_codec_round_trip(name):
+    codec = get_codec(name)
+    encoded = codec.encode(PAYLOAD)
+    assert encoded[0] == FORMAT_VERSION
+    assert codec_of(encoded) == name
+    assert decode(encoded) == PAYLOAD
+
+def test_auto_prefers_compressed_codec():
+    assert get_codec('auto').name != 'json'
+
+def test_unknown_codec_rejected():
+    with pytest.raises(ValueError):
+        get_codec('pickle')
+
+def test_legacy_text_payload_decodes():
+    assert codec_of(json.dumps(PAYLOAD)) == 'legacy'
+    assert decode(json.dumps(PAYLOAD)) == PAYLOAD
+
+def test_unsupported_version_rejected():
+    with pytest.raises(ValueError):
+        decode(bytes((FORMAT_VERSION + 1, 0)) + b'{}')
+
+def test_compression_shrinks_repetitive_payloads(tmp_path):
+    data = {'resolutions': [{'ip': '10.0.0.1', 'first_seen': '2024-01-01'}] * 200}
+    assert len(get_codec('json+zlib').encode(data)) < len(get_codec('json').encode(data)) / 5
+
+def test_recode_converts_mixed_rows(tmp_path):
+    cache = CacheDB(tmp_path / 'cache.sqlite', codec='json')
+    cache.set_many({('shodan', 'ip', f'10.0.0.{i}'): {'n': i} for i in range(10)})
+    # Row written before the codec layer existed
+    cache.conn.execute("UPDATE entries SET data = ? WHERE ioc = '10.0.0.0'", (json.dumps({'n': 0}),))
+
+    result = cache.recode('json+zlib', batch_size=3)
+    assert result == {'converted': 10, 'unchanged': 0}
+    codecs = {codec_of(row[0]) for row in cache.conn.execute("SELECT data FROM entries")}
+    assert codecs == {'json+zlib'}
+    assert cache.get('shodan', 'ip', '10.0.0.0') == {'n': 0}
+    assert cache.recode()['unchanged'] == 10
+    cache.close()
+
+def test_import_tinydb(tmp_path):
+    legacy = tmp_path / 'ioc_cache.json'
+    fresh = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime())
+    legacy.write_text(json.dumps({'_default': {
+        '1': {'ioc': '8.8.8.8', 'timestamp': fresh,
+              'data': {'shodan': {'ports': [53]}, 'otx': {'pulses': 2}, 'mitre': {'techniques': []}}},
+        '2': {'ioc': '1.1.1.1', 'timestamp': '2001-01-01T00:00:00',
+              'data': {'shodan': {'ports': [53]}}},
+        '3': {'ioc': 'not an ioc', 'timestamp': fresh, 'data': {}}
+    }}))
+
+    cache = CacheDB(tmp_path / 'cache.sqlite')
+    assert import_tinydb(cache, legacy) == {'imported': 2, 'skipped': 2}
+    assert cache.get('shodan', 'ip', '8.8.8.8') == {'ports': [53]}
+    assert cache.get('otx', 'ip', '8.8.8.8') == {'pulses': 2}
+    assert cache.get('mitre', 'ip', '8.8.8.8') is None
+    assert cache.get('shodan', 'ip', '1.1.1.1') is None
+    cache.close()
@@ -0,0 +1,59 @@
+import time
+import pytest
+from cache.db import CacheDB
+from cache.maintenance import CacheMaintainer
+
+@pytest.fixture
+def cache(tmp_path):
+    db = CacheDB(tmp_path / 'cache.sqlite', ttl=60)
+    yield db
+    db.close()
+
+def test_sweep_removes_expired(cache):
+    cache.set_many({('otx', 'domain', f'd{i}.example'): {'i': i} for i in range(10)})
+    cache.conn.execute("UPDATE entries SET expires_at = ? WHERE ioc LIKE 'd1%'", (time.time() - 1,))
+
+    result = CacheMaintainer(cache, max_bytes=0).sweep()
+    assert result == {'expired': 1, 'evicted': 0}
+    assert cache.stats()['entries'] == 9
+
+def test_evicts_least_recently_accessed(cache):
+    cache.set_many({('shodan', 'ip', f'10.0.0.{i}'): {'pad': 'x' * 100} for i in range(10)})
+    cache.conn.execute("UPDATE entries SET last_access = 0")
+    cache.get('shodan', 'ip', '10.0.0.0')  # touched, so newest
+
+    cap = cache.payload_bytes() // 2
+    evicted = CacheMaintainer(cache, max_bytes=cap).sweep()['evicted']
+
+    assert evicted >= 5
+    assert cache.payload_bytes() <= cap
+    assert cache.get('shodan', 'ip', '10.0.0.0') is not None
+
+def test_stats_per_source(cache):
+    cache.set('shodan', 'ip', '8.8.8.8', {'ports': [53]})
+    cache.set('otx', 'domain', 'example.com', {})
+    cache.set('otx', 'domain', 'example.org', {})
+
+    stats = cache.stats()
+    assert stats['sources']['otx']['entries'] == 2
+    assert stats['sources']['shodan']['bytes'] > 0
+    assert stats['entries'] == 3
+    assert stats['file_bytes'] > 0
+
+def test_compact_reclaims_space(cache):
+    cache.set_many({('vt', 'hash', f'{i:064x}'): {'names': ['x' * 500]} for i in range(500)})
+    cache.conn.execute("UPDATE entries SET expires_at = ?", (time.time() - 1,))
+
+    result = CacheMaintainer(cache, max_bytes=0).compact()
+    assert result['expired'] == 500
+    assert result['bytes_after'] < result['bytes_before']
+
+def test_background_sweeps(cache):
+    cache.set('otx', 'domain', 'example.com', {})
+    cache.conn.execute("UPDATE entries SET expires_at = ?", (time.time() - 1,))
+
+    maintainer = CacheMaintainer(cache, max_bytes=0, interval=0.05)
+    maintainer.start()
+    time.sleep(0.3)
+    maintainer.stop()
+    assert cache.stats()['entries'] == 0
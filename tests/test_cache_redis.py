@@ -0,0 +1,189 @@
+import socketserver
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from cache.backend import NOT_FOUND_ENTRY, open_backend
+from cache.redis_backend import _RELEASE_FILL_SCRIPT, RedisCache, RedisClient, RedisError
+from enrichers.manager import EnrichmentManager
+from tests.test_manager import FakeEnricher
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Local stand-in speaking enough RESP for the cache: GET/MGET/SET/DEL/PING and the fill-release EVAL"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeRedisHandler)
+        self.data = {}
+        self.expiry = {}
+        self.lock = threading.Lock()
+        self.commands = []
+
+    def live(self, key):
+        if key in self.expiry and self.expiry[key] <= time.time():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return self.data.get(key)
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def bulk(self, value):
+        return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+
+    def handle(self):
+        server = self.server
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            name = args[0].upper().decode()
+            server.commands.append(name)
+            with server.lock:
+                if name == 'PING':
+                    reply = b'+PONG\r\n'
+                elif name == 'GET':
+                    reply = self.bulk(server.live(args[1]))
+                elif name == 'MGET':
+                    reply = b'*%d\r\n' % (len(args) - 1) + b''.join(self.bulk(server.live(k)) for k in args[1:])
+                elif name == 'SET':
+                    key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+                    if b'NX' in options and server.live(key) is not None:
+                        reply = b'$-1\r\n'
+                    else:
+                        server.data[key] = value
+                        server.expiry.pop(key, None)
+                        if b'PX' in options:
+                            server.expiry[key] = time.time() + int(options[options.index(b'PX') + 1]) / 1000
+                        reply = b'+OK\r\n'
+                elif name == 'DEL':
+                    removed = sum(server.data.pop(k, None) is not None for k in args[1:])
+                    reply = b':%d\r\n' % removed
+                elif name == 'EVAL' and args[1].decode() == _RELEASE_FILL_SCRIPT:
+                    # Compare-and-delete, atomic under the server lock like a real script
+                    key, token = args[3], args[4]
+                    removed = server.live(key) == token and server.data.pop(key, None) is not None
+                    reply = b':%d\r\n' % removed
+                else:
+                    reply = b'-ERR unknown command\r\n'
+            self.wfile.write(reply)
+
+@pytest.fixture
+def redis_url():
+    server = FakeRedisServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0", server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def cache(redis_url):
+    url, _ = redis_url
+    backend = RedisCache(url, prefix='test:')
+    yield backend
+    backend.close()
+
+def test_client_round_trip(redis_url):
+    client = RedisClient(redis_url[0])
+    assert client.execute('PING') == 'PONG'
+    assert client.pipeline([('SET', 'a', b'\x00\xff'), ('GET', 'a'), ('GET', 'missing')]) == ['OK', b'\x00\xff', None]
+    with pytest.raises(RedisError):
+        client.execute('FLUSHALL')
+    client.close()
+
+def test_set_and_get_many(cache):
+    cache.set_many({('shodan', 'ip', f'10.0.0.{i}'): {'n': i} for i in range(20)})
+    found = cache.get_many([('shodan', 'ip', '10.0.0.3'), ('otx', 'ip', '10.0.0.3')])
+    assert found == {('shodan', 'ip', '10.0.0.3'): {'n': 3}}
+    assert cache.get('shodan', 'ip', '10.0.0.19') == {'n': 19}
+
+def test_entries_expire_with_source_ttl(cache, redis_url):
+    _, server = redis_url
+    with patch('cache.backend.settings.CACHE_TTLS', {'abuseipdb': {'default': 60}}):
+        cache.set('abuseipdb', 'ip', '1.2.3.4', {'score': 90})
+        cache.set('otx', 'ip', '1.2.3.4', NOT_FOUND_ENTRY)
+    (data, expires_at), = cache.get_entries([('abuseipdb', 'ip', '1.2.3.4')]).values()
+    assert expires_at == pytest.approx(time.time() + 60, abs=2)
+    assert cache.get('otx', 'ip', '1.2.3.4') == NOT_FOUND_ENTRY
+
+    for key in server.expiry:
+        server.expiry[key] = time.time() - 1
+    assert cache.get('abuseipdb', 'ip', '1.2.3.4') is None
+
+def test_already_expired_entries_are_not_written(cache, redis_url):
+    cache.ttl = 10
+    cache.set_many({('shodan', 'ip', '8.8.8.8'): {'ports': [53]}}, timestamp=time.time() - 60)
+    assert cache.get('shodan', 'ip', '8.8.8.8') is None
+
+def test_fill_lock_is_exclusive(redis_url):
+    url, _ = redis_url
+    first, second = RedisCache(url, prefix='test:'), RedisCache(url, prefix='test:')
+    key = ('virustotal', 'hash', 'a' * 64)
+
+    assert first.acquire_fill(key)
+    assert not second.acquire_fill(key)
+    second.release_fill(key)  # not the holder; must not release
+    assert not second.acquire_fill(key)
+    first.release_fill(key)
+    assert second.acquire_fill(key)
+
+def test_fill_release_spares_a_lock_taken_after_expiry(redis_url):
+    url, server = redis_url
+    first, second = RedisCache(url, prefix='test:'), RedisCache(url, prefix='test:')
+    key = ('virustotal', 'hash', 'b' * 64)
+    first.lock_ttl = 0.05
+
+    assert first.acquire_fill(key)
+    time.sleep(0.1)
+    assert second.acquire_fill(key)
+    first.release_fill(key)  # its lock expired; the current one is second's
+    assert not first.acquire_fill(key)
+    assert 'EVAL' in server.commands and 'GET' not in server.commands
+
+def test_open_backend_selects_redis(redis_url):
+    with patch('cache.backend.settings.CACHE_BACKEND', 'redis'), \
+         patch('cache.redis_backend.settings.REDIS_URL', redis_url[0]):
+        assert isinstance(open_backend(), RedisCache)
+    with pytest.raises(ValueError):
+        open_backend('memcached')
+
+def test_single_flight_across_workers(redis_url, tmp_path):
+    url, _ = redis_url
+    enricher = FakeEnricher('alpha', delay=0.3)
+    managers = []
+    for _ in range(3):
+        with patch.object(EnrichmentManager, '_load_enrichers', return_value={'ip': [enricher]}), \
+             patch('enrichers.manager.MITRECorrelator'), \
+             patch('enrichers.manager.settings.CACHE_MEMORY_ENABLED', False), \
+             patch('cache.backend.settings.CACHE_BACKEND', 'redis'), \
+             patch('cache.redis_backend.settings.REDIS_URL', url), \
+             patch('enrichers.rate_limiter.settings.RATE_LIMIT_DB', tmp_path / 'rate_limits.db'), \
+             patch('enrichers.rate_limiter.settings.RATE_LIMITS', {}):
+            manager = EnrichmentManager()
+        manager.correlator.correlate.return_value = {}
+        managers.append(manager)
+
+    results = [None] * 3
+    def run(i):
+        results[i] = managers[i].enrich_ioc('1.2.3.4', 'ip')
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert enricher.calls == ['1.2.3.4']
+    assert all(result == {'alpha': {'value': '1.2.3.4'}} for result in results)
+    assert sum(manager.single_flight_waits for manager in managers) == 2
@@ -0,0 +1,90 @@
+import gzip
+import json
+import time
+import pytest
+from cache.db import CacheDB, NOT_FOUND_ENTRY
+from cache.snapshot import export_snapshot, import_snapshot, read_snapshot
+
+@pytest.fixture
+def caches(tmp_path):
+    source = CacheDB(tmp_path / 'a.sqlite')
+    target = CacheDB(tmp_path / 'b.sqlite')
+    yield source, target
+    source.close()
+    target.close()
+
+def test_round_trip_keeps_timestamp_and_ttl(caches, tmp_path):
+    source, target = caches
+    fetched = time.time() - 100
+    source.set_many({
+        ('virustotal', 'hash', 'a' * 64): {'malicious': 3},
+        ('otx', 'domain', 'example.com'): NOT_FOUND_ENTRY
+    }, timestamp=fetched)
+    path = tmp_path / 'snap.ndjson.gz'
+
+    assert export_snapshot(source, path) == 2
+    assert import_snapshot(target, path) == {'merged': 2, 'skipped': 0}
+
+    original = {key: (ts, exp) for key, _, ts, exp in source.iter_entries()}
+    imported = {key: (ts, exp) for key, _, ts, exp in target.iter_entries()}
+    assert imported.keys() == original.keys()
+    for key, (ts, exp) in original.items():
+        assert imported[key][0] == pytest.approx(ts)
+        assert imported[key][1] == pytest.approx(exp)
+    assert target.get('virustotal', 'hash', 'a' * 64) == {'malicious': 3}
+    assert target.get('otx', 'domain', 'example.com') == NOT_FOUND_ENTRY
+
+def test_snapshot_is_gzip_ndjson(caches, tmp_path):
+    source, _ = caches
+    source.set('shodan', 'ip', '8.8.8.8', {'ports': [53]})
+    path = tmp_path / 'snap.gz'
+    export_snapshot(source, path)
+
+    with gzip.open(path, 'rt') as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]['format'] == 'ioc-enricher-cache'
+    assert lines[1]['source'] == 'shodan' and lines[1]['data'] == {'ports': [53]}
+
+def test_export_filters_sources(caches, tmp_path):
+    source, _ = caches
+    source.set('shodan', 'ip', '8.8.8.8', {'ports': [53]})
+    source.set('otx', 'ip', '8.8.8.8', {'pulses': 1})
+    path = tmp_path / 'snap.jsonl'
+
+    assert export_snapshot(source, path, ['otx']) == 1
+    assert [key for key, *_ in read_snapshot(path)] == [('otx', 'ip', '8.8.8.8')]
+
+def test_merge_keeps_newest_entry(caches, tmp_path):
+    source, target = caches
+    now = time.time()
+    source.set_many({('shodan', 'ip', '1.1.1.1'): {'v': 'old'}}, timestamp=now - 50)
+    source.set_many({('shodan', 'ip', '8.8.8.8'): {'v': 'new'}}, timestamp=now - 10)
+    target.set_many({('shodan', 'ip', '1.1.1.1'): {'v': 'local'}}, timestamp=now - 20)
+    target.set_many({('shodan', 'ip', '8.8.8.8'): {'v': 'local'}}, timestamp=now - 20)
+    path = tmp_path / 'snap.gz'
+    export_snapshot(source, path)
+
+    assert import_snapshot(target, path) == {'merged': 1, 'skipped': 1}
+    assert target.get('shodan', 'ip', '1.1.1.1') == {'v': 'local'}
+    assert target.get('shodan', 'ip', '8.8.8.8') == {'v': 'new'}
+
+def test_expired_entries_not_imported(caches, tmp_path):
+    source, target = caches
+    source.set_many({('abuseipdb', 'ip', '1.2.3.4'): {'score': 90}}, timestamp=time.time() - 600)
+    path = tmp_path / 'snap.gz'
+    export_snapshot(source, path)
+    # Simulate the entry expiring between export and import
+    with gzip.open(path, 'rt') as f:
+        header, entry = [json.loads(line) for line in f]
+    entry['ttl'] = 60
+    with gzip.open(path, 'wt') as f:
+        f.write(json.dumps(header) + '\n' + json.dumps(entry) + '\n')
+
+    assert import_snapshot(target, path) == {'merged': 0, 'skipped': 1}
+
+def test_rejects_foreign_file(caches, tmp_path):
+    _, target = caches
+    path = tmp_path / 'other.jsonl'
+    path.write_text('{"hello": "world"}\n')
+    with pytest.raises(ValueError):
+        import_snapshot(target, path)
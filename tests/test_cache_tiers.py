@@ -0,0 +1,57 @@
+import time
+import pytest
+from cache.db import CacheDB
+from cache.memory import MemoryCache
+from cache.tiered import TieredCache
+
+@pytest.fixture
+def tiered(tmp_path):
+    cache = TieredCache(CacheDB(tmp_path / 'cache.sqlite', ttl=60), MemoryCache(max_entries=100))
+    yield cache
+    cache.close()
+
+def test_memory_lru_evicts_by_count():
+    memory = MemoryCache(max_entries=2, max_bytes=0)
+    memory.set('a', 1)
+    memory.set('b', 2)
+    memory.get('a')
+    memory.set('c', 3)
+
+    assert memory.get('b') is None
+    assert memory.get('a') == 1
+    assert memory.stats()['evictions'] == 1
+
+def test_memory_evicts_by_bytes():
+    memory = MemoryCache(max_entries=0, max_bytes=30)
+    memory.set('a', 'x' * 10)
+    memory.set('b', 'y' * 10)
+    assert len(memory) == 2
+    memory.set('c', 'z' * 10)
+    assert memory.get('a') is None
+    assert memory.stats()['bytes'] <= 30
+
+def test_memory_respects_expiry():
+    memory = MemoryCache(max_entries=10)
+    memory.set('a', 1, expires_at=time.time() - 1)
+    assert memory.get('a') is None
+    assert memory.stats()['misses'] == 1
+
+def test_write_through_and_memory_hits(tiered):
+    tiered.set('shodan', 'ip', '8.8.8.8', {'ports': [53]})
+    assert tiered.persistent.get('shodan', 'ip', '8.8.8.8') == {'ports': [53]}
+
+    assert tiered.get('shodan', 'ip', '8.8.8.8') == {'ports': [53]}
+    stats = tiered.stats()
+    assert stats['memory']['hits'] == 1
+    assert stats['persistent'] == {'hits': 0, 'misses': 0}
+
+def test_persistent_hit_fills_memory(tiered):
+    tiered.persistent.set('otx', 'domain', 'example.com', {'a': 1})
+
+    assert tiered.get('otx', 'domain', 'example.com') == {'a': 1}
+    assert tiered.get('otx', 'domain', 'example.com') == {'a': 1}
+    assert tiered.get('otx', 'domain', 'missing.com') is None
+
+    stats = tiered.stats()
+    assert stats['persistent'] == {'hits': 1, 'misses': 1}
+    assert stats['memory']['hits'] == 1
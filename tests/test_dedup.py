@@ -0,0 +1,62 @@
+import json
+import random
+import pytest
+from utils.dedup import Deduplicator, FingerprintTable, fingerprint
+from utils.file_parser import FileParser
+
+def test_fingerprint_is_nonzero_and_stable():
+    assert fingerprint("evil.com") == fingerprint("evil" + ".com")
+    assert fingerprint("evil.com") != 0
+
+def test_fingerprint_table_grows():
+    table = FingerprintTable(slots=8)
+    for fp in range(1, 6):
+        assert table.add(fp)
+    assert not table.add(3)
+    assert table.needs_resize()
+
+    bigger = table.resized()
+    assert bigger.nbytes == 2 * table.nbytes
+    assert all(fp in bigger for fp in range(1, 6))
+    assert 99 not in bigger
+
+def test_filter_keeps_first_occurrence_order():
+    with Deduplicator() as dedup:
+        assert list(dedup.filter(["b", "a", "b", "c", "a"])) == ["b", "a", "c"]
+        assert dedup.unique == 3 and dedup.duplicates == 2
+        assert dedup.spills == 0
+
+def test_matches_exact_dedup_across_spills_and_merges(tmp_path):
+    rng = random.Random(7)
+    values = [f"host{rng.randrange(20000)}.example.com" for _ in range(60000)]
+
+    with Deduplicator(max_memory=4096, spill_dir=tmp_path, max_runs=3) as dedup:
+        result = list(dedup.filter(values))
+        assert dedup.spills > 3
+        assert len(dedup._runs) <= 3
+
+    assert result == list(dict.fromkeys(values))
+
+def test_close_removes_spill_files(tmp_path):
+    dedup = Deduplicator(max_memory=1024, spill_dir=tmp_path)
+    for i in range(2000):
+        dedup.add(f"10.0.{i // 256}.{i % 256}")
+    assert dedup.spills and any(tmp_path.iterdir())
+
+    dedup.close()
+    assert not any(tmp_path.iterdir())
+
+def test_dedup_across_files(tmp_path):
+    first = tmp_path / "a.json"
+    first.write_text(json.dumps(["8.8.8.8", "evil.com"]))
+    second = tmp_path / "b.csv"
+    second.write_text("ioc\nEVIL.com\n1.1.1.1\n8.8.8.8\n")
+
+    result = list(FileParser.iter_files([first, second]))
+    assert [r['ioc'] for r in result] == ["8.8.8.8", "evil.com", "1.1.1.1"]
+
+def test_iter_files_checks_every_path_first(tmp_path):
+    good = tmp_path / "a.json"
+    good.write_text("[]")
+    with pytest.raises(FileNotFoundError):
+        FileParser.iter_files([good, tmp_path / "missing.json"])
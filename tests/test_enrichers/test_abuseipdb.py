@@ -7,7 +7,7 @@ def abuse_enricher():
     with patch.dict('os.environ', {'ABUSEIPDB_API_KEY': 'test_key'}):
         return AbuseIPDBEnricher()
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_enrich_ip(mock_get, abuse_enricher):
     mock_response = MagicMock()
     mock_response.json.return_value = {
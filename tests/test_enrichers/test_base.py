@@ -0,0 +1,127 @@
+import threading
+import pytest
+import requests
+from unittest.mock import patch, MagicMock
+from enrichers.shodan import ShodanEnricher
+from enrichers.base import ERROR, FOUND, NOT_FOUND
+from enrichers.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderError,
+    TransientProviderError,
+    parse_retry_after
+)
+
+@pytest.fixture
+def enricher():
+    CircuitBreaker.reset_all()
+    with patch.dict('os.environ', {'SHODAN_API_KEY': 'test_key'}):
+        yield ShodanEnricher()
+    CircuitBreaker.reset_all()
+
+def _response(status, payload=None, headers=None):
+    response = MagicMock()
+    response.status_code = status
+    response.headers = headers or {}
+    response.json.return_value = payload or {}
+    return response
+
+def test_session_is_reused(enricher):
+    assert enricher.session is enricher.session
+    assert 'gzip' in enricher.session.headers['Accept-Encoding']
+
+def test_threads_share_connection_pool(enricher):
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(enricher.session)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sessions[0] is not sessions[1]
+    assert sessions[0].get_adapter('https://api.shodan.io') is sessions[1].get_adapter('https://api.shodan.io')
+
+@patch('enrichers.base.time.sleep')
+@patch('requests.Session.get')
+def test_retries_transient_errors(mock_get, mock_sleep, enricher):
+    mock_get.side_effect = [
+        _response(503),
+        _response(429, headers={'Retry-After': '2'}),
+        _response(200, {"ports": [22]})
+    ]
+
+    result = enricher.enrich("8.8.8.8", "ip")
+    assert result['ports'] == [22]
+    assert mock_get.call_count == 3
+    assert mock_sleep.call_args_list[-1].args == (2.0,)
+
+@patch('enrichers.base.time.sleep')
+@patch('requests.Session.get')
+def test_exhausted_retries_raise(mock_get, mock_sleep, enricher):
+    mock_get.return_value = _response(503)
+    with pytest.raises(TransientProviderError):
+        enricher.enrich("8.8.8.8", "ip")
+
+@patch('requests.Session.get')
+def test_not_found_is_no_data(mock_get, enricher):
+    mock_get.return_value = _response(404)
+    assert enricher.enrich("8.8.8.8", "ip") is None
+
+@patch('requests.Session.get')
+def test_long_retry_after_opens_breaker(mock_get, enricher):
+    mock_get.return_value = _response(429, headers={'Retry-After': '3600'})
+    with pytest.raises(TransientProviderError):
+        enricher.enrich("8.8.8.8", "ip")
+
+    with pytest.raises(CircuitOpenError):
+        enricher.enrich("8.8.4.4", "ip")
+    assert mock_get.call_count == 1
+
+@patch('enrichers.base.time.sleep')
+@patch('requests.Session.get')
+def test_dropped_response_is_retried(mock_get, mock_sleep, enricher):
+    mock_get.side_effect = [
+        requests.exceptions.ChunkedEncodingError("connection broken"),
+        _response(200, {"ports": [443]})
+    ]
+    assert enricher.enrich("8.8.8.8", "ip")['ports'] == [443]
+
+@patch('requests.Session.get')
+def test_failed_trial_reopens_breaker(mock_get, enricher):
+    breaker = enricher.breaker
+    breaker.failures = breaker.failure_threshold
+    breaker.opened_until = 1.0  # cooldown over: the next call is the half-open trial
+
+    mock_get.side_effect = requests.exceptions.TooManyRedirects("redirect loop")
+    with pytest.raises(ProviderError):
+        enricher.enrich("8.8.8.8", "ip")
+    assert breaker.state == 'open'
+
+    # Once the cooldown passes another trial is allowed and can close the breaker
+    breaker.opened_until = 1.0
+    mock_get.side_effect = None
+    mock_get.return_value = _response(200, {"ports": [22]})
+    assert enricher.enrich("8.8.8.8", "ip")['ports'] == [22]
+    assert breaker.state == 'closed'
+
+def test_parse_retry_after():
+    assert parse_retry_after({'Retry-After': '5'}) == 5.0
+    assert parse_retry_after({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '30'}) == 30.0
+    assert parse_retry_after({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '2000000010'},
+                             now=2000000000) == 10.0
+    assert parse_retry_after({}) is None
+
+@patch('requests.Session.get')
+def test_lookup_classifies_outcomes(mock_get, enricher):
+    mock_get.return_value = _response(200, {"ports": [80]})
+    found = enricher.lookup("8.8.8.8", "ip")
+    assert found.status == FOUND
+    assert found.data['ports'] == [80]
+    assert 'source' not in found.data
+
+    mock_get.return_value = _response(404)
+    assert enricher.lookup("8.8.8.8", "ip").status == NOT_FOUND
+
+    with patch.object(enricher, '_normalize_data', return_value={"source": "shodan", "error": "Invalid response format"}):
+        mock_get.return_value = _response(200, {"ports": [80]})
+        assert enricher.lookup("8.8.8.8", "ip").status == ERROR
@@ -7,7 +7,7 @@ def otx_enricher():
     with patch.dict('os.environ', {'OTX_API_KEY': 'test_key'}):
         return OTXEnricher()
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_enrich_domain(mock_get, otx_enricher):
     mock_response = MagicMock()
     mock_response.json.return_value = {
@@ -26,7 +26,7 @@ def test_enrich_domain(mock_get, otx_enricher):
     assert result['pulse_info']['count'] == 3
     assert isinstance(result['pulse_info']['pulses'], list)  # Ensure pulses is a list
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_enrich_hash(mock_get, otx_enricher):
     mock_response = MagicMock()
     mock_response.json.return_value = {
@@ -42,7 +42,7 @@ def test_enrich_hash(mock_get, otx_enricher):
     assert result['source'] == 'otx'
     assert isinstance(result['pulse_info'], dict)
     assert result['pulse_info']['count'] == 5
-    assert isinstance(result['pulse_info']['pulses'], list)
+    assert result['pulse_info']['pulses'] == [{"name": "MALWARE", "adversary": "APT29"}]
 
 def test_skip_non_domain_or_hash(otx_enricher):
     result = otx_enricher.enrich("8.8.8.8", "ip")
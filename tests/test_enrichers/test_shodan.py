@@ -7,7 +7,7 @@ def shodan_enricher():
     with patch.dict('os.environ', {'SHODAN_API_KEY': 'test_key'}):
         return ShodanEnricher()
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_enrich_ip(mock_get, shodan_enricher):
     mock_response = MagicMock()
     mock_response.json.return_value = {
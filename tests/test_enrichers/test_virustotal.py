@@ -7,7 +7,7 @@ def vt_enricher():
     with patch.dict('os.environ', {'VT_API_KEY': 'test_key'}):
         return VirusTotalEnricher()
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_enrich_ip(mock_get, vt_enricher):
     mock_response = MagicMock()
     mock_response.json.return_value = {
@@ -28,7 +28,7 @@ def test_enrich_ip(mock_get, vt_enricher):
     assert result['reputation'] == 90
     assert 'dns-server' in result['tags']
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_enrich_domain(mock_get, vt_enricher):
     mock_response = MagicMock()
     mock_response.json.return_value = {
@@ -45,7 +45,7 @@ def test_enrich_domain(mock_get, vt_enricher):
     assert result['source'] == 'virustotal'
     assert result['last_analysis_stats']['malicious'] == 2
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_enrich_hash(mock_get, vt_enricher):
     mock_response = MagicMock()
     mock_response.json.return_value = {
@@ -0,0 +1,51 @@
+import pytest
+from utils.extractor import IOCExtractor, refang
+
+REPORT = """From: bob@phish.example.org
+Beacon to hxxp://evil[.]com/gate.php and 1.2.3[.]4:443 at 12:30:45
+Dropped invoice.pdf and loader.exe (md5 D41D8CD98F00B204E9800998ECF8427E)
+Fallback 2001:db8::1, mac 00:1a:2b:3c:4d:5e, bogus 999.1.1.1, UA Mozilla/5.0
+Repeat: evil(.)com 1.2.3.4 c2[dot]evil[.]net
+"""
+
+def test_refang():
+    assert refang(b"1.2.3[.]4 evil(.)com a[dot]b fe80[:]:1") == b"1.2.3.4 evil.com a.b fe80::1"
+
+def test_extract_text():
+    result = IOCExtractor().extract_text(REPORT)
+    assert [(r['type'], r['ioc']) for r in result] == [
+        ('domain', 'phish.example.org'),
+        ('domain', 'evil.com'),
+        ('ip', '1.2.3.4'),
+        ('hash', 'd41d8cd98f00b204e9800998ecf8427e'),
+        ('ip', '2001:db8::1'),
+        ('domain', 'c2.evil.net'),
+    ]
+
+def test_chunks_are_line_aligned(tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_text("".join(f"line {i} 10.0.0.{i}\n" for i in range(50)))
+    extractor = IOCExtractor(workers=1, chunk_size=64)
+
+    ranges = extractor._chunk_ranges(path)
+    data = path.read_bytes()
+    assert len(ranges) > 5
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(data[end - 1:end] == b"\n" for _, end in ranges)
+    assert [r['ioc'] for r in extractor.extract_file(path)] == [f"10.0.0.{i}" for i in range(50)]
+
+def test_parallel_matches_serial(tmp_path):
+    path = tmp_path / "report.txt"
+    path.write_text(REPORT * 200 + "".join(f"host{i}.example.com\n" for i in range(300)))
+
+    serial = IOCExtractor(workers=1, chunk_size=512).extract_file(path)
+    parallel = IOCExtractor(workers=2, chunk_size=512).extract_file(path)
+    assert parallel == serial
+    assert len(serial) == 6 + 300
+
+def test_empty_and_missing_files(tmp_path):
+    empty = tmp_path / "empty.txt"
+    empty.write_text("")
+    assert IOCExtractor().extract_file(empty) == []
+    with pytest.raises(FileNotFoundError):
+        IOCExtractor().iter_file(tmp_path / "missing.txt")
@@ -0,0 +1,27 @@
+from utils.feeds import misp_attribute_values, record_values, stix_object_values, stix_pattern_values
+
+def test_stix_pattern_values():
+    pattern = ("([ipv4-addr:value = '10.0.0.1' OR ipv6-addr:value = '2001:db8::1'] "
+               "AND [domain-name:value = 'it\\'s.example']) "
+               "FOLLOWEDBY [url:value = 'https://user@c2.example.com:8443/x?q=1'] "
+               "AND [email-addr:value = 'a@b.example'] AND [file:name = 'x.exe']")
+    assert list(stix_pattern_values(pattern)) == ['10.0.0.1', '2001:db8::1', "it's.example", 'c2.example.com']
+
+def test_stix_object_values():
+    assert list(stix_object_values({"type": "file", "hashes": {"MD5": "a" * 32, "SHA-1": "b" * 40}})) == ["a" * 32, "b" * 40]
+    assert list(stix_object_values({"type": "url", "value": "http://evil.example/p"})) == ["evil.example"]
+    assert list(stix_object_values({"type": "indicator", "pattern_type": "sigma", "pattern": "[ipv4-addr:value = '1.1.1.1']"})) == []
+    assert list(stix_object_values({"type": "malware", "name": "x"})) == []
+
+def test_misp_attribute_values():
+    assert list(misp_attribute_values({"type": "ip-dst|port", "value": "192.0.2.1|443"})) == ["192.0.2.1"]
+    assert list(misp_attribute_values({"type": "filename|sha256", "value": "a.exe|" + "c" * 64})) == ["c" * 64]
+    assert list(misp_attribute_values({"type": "link", "value": "https://x.example/a"})) == ["x.example"]
+    assert list(misp_attribute_values({"type": "text", "value": "evil.example"})) == []
+    assert list(misp_attribute_values({"type": "ip-dst", "value": None})) == []
+
+def test_record_values():
+    assert list(record_values("8.8.8.8")) == ["8.8.8.8"]
+    assert list(record_values({"indicator": "evil.example"})) == ["evil.example"]
+    assert list(record_values({"Event": {"Attribute": [{"type": "domain", "value": "a.example"}]}})) == ["a.example"]
+    assert list(record_values(42)) == []
@@ -1,7 +1,8 @@
 import json
+import gzip
 import pytest
 from pathlib import Path
-from utils.file_parser import FileParser
+from utils.file_parser import FileParser, _JSONArrayStream
 
 def test_parse_json(tmp_path):
     # Create temp JSON file
@@ -31,4 +32,179 @@ def test_unsupported_format(tmp_path):
     test_file = tmp_path / "test.txt"
     test_file.write_text("dummy content")
     with pytest.raises(ValueError, match="Unsupported file format"):
-        FileParser.parse_file(test_file)
\ No newline at end of file
+        FileParser.parse_file(test_file)
+
+def test_iter_file_is_lazy(tmp_path):
+    test_file = tmp_path / "test.json"
+    test_file.write_text(json.dumps(["8.8.8.8", "example.com"]))
+
+    stream = FileParser.iter_file(test_file)
+    assert next(stream)['ioc'] == '8.8.8.8'
+    assert [ioc['ioc'] for ioc in stream] == ['example.com']
+
+def test_stream_json_across_chunk_boundaries(tmp_path):
+    iocs = [f"10.0.{i // 256}.{i % 256}" for i in range(300)] + [12345, None, {"x": [1, 2]}, "evil.example"]
+    document = json.dumps({"meta": {"source": "feed", "tags": ["a", "b"]}, "count": 304, "iocs": iocs})
+
+    with open(tmp_path / "feed.json", "w") as f:
+        f.write(document)
+    with open(tmp_path / "feed.json") as f:
+        assert list(_JSONArrayStream(f, chunk_size=7)) == iocs
+
+def test_stream_json_dedups_and_classifies(tmp_path):
+    test_file = tmp_path / "test.json"
+    test_file.write_text('[ "8.8.8.8" , "8.8.8.8", 42, "Example.COM" ]')
+
+    result = list(FileParser.iter_file(test_file))
+    assert [(r['ioc'], r['type']) for r in result] == [('8.8.8.8', 'ip'), ('example.com', 'domain')]
+
+@pytest.mark.parametrize("content, message", [
+    ('{"other": []}', "JSON must contain array"),
+    ('{"iocs": "8.8.8.8"}', "must be provided as a list"),
+    ('"8.8.8.8"', "JSON must contain array"),
+    ('["8.8.8.8", ', "Invalid JSON file"),
+    ('["8.8.8.8" "1.1.1.1"]', "Invalid JSON file"),
+])
+def test_stream_json_errors(tmp_path, content, message):
+    test_file = tmp_path / "test.json"
+    test_file.write_text(content)
+    with pytest.raises(ValueError, match=message):
+        FileParser.parse_file(test_file)
+
+def test_stream_csv_skips_header(tmp_path):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("indicator,comment\n8.8.8.8,dns\n\nexample.com,site\n")
+
+    assert [r['ioc'] for r in FileParser.iter_file(test_file)] == ['8.8.8.8', 'example.com']
+
+STIX_BUNDLE = {
+    "type": "bundle",
+    "id": "bundle--1",
+    "objects": [
+        {"type": "identity", "spec_version": "2.1", "id": "identity--1", "name": "feed"},
+        {"type": "indicator", "spec_version": "2.1", "id": "indicator--1", "pattern_type": "stix",
+         "pattern": "[ipv4-addr:value = '198.51.100.7' OR domain-name:value = 'Evil.example']"},
+        {"type": "indicator", "spec_version": "2.1", "id": "indicator--2", "pattern_type": "stix",
+         "pattern": "[file:hashes.'SHA-256' = '" + "a" * 64 + "'] AND [url:value = 'http://c2.example.net/gate']"},
+        {"type": "indicator", "spec_version": "2.1", "id": "indicator--3", "pattern_type": "yara",
+         "pattern": "rule x { condition: true }"},
+        {"type": "ipv6-addr", "spec_version": "2.1", "id": "ipv6-addr--1", "value": "2001:db8::5"},
+    ]
+}
+
+MISP_EVENT = {
+    "Event": {
+        "info": "phishing wave",
+        "Attribute": [
+            {"type": "ip-dst", "value": "203.0.113.9"},
+            {"type": "domain|ip", "value": "bad.example|203.0.113.10"},
+            {"type": "filename|md5", "value": "invoice.pdf|" + "b" * 32},
+            {"type": "comment", "value": "not an indicator"},
+        ],
+        "Object": [
+            {"name": "url", "Attribute": [{"type": "url", "value": "https://phish.example.org/login"}]}
+        ],
+        "Tag": [{"name": "tlp:green"}]
+    }
+}
+
+def _iocs(path, **kwargs):
+    return [r['ioc'] for r in FileParser.iter_file(path, **kwargs)]
+
+def test_detect_format(tmp_path):
+    cases = {
+        "plain.json": json.dumps({"iocs": ["8.8.8.8"]}),
+        "bundle.json": json.dumps(STIX_BUNDLE),
+        "event.json": json.dumps(MISP_EVENT),
+        "events.json": json.dumps([MISP_EVENT]),
+        "feed.jsonl": '"8.8.8.8"\n',
+        "feed.ndjson": '"8.8.8.8"\n',
+        "feed.csv": "8.8.8.8\n",
+    }
+    expected = {"plain.json": "json", "bundle.json": "stix", "event.json": "misp", "events.json": "misp",
+                "feed.jsonl": "ndjson", "feed.ndjson": "ndjson", "feed.csv": "csv"}
+    for name, content in cases.items():
+        (tmp_path / name).write_text(content)
+        assert FileParser.detect_format(tmp_path / name) == expected[name], name
+
+def test_parse_stix_bundle(tmp_path):
+    test_file = tmp_path / "bundle.json"
+    # Bundle keys in an unusual order: objects come before the type
+    test_file.write_text(json.dumps({"objects": STIX_BUNDLE["objects"], "type": "bundle"}))
+
+    assert _iocs(test_file) == ['198.51.100.7', 'evil.example', 'a' * 64, 'c2.example.net', '2001:db8::5']
+
+def test_parse_misp_event(tmp_path):
+    test_file = tmp_path / "event.json"
+    test_file.write_text(json.dumps(MISP_EVENT))
+
+    assert _iocs(test_file) == ['203.0.113.9', 'bad.example', '203.0.113.10', 'b' * 32, 'phish.example.org']
+
+def test_parse_misp_response_wrapper(tmp_path):
+    test_file = tmp_path / "export.json"
+    test_file.write_text(json.dumps({"response": [MISP_EVENT, {"Event": {"Attribute": [{"type": "ip-src", "value": "192.0.2.1"}]}}]}))
+
+    assert _iocs(test_file)[-1] == '192.0.2.1'
+    assert FileParser.detect_format(test_file) == 'misp'
+
+def test_parse_ndjson_mixed_records(tmp_path):
+    test_file = tmp_path / "feed.ndjson"
+    lines = [
+        json.dumps("8.8.8.8"),
+        "",
+        json.dumps({"ioc": "example.com", "score": 80}),
+        json.dumps(STIX_BUNDLE["objects"][1]),
+        json.dumps({"type": "ip-dst", "value": "192.0.2.44"}),
+        # STIX observables without the optional spec_version
+        json.dumps({"type": "domain-name", "value": "observed.example"}),
+        json.dumps({"type": "url", "id": "url--1", "value": "https://landing.example/a"}),
+        json.dumps(MISP_EVENT),
+    ]
+    test_file.write_text("\n".join(lines) + "\n")
+
+    assert _iocs(test_file) == ['8.8.8.8', 'example.com', '198.51.100.7', 'evil.example', '192.0.2.44',
+                                'observed.example', 'landing.example',
+                                '203.0.113.9', 'bad.example', '203.0.113.10', 'b' * 32, 'phish.example.org']
+
+def test_ndjson_reports_bad_line(tmp_path):
+    test_file = tmp_path / "feed.ndjson"
+    test_file.write_text('"8.8.8.8"\n{"ioc": \n')
+    with pytest.raises(ValueError, match="line 2"):
+        FileParser.parse_file(test_file)
+
+def test_parse_gzip_inputs(tmp_path):
+    with gzip.open(tmp_path / "feed.ndjson.gz", "wt") as f:
+        f.write('"8.8.8.8"\n{"ioc": "example.com"}\n')
+    with gzip.open(tmp_path / "bundle.json.gz", "wt") as f:
+        json.dump(STIX_BUNDLE, f)
+    with gzip.open(tmp_path / "iocs.csv.gz", "wt") as f:
+        f.write("indicator\n1.1.1.1\n")
+
+    assert _iocs(tmp_path / "feed.ndjson.gz") == ['8.8.8.8', 'example.com']
+    assert FileParser.detect_format(tmp_path / "bundle.json.gz") == 'stix'
+    assert _iocs(tmp_path / "bundle.json.gz")[0] == '198.51.100.7'
+    assert _iocs(tmp_path / "iocs.csv.gz") == ['1.1.1.1']
+
+def test_sniff_compressed_without_format_suffix(tmp_path):
+    for name, content in [("a.gz", '{"ioc": "8.8.8.8"}\n{"ioc": "1.1.1.1"}\n'),
+                          ("b.gz", json.dumps(MISP_EVENT)),
+                          ("c.gz", "8.8.8.8\n")]:
+        with gzip.open(tmp_path / name, "wt") as f:
+            f.write(content)
+
+    assert [FileParser.detect_format(tmp_path / name) for name in ("a.gz", "b.gz", "c.gz")] == ['ndjson', 'misp', 'csv']
+
+def test_parse_zstd_input(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    test_file = tmp_path / "feed.ndjson.zst"
+    test_file.write_bytes(zstandard.ZstdCompressor().compress(b'"8.8.8.8"\n"example.com"\n'))
+
+    assert _iocs(test_file) == ['8.8.8.8', 'example.com']
+
+def test_explicit_input_format(tmp_path):
+    test_file = tmp_path / "feed.txt"
+    test_file.write_text('"8.8.8.8"\n')
+
+    assert _iocs(test_file, input_format='ndjson') == ['8.8.8.8']
+    with pytest.raises(ValueError, match="Unsupported input format"):
+        FileParser.parse_file(test_file, input_format='xml')
@@ -1,5 +1,19 @@
+import io
 import pytest
-from formatters import format_json, format_csv, format_markdown, format_splunk
+import csv
+import json
+from formatters import (
+    WRITERS,
+    CSVWriter,
+    NDJSONWriter,
+    RecordWriter,
+    format_csv,
+    format_json,
+    format_markdown,
+    format_ndjson,
+    format_splunk,
+    write_json_stream
+)
 
 @pytest.fixture
 def sample_results():
@@ -55,4 +69,81 @@ def test_format_splunk(sample_results, tmp_path):
     result = format_splunk(sample_results, output_file)
     assert 'virustotal.malicious' in result
     assert 'mitre.techniques' in result
-    assert output_file.exists()
\ No newline at end of file
+    assert output_file.exists()
+
+def test_write_json_stream_matches_format_json(sample_results):
+    out = io.StringIO()
+    assert write_json_stream(iter(sample_results * 2), out) == 2
+    assert out.getvalue() == format_json(sample_results * 2)
+
+    empty = io.StringIO()
+    assert write_json_stream(iter([]), empty) == 0
+    assert empty.getvalue() == format_json([])
+
+@pytest.mark.parametrize("output_format,formatter", [
+    ('json', format_json), ('csv', format_csv), ('markdown', format_markdown), ('ndjson', format_ndjson)
+])
+def test_writers_match_formatters(sample_results, output_format, formatter):
+    results = sample_results + [{'ioc': 'evil.example', 'type': 'domain', 'enrichment': {}}]
+    out = io.StringIO()
+    assert WRITERS[output_format](out).write_all(iter(results)) == 2
+    assert out.getvalue() == formatter(results)
+
+def test_splunk_writer(sample_results):
+    out = io.StringIO()
+    with WRITERS['splunk'](out) as writer:
+        writer.write_record(sample_results[0])
+    events = json.loads(out.getvalue())
+    assert events[0]['virustotal.country'] == 'US'
+    assert events[0]['mitre.techniques'] == ['T1071']
+
+def test_ndjson_writer(sample_results, tmp_path):
+    out = io.StringIO()
+    with NDJSONWriter(out) as writer:
+        for result in sample_results * 3:
+            writer.write_record(result)
+            # Each record is complete on its own line as soon as it's written
+            assert out.getvalue().endswith('}\n')
+    lines = out.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == sample_results * 3
+
+    output_file = tmp_path / "output.ndjson"
+    format_ndjson(sample_results, output_file)
+    assert output_file.read_text(encoding='utf-8') == lines[0] + '\n'
+
+def test_csv_writer_spools_rows_until_close(sample_results, tmp_path):
+    out = io.StringIO()
+    writer = CSVWriter(out, spool_dir=tmp_path)
+    writer.open()
+    writer.write_record(sample_results[0])
+    writer.write_record({'ioc': 'evil.example', 'type': 'domain', 'note': None,
+                         'enrichment': {'otx': {'pulses': 3}}})
+    assert out.getvalue() == ''
+    writer.close()
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [row['ioc'] for row in rows] == ['8.8.8.8', 'evil.example']
+    # Columns from every record, blank where a record lacks them
+    assert rows[0]['virustotal_malicious'] == 'True'
+    assert rows[0]['otx_pulses'] == ''
+    assert rows[1]['otx_pulses'] == '3'
+    assert rows[1]['note'] == ''
+
+def test_csv_writer_empty():
+    out = io.StringIO()
+    assert CSVWriter(out).write_all([]) == 0
+    assert out.getvalue() == format_csv([]) == ''
+
+def test_writer_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RecordWriter(io.StringIO())
+
+def test_csv_spool_released_when_stream_fails(sample_results):
+    def failing_stream():
+        yield sample_results[0]
+        raise RuntimeError("enrichment failed")
+
+    writer = CSVWriter(io.StringIO())
+    with pytest.raises(RuntimeError):
+        writer.write_all(failing_stream())
+    assert writer._spool.closed
@@ -0,0 +1,116 @@
+import pytest
+from graph.clusters import ClusterGraph, result_attributes
+from graph.union_find import UnionFind
+
+def _ip(ioc, asn=None, org=None, hostnames=(), techniques=(), actors=()):
+    enrichment = {'shodan': {'asn': asn, 'org': org, 'hostnames': list(hostnames)}}
+    if techniques or actors:
+        enrichment['mitre'] = {'techniques': [{'id': t} for t in techniques], 'tactics': [], 'actors': list(actors)}
+    return {'ioc': ioc, 'type': 'ip', 'enrichment': enrichment}
+
+def _domain(ioc, resolutions=(), pulses=()):
+    return {'ioc': ioc, 'type': 'domain', 'enrichment': {
+        'otx': {'pulse_info': {'count': len(pulses), 'pulses': list(pulses)},
+                'passive_dns': [{'address': address, 'hostname': ioc} for address in resolutions]}
+    }}
+
+def test_union_find():
+    sets = UnionFind()
+    a, b, c, d = (sets.add() for _ in range(4))
+    assert sets.union(c, d) == (c, d)
+    assert sets.union(b, d) == (c, b)
+    assert sets.union(b, c) is None
+    assert sets.find(b) == sets.find(d) == c
+    assert sets.size[c] == 3 and sets.first[c] == b
+    assert sets.find(a) == a
+
+def test_result_attributes():
+    pulses = [{'name': 'Emotet C2', 'adversary': None}, {'id': 'p1', 'name': 'x'}, 'Old Cached Pulse']
+    result = _domain('Evil.example', resolutions=['192.0.2.1'], pulses=pulses)
+    assert list(result_attributes(result)) == ['ioc:evil.example', 'pulse:emotet c2', 'pulse:p1',
+                                               'pulse:old cached pulse', 'ioc:192.0.2.1', 'ioc:evil.example']
+
+def test_links_shared_infrastructure():
+    graph = ClusterGraph()
+    graph.add(_ip('192.0.2.1', asn='AS64500', techniques=['T1059']))
+    graph.add(_ip('198.51.100.9', asn='AS64501'))
+    # Resolves to the first IP, and shares a pulse with the next domain
+    graph.add(_domain('evil.example', resolutions=['192.0.2.1'], pulses=['Campaign X']))
+    graph.add(_domain('other.example', pulses=['Campaign X']))
+    # Shodan hostname points at a domain that shows up later
+    graph.add(_ip('203.0.113.5', hostnames=['late.example'], techniques=['T1105'], actors=['apt28']))
+    late = graph.add(_domain('late.example'))
+
+    assert graph.cluster_id('ip', '192.0.2.1') == graph.cluster_id('domain', 'other.example') == 'cluster-0'
+    assert graph.cluster_id('ip', '198.51.100.9') == 'cluster-1'
+    assert late == graph.cluster_id('ip', '203.0.113.5') == 'cluster-4'
+    assert graph.cluster_id('ip', '10.0.0.1') is None
+
+    clusters = graph.clusters()
+    assert [(c['id'], c['size']) for c in clusters] == [('cluster-0', 3), ('cluster-4', 2)]
+    assert clusters[0]['iocs'] == ['ip:192.0.2.1', 'domain:evil.example', 'domain:other.example']
+    assert clusters[0]['techniques'] == ['T1059']
+    assert clusters[1]['techniques'] == ['T1105'] and clusters[1]['actors'] == ['apt28']
+    assert graph.stats()['clusters'] == 3
+    assert len(graph.clusters(min_size=1)) == 3
+
+def test_merge_aggregates_techniques_and_keeps_oldest_id():
+    graph = ClusterGraph()
+    graph.add(_ip('192.0.2.1', asn='AS1', techniques=['T1059']))
+    graph.add(_ip('192.0.2.2', org='Bad Hosting', techniques=['T1105']))
+    assert graph.add(_ip('192.0.2.3', asn='AS1', org='bad hosting', techniques=['T1566'])) == 'cluster-0'
+
+    [cluster] = graph.clusters()
+    assert cluster['id'] == 'cluster-0' and cluster['size'] == 3
+    assert cluster['techniques'] == ['T1059', 'T1105', 'T1566']
+
+def test_fanout_cap_stops_shared_hosting_collapse():
+    graph = ClusterGraph(max_fanout=3)
+    for i in range(10):
+        graph.add(_ip(f"192.0.2.{i}", asn='AS13335'))
+    assert [c['size'] for c in graph.clusters()] == [3]
+
+def test_annotate_sets_cluster():
+    graph = ClusterGraph()
+    results = list(graph.annotate([_ip('192.0.2.1', asn='AS1'), _ip('192.0.2.2', asn='AS1'), {'ioc': ''}]))
+    assert [r.get('cluster') for r in results] == ['cluster-0', 'cluster-0', None]
+
+def test_incremental_persistence(tmp_path):
+    path = tmp_path / "graph.sqlite"
+    first = ClusterGraph(path)
+    first.add(_ip('192.0.2.1', asn='AS1', techniques=['T1059']))
+    first.add(_ip('192.0.2.9', asn='AS9', techniques=['T1105']))
+    assert first.save() == 2
+    assert first.save() == 0
+
+    # A later run (e.g. the next watcher file) links new IOCs to saved clusters
+    second = ClusterGraph(path)
+    assert len(second) == 2
+    assert second.add(_ip('192.0.2.2', asn='AS1', org='x')) == 'cluster-0'
+    second.add(_ip('192.0.2.10', asn='AS9', org='x'))
+    assert second.save() == 2
+
+    third = ClusterGraph(path)
+    [cluster] = third.clusters()
+    assert cluster['size'] == 4
+    assert cluster['techniques'] == ['T1059', 'T1105']
+    assert third.stats() == second.stats()
+
+def test_concurrent_save_is_rejected(tmp_path):
+    path = tmp_path / "graph.sqlite"
+    ClusterGraph(path).save()
+    a, b = ClusterGraph(path), ClusterGraph(path)
+    a.add(_ip('192.0.2.1'))
+    b.add(_ip('192.0.2.2'))
+    a.save()
+    with pytest.raises(RuntimeError, match="another process"):
+        b.save()
+
+def test_scales_without_pairwise_comparison():
+    graph = ClusterGraph(max_fanout=10**6)
+    # 100k IOCs in 1000 chains linked through consecutive shared hostnames
+    for i in range(100000):
+        graph.add(_ip(f"10.{i // 65536}.{i // 256 % 256}.{i % 256}",
+                      hostnames=[f"h{i}.example"] + ([f"h{i - 1}.example"] if i % 100 else [])))
+    stats = graph.stats()
+    assert stats['iocs'] == 100000 and stats['clusters'] == 1000
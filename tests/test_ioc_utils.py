@@ -10,4 +10,31 @@ from utils.ioc_utils import IOCClassifier
     ("", None)
 ])
 def test_classify_ioc(ioc, expected):
-    assert IOCClassifier.classify(ioc) == expected
\ No newline at end of file
+    assert IOCClassifier.classify(ioc) == expected
+
+@pytest.mark.parametrize("ioc,expected", [
+    ("2001:db8::1", ("ip", "2001:db8::1")),
+    ("FE80::1", ("ip", "fe80::1")),
+    ("::ffff:192.0.2.1", ("ip", "::ffff:192.0.2.1")),
+    ("2001:db8::1::2", None),
+    ("fe80::1%eth0", None),
+    ("12345::1", None),
+])
+def test_classify_ipv6_forms(ioc, expected):
+    assert IOCClassifier.classify(ioc) == expected
+
+@pytest.mark.parametrize("ioc,expected", [
+    (" Example.COM ", ("domain", "example.com")),
+    ("256.1.1.1", None),
+    ("1.2.3", None),
+    ("D41D8CD98F00B204E9800998ECF8427E", ("hash", "d41d8cd98f00b204e9800998ecf8427e")),
+    ("g" * 32, None),
+    ("a" * 33, None),
+])
+def test_classify_dispatch(ioc, expected):
+    assert IOCClassifier.classify(ioc) == expected
+
+def test_classify_many_preserves_order():
+    iocs = ["8.8.8.8", "junk", "example.com", "a" * 40]
+    assert IOCClassifier.classify_many(iocs) == [IOCClassifier.classify(ioc) for ioc in iocs]
+    assert IOCClassifier.classify_many([]) == []
@@ -0,0 +1,207 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from enrichers.base import BaseEnricher
+from enrichers.manager import EnrichmentManager
+from cache.db import CacheDB, is_not_found
+
+class FakeEnricher(BaseEnricher):
+    """Enricher that sleeps to simulate provider latency"""
+
+    def __init__(self, name: str, delay: float = 0.2):
+        self.name = name
+        self.delay = delay
+        self.calls = []
+
+    def _get_api_key(self) -> str:
+        return "test_key"
+
+    def enrich(self, ioc, ioc_type):
+        self.calls.append(ioc)
+        time.sleep(self.delay)
+        return {"source": self.name, "value": ioc}
+
+@pytest.fixture
+def fake_enrichers():
+    return [FakeEnricher("alpha"), FakeEnricher("beta"), FakeEnricher("gamma")]
+
+@pytest.fixture
+def manager(fake_enrichers, tmp_path):
+    with patch.object(EnrichmentManager, '_load_enrichers', return_value={"ip": fake_enrichers}), \
+         patch('enrichers.manager.MITRECorrelator'), \
+         patch('enrichers.manager.settings.CACHE_ENABLED', False), \
+         patch('enrichers.rate_limiter.settings.RATE_LIMIT_DB', tmp_path / 'rate_limits.db'), \
+         patch('enrichers.rate_limiter.settings.RATE_LIMITS', {}):
+        manager = EnrichmentManager(concurrency=5)
+    manager.correlator.correlate.return_value = {}
+    return manager
+
+def test_enrich_ioc_fans_out_in_parallel(manager):
+    start = time.monotonic()
+    result = manager.enrich_ioc("1.2.3.4", "ip")
+    elapsed = time.monotonic() - start
+
+    assert set(result) == {"alpha", "beta", "gamma"}
+    assert result["alpha"]["value"] == "1.2.3.4"
+    assert elapsed < 0.5  # three 0.2s providers queried concurrently
+
+def test_enrich_batch_runs_iocs_concurrently(manager):
+    iocs = [{"ioc": f"10.0.0.{i}", "type": "ip", "original": f"10.0.0.{i}"} for i in range(5)]
+
+    start = time.monotonic()
+    results = manager.enrich_batch(iocs)
+    elapsed = time.monotonic() - start
+
+    assert [r["ioc"] for r in results] == [i["ioc"] for i in iocs]
+    assert all(set(r["enrichment"]) == {"alpha", "beta", "gamma"} for r in results)
+    assert elapsed < 0.8
+
+def test_concurrency_limit(manager, fake_enrichers):
+    iocs = [{"ioc": f"10.0.0.{i}", "type": "ip"} for i in range(4)]
+
+    start = time.monotonic()
+    manager.enrich_batch(iocs, concurrency=1)
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 0.8  # one IOC at a time
+    assert fake_enrichers[0].calls == [i["ioc"] for i in iocs]
+
+def test_failing_enricher_is_skipped(manager, fake_enrichers):
+    fake_enrichers[1].enrich = lambda ioc, ioc_type: 1 / 0
+    result = manager.enrich_ioc("1.2.3.4", "ip")
+    assert set(result) == {"alpha", "gamma"}
+
+def test_unknown_type_returns_empty(manager):
+    assert manager.enrich_ioc("1.2.3.4", "email") == {}
+    assert manager.enrich_batch([]) == []
+
+def test_slow_provider_does_not_stall_fast_providers(manager, fake_enrichers):
+    finished = {}
+    for enricher in fake_enrichers:
+        enricher.delay = 0.0
+        original = enricher.enrich
+        def timed(ioc, ioc_type, _original=original, _name=enricher.name):
+            result = _original(ioc, ioc_type)
+            finished.setdefault(_name, []).append(time.monotonic())
+            return result
+        enricher.enrich = timed
+    manager.rate_limiter.limits['alpha'] = {'rate': 5.0, 'burst': 1, 'daily_quota': None}
+
+    iocs = [{"ioc": f"10.0.0.{i}", "type": "ip"} for i in range(5)]
+    start = time.monotonic()
+    results = manager.enrich_batch(iocs)
+
+    assert all(set(r["enrichment"]) == {"alpha", "beta", "gamma"} for r in results)
+    assert max(finished["beta"]) - start < 0.2
+    assert max(finished["gamma"]) - start < 0.2
+    assert max(finished["alpha"]) - start >= 0.8
+
+def test_enrich_batch_serves_cache_hits_without_lookups(manager, fake_enrichers, tmp_path):
+    manager.cache = CacheDB(tmp_path / 'cache.sqlite', ttl=60)
+    manager.cache.set_many({
+        (name, "ip", "10.0.0.1"): {"value": "cached"} for name in ("alpha", "beta", "gamma")
+    })
+
+    results = manager.enrich_batch([{"ioc": "10.0.0.1", "type": "ip"}, {"ioc": "10.0.0.2", "type": "ip"}])
+
+    assert results[0]["enrichment"]["alpha"] == {"value": "cached"}
+    assert fake_enrichers[0].calls == ["10.0.0.2"]
+    assert manager.cache.get("beta", "ip", "10.0.0.2") == {"value": "10.0.0.2"}
+
+def test_partial_hit_queries_only_missing_sources(manager, fake_enrichers, tmp_path):
+    manager.cache = CacheDB(tmp_path / 'cache.sqlite', ttl=60)
+    manager.cache.set("alpha", "ip", "1.2.3.4", {"value": "cached"})
+    fake_enrichers[2].enrich = lambda ioc, ioc_type: 1 / 0
+
+    result = manager.enrich_ioc("1.2.3.4", "ip")
+
+    assert result["alpha"] == {"value": "cached"}
+    assert result["beta"] == {"value": "1.2.3.4"}
+    assert "gamma" not in result
+    assert fake_enrichers[0].calls == []
+    assert manager.cache.get("gamma", "ip", "1.2.3.4") is None  # failures are not cached
+    assert manager.cache.get("beta", "ip", "1.2.3.4") is not None
+
+def test_not_found_is_cached_and_errors_are_not(manager, fake_enrichers, tmp_path):
+    manager.cache = CacheDB(tmp_path / 'cache.sqlite')
+    fake_enrichers[0].enrich = lambda ioc, ioc_type: None
+    fake_enrichers[1].enrich = lambda ioc, ioc_type: {"source": "beta", "error": "Invalid response format"}
+
+    result = manager.enrich_ioc("1.2.3.4", "ip")
+
+    assert set(result) == {"gamma"}
+    assert is_not_found(manager.cache.get("alpha", "ip", "1.2.3.4"))
+    assert manager.cache.get("beta", "ip", "1.2.3.4") is None
+
+    fake_enrichers[0].enrich = lambda ioc, ioc_type: pytest.fail("negative entry should be reused")
+    assert set(manager.enrich_ioc("1.2.3.4", "ip")) == {"gamma"}
+
+def test_concurrent_callers_share_one_lookup(manager, fake_enrichers):
+    results = [None] * 3
+
+    def run(i):
+        results[i] = manager.enrich_ioc("1.2.3.4", "ip")
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(enricher.calls == ["1.2.3.4"] for enricher in fake_enrichers)
+    assert all(set(result) == {"alpha", "beta", "gamma"} for result in results)
+    assert manager.saved_calls == 6  # two followers x three sources
+    assert manager.single_flight.in_flight() == 0
+
+def test_duplicate_iocs_in_batch_are_coalesced(manager, fake_enrichers):
+    results = manager.enrich_batch([{"ioc": "1.2.3.4", "type": "ip"}] * 2)
+
+    assert results[0]["enrichment"] == results[1]["enrichment"]
+    assert fake_enrichers[0].calls == ["1.2.3.4"]
+    assert manager.saved_calls == 3
+
+def test_coalesced_failures_reach_every_caller(manager, fake_enrichers):
+    def fail(ioc, ioc_type):
+        time.sleep(0.2)
+        raise RuntimeError("boom")
+    fake_enrichers[0].enrich = fail
+
+    results = manager.enrich_batch([{"ioc": "1.2.3.4", "type": "ip"}] * 2)
+
+    assert all("alpha" not in r["enrichment"] for r in results)
+    assert manager.single_flight.in_flight() == 0
+
+def test_enrich_stream_yields_in_order_with_bounded_window(manager, fake_enrichers):
+    pulled = []
+
+    def source():
+        for i in range(12):
+            pulled.append(i)
+            yield {"ioc": f"10.0.0.{i}", "type": "ip"}
+
+    with patch('enrichers.manager.settings.ENRICH_STREAM_WINDOW', 4):
+        stream = manager.enrich_stream(source())
+        first = next(stream)
+        assert first["ioc"] == "10.0.0.0"
+        assert len(pulled) <= 5  # the input is read ahead by at most the window
+        rest = list(stream)
+
+    assert [r["ioc"] for r in [first] + rest] == [f"10.0.0.{i}" for i in range(12)]
+    assert all(set(r["enrichment"]) == {"alpha", "beta", "gamma"} for r in rest)
+
+def test_enrich_stream_caches_results(manager, fake_enrichers, tmp_path):
+    manager.cache = CacheDB(tmp_path / 'cache.sqlite', ttl=60)
+    list(manager.enrich_stream([{"ioc": "1.2.3.4", "type": "ip"}, {"ioc": "", "type": "ip"}]))
+
+    assert manager.cache.get("alpha", "ip", "1.2.3.4") == {"value": "1.2.3.4"}
+    list(manager.enrich_stream([{"ioc": "1.2.3.4", "type": "ip"}]))
+    assert fake_enrichers[0].calls == ["1.2.3.4"]
+
+def test_enrich_batch_correlates_in_one_call(manager, fake_enrichers):
+    manager.correlator.correlate_batch.side_effect = lambda batch: [{"actors": [len(batch)]} for _ in batch]
+    iocs = [{"ioc": f"10.0.1.{i}", "type": "ip"} for i in range(3)] + [{"ioc": "", "type": "ip"}]
+
+    results = manager.enrich_batch(iocs)
+
+    manager.correlator.correlate_batch.assert_called_once()
+    assert [r["enrichment"].get("mitre") for r in results] == [{"actors": [4]}] * 3 + [None]
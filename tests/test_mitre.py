@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import patch, MagicMock, PropertyMock
 from mitre.attack import MITREAttack
 from mitre.correlator import MITRECorrelator
+from enrichers.otx import OTXEnricher
 
 # Mock data
 MOCK_ACTORS = {
@@ -84,4 +85,60 @@ def test_empty_correlation(correlator):
         'techniques': [],
         'tactics': [],
         'actors': []
-    }
\ No newline at end of file
+    }
+
+def test_sub_technique_tags(correlator, mock_mitre_attack):
+    result = correlator.correlate({'virustotal': {'tags': ['T1059.003', 't1059', 'T10', 'trojan', 'T1059']}})
+    assert [t['id'] for t in result['techniques']] == ['T1059.003', 'T1059']
+    assert result['tactics'] == ['execution']
+
+def test_actor_aliases_and_dedup():
+    mitre = MagicMock(spec=MITREAttack)
+    mitre.actors = {
+        "apt28": {"name": "APT28 (Fancy Bear)", "aliases": ["Sofacy"], "techniques": ["T1059", "T1566.001"]},
+        "apt2": {"name": "APT2", "techniques": ["T1105"]}
+    }
+    mitre.get_actor_techniques.side_effect = lambda actor: mitre.actors[actor]["techniques"]
+    mitre.get_technique.side_effect = lambda tid: {'name': tid, 'tactic': ['execution'], 'url': f'u/{tid}'}
+    correlator = MITRECorrelator(mitre)
+
+    batch = [
+        {'virustotal': {'tags': ['T1059']},
+         'otx': {'pulse_info': {'pulses': [{'adversary': 'Fancy-Bear, sofacy'}, {'adversary': 'APT28'}]}}},
+        {'otx': {'pulse_info': {'pulses': [{'adversary': 'apt2 / unknown'}, {'adversary': None}]}}},
+        {'otx': {'pulse_info': {'pulses': [{'adversary': 'APT28'}]}}},
+        {}
+    ]
+    first, second, third, empty = correlator.correlate_batch(batch)
+
+    assert first['actors'] == ['apt28']
+    assert [(t['id'], t.get('source')) for t in first['techniques']] == [('T1059', None), ('T1566.001', 'actor_profile')]
+    assert second['actors'] == ['apt2']
+    assert [t['id'] for t in third['techniques']] == ['T1059', 'T1566.001']
+    assert empty == {'techniques': [], 'tactics': [], 'actors': []}
+
+    # Expansions are computed once per actor, not per pulse or IOC
+    correlator.correlate_batch(batch)
+    assert mitre.get_actor_techniques.call_count == 2
+    assert mitre.get_technique.call_count == 4
+
+def test_actor_tables_follow_replaced_actor_set(correlator, mock_mitre_attack):
+    assert correlator.correlate({'otx': {'pulse_info': {'pulses': [{'adversary': 'Lazarus'}]}}})['actors'] == []
+    type(mock_mitre_attack).actors = PropertyMock(return_value={"lazarus": {"name": "Lazarus Group"}})
+    assert correlator.correlate({'otx': {'pulse_info': {'pulses': [{'adversary': 'Lazarus'}]}}})['actors'] == ['lazarus']
+
+def test_pulse_names_without_adversary(correlator):
+    result = correlator.correlate({'otx': {'pulse_info': {'count': 1, 'pulses': ['Emotet C2 list']}}})
+    assert result == {'techniques': [], 'tactics': [], 'actors': []}
+
+def test_correlates_normalized_otx_results(correlator):
+    with patch.dict('os.environ', {'OTX_API_KEY': 'test_key'}):
+        otx = OTXEnricher()._normalize_data({
+            "pulse_info": {"count": 2, "pulses": [
+                {"name": "Phishing wave", "adversary": "APT28"},
+                {"name": "Commodity loader", "adversary": ""}
+            ]}
+        }, "hash")
+    result = correlator.correlate({'otx': otx})
+    assert result['actors'] == ['apt28']
+    assert [t['id'] for t in result['techniques']] == ['T1059']
@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from mitre import index as index_module
+from mitre.attack import MITREAttack
+from mitre.correlator import MITRECorrelator
+from mitre.reloader import AttackReloader
+from mitre.index import (
+    AttackIndex,
+    build_index,
+    bundle_versions,
+    diff_objects,
+    ensure_index,
+    index_is_current,
+    update_index
+)
+
+def _technique(technique_id, name, tactics, modified="2024-01-01T00:00:00.000Z"):
+    return {
+        "type": "attack-pattern",
+        "id": f"attack-pattern--{technique_id}",
+        "modified": modified,
+        "name": name,
+        "kill_chain_phases": [{"kill_chain_name": "mitre-attack", "phase_name": t} for t in tactics],
+        "x_mitre_platforms": ["Windows"],
+        "external_references": [
+            {"source_name": "capec", "external_id": "CAPEC-1"},
+            {"source_name": "mitre-attack", "external_id": technique_id,
+             "url": f"https://attack.mitre.org/techniques/{technique_id.replace('.', '/')}"}
+        ]
+    }
+
+BUNDLE = {
+    "type": "bundle",
+    "id": "bundle--1",
+    "objects": [
+        _technique("T1059", "Command and Scripting Interpreter", ["execution"]),
+        _technique("T1059.003", "Windows Command Shell", ["execution"]),
+        _technique("T1566.001", "Spearphishing Attachment", ["initial-access"]),
+        {"type": "intrusion-set", "id": "intrusion-set--1", "name": "APT28"},
+    ]
+}
+
+@pytest.fixture
+def bundle(tmp_path):
+    path = tmp_path / "enterprise-attack.json"
+    path.write_text(json.dumps(BUNDLE))
+    return path
+
+def test_build_and_lookup(bundle, tmp_path):
+    index_path = tmp_path / "index.sqlite"
+    assert build_index(bundle, index_path)['techniques'] == 3
+
+    index = AttackIndex(index_path)
+    assert len(index) == 3
+    assert index.get_technique("t1059.003") == {
+        'name': 'Windows Command Shell',
+        'tactic': ['execution'],
+        'url': 'https://attack.mitre.org/techniques/T1059/003',
+        'platforms': ['Windows']
+    }
+    assert index.get_technique("T9999") is None
+    assert set(index.techniques()) == {"T1059", "T1059.003", "T1566.001"}
+    index.close()
+
+def test_rebuilds_only_when_source_changes(bundle, tmp_path):
+    index_path = tmp_path / "index.sqlite"
+    assert ensure_index(bundle, index_path)
+    assert not ensure_index(bundle, index_path)
+
+    # Touched but identical: the hash matches, so only the recorded mtime moves
+    stat = bundle.stat()
+    os.utime(bundle, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert index_is_current(bundle, index_path)
+    assert AttackIndex(index_path).meta()['source_mtime_ns'] == str(stat.st_mtime_ns + 10**9)
+
+    changed = dict(BUNDLE, objects=BUNDLE["objects"][:1])
+    bundle.write_text(json.dumps(changed))
+    assert not index_is_current(bundle, index_path)
+    assert ensure_index(bundle, index_path)
+    assert len(AttackIndex(index_path)) == 1
+
+def test_index_without_bundle(bundle, tmp_path):
+    index_path = tmp_path / "index.sqlite"
+    build_index(bundle, index_path)
+    bundle.unlink()
+
+    assert not ensure_index(bundle, index_path)
+    with pytest.raises(FileNotFoundError):
+        ensure_index(bundle, tmp_path / "missing.sqlite")
+
+def test_attack_opens_index_lazily(bundle, tmp_path):
+    index_path = tmp_path / "index.sqlite"
+    mitre = MITREAttack(bundle, index_path, tmp_path / "actors.json")
+    assert not index_path.exists()
+
+    assert mitre.get_technique("T1566.001")['tactic'] == ['initial-access']
+    assert index_path.exists()
+    assert mitre.actors == {}
+    mitre.close()
+
+def test_attack_without_data(tmp_path, capsys):
+    mitre = MITREAttack(tmp_path / "missing.json", tmp_path / "index.sqlite", tmp_path / "actors.json")
+    assert mitre.get_technique("T1059") is None
+    assert mitre.get_technique("T1105") is None
+    assert mitre.techniques == {}
+    # The missing dataset is reported once, not per lookup
+    assert capsys.readouterr().out.count("MITRE ATT&CK data not found") == 1
+
+def _updated_bundle():
+    """BUNDLE with T1059 revised, T1566.001 removed and T1105 added"""
+    objects = [
+        _technique("T1059", "Command Interpreter", ["execution"], modified="2025-01-01T00:00:00.000Z"),
+        _technique("T1059.003", "Windows Command Shell", ["execution"]),
+        _technique("T1105", "Ingress Tool Transfer", ["command-and-control"]),
+        {"type": "intrusion-set", "id": "intrusion-set--1", "name": "APT28"},
+    ]
+    return dict(BUNDLE, objects=objects)
+
+def test_diff_objects():
+    new = _updated_bundle()["objects"]
+    changes = diff_objects(bundle_versions(BUNDLE["objects"]), new)
+    assert [o["id"] for o in changes["added"]] == ["attack-pattern--T1105"]
+    assert [o["id"] for o in changes["modified"]] == ["attack-pattern--T1059"]
+    assert changes["removed"] == ["attack-pattern--T1566.001"]
+    assert diff_objects(bundle_versions(new), new) == {'added': [], 'modified': [], 'removed': []}
+
+@pytest.mark.parametrize("from_old_bundle", [False, True])
+def test_update_applies_only_changes(bundle, tmp_path, from_old_bundle):
+    index_path = tmp_path / "index.sqlite"
+    build_index(bundle, index_path)
+    before = AttackIndex(index_path)
+
+    bundle.write_text(json.dumps(_updated_bundle()))
+    old_versions = bundle_versions(BUNDLE["objects"]) if from_old_bundle else None
+    result = update_index(bundle, index_path, old_versions=old_versions)
+    assert (result['added'], result['modified'], result['removed'], result['techniques']) == (1, 1, 1, 3)
+    assert not result['rebuilt']
+    assert index_is_current(bundle, index_path)
+
+    after = AttackIndex(index_path)
+    assert after.get_technique("T1059")['name'] == "Command Interpreter"
+    assert after.get_technique("T1105")['tactic'] == ["command-and-control"]
+    assert after.get_technique("T1566.001") is None
+    assert after.get_technique("T1059.003")['name'] == "Windows Command Shell"
+    # Readers of the previous index still see it
+    assert before.get_technique("T1566.001")['name'] == "Spearphishing Attachment"
+    before.close()
+    after.close()
+
+def test_changed_bundle_is_updated_incrementally(bundle, tmp_path, monkeypatch):
+    index_path = tmp_path / "index.sqlite"
+    build_index(bundle, index_path)
+    bundle.write_text(json.dumps(_updated_bundle()))
+
+    def full_build(*args):
+        raise AssertionError("full rebuild")
+    monkeypatch.setattr(index_module, 'build_index', full_build)
+    assert ensure_index(bundle, index_path)
+    assert len(AttackIndex(index_path)) == 3
+
+def test_refresh_swaps_index_and_actors(bundle, tmp_path):
+    actors_file = tmp_path / "actors.json"
+    actors_file.write_text(json.dumps({"apt28": {"name": "APT28", "techniques": ["T1566.001"]}}))
+    mitre = MITREAttack(bundle, tmp_path / "index.sqlite", actors_file)
+    correlator = MITRECorrelator(mitre)
+    pulses = {'otx': {'pulse_info': {'pulses': [{'adversary': 'APT28'}, {'adversary': 'Lazarus'}]}}}
+
+    result = correlator.correlate(pulses)
+    assert result['actors'] == ['apt28']
+    assert [t['id'] for t in result['techniques']] == ['T1566.001']
+    assert not mitre.refresh()
+    in_flight = mitre.index
+
+    bundle.write_text(json.dumps(_updated_bundle()))
+    actors_file.write_text(json.dumps({
+        "apt28": {"name": "APT28", "techniques": ["T1566.001", "T1105"]},
+        "lazarus": {"name": "Lazarus Group", "techniques": ["T1059"]}
+    }))
+    assert mitre.refresh()
+    assert mitre.generation == 1
+    assert mitre.index is not in_flight
+    assert mitre.get_technique("T1105")['name'] == "Ingress Tool Transfer"
+    # Lookups that started on the previous index can still finish on it
+    assert in_flight.get_technique("T1566.001") is not None
+
+    result = correlator.correlate(pulses)
+    assert result['actors'] == ['apt28', 'lazarus']
+    assert [t['id'] for t in result['techniques']] == ['T1105', 'T1059']
+    mitre.close()
+
+def test_reloader_swaps_in_background(bundle, tmp_path, monkeypatch):
+    mitre = MITREAttack(bundle, tmp_path / "index.sqlite", tmp_path / "actors.json")
+    assert mitre.get_technique("T1105") is None
+
+    # Lookups never apply the changed bundle themselves
+    bundle.write_text(json.dumps(_updated_bundle()))
+    monkeypatch.setattr(index_module, 'update_index', _fail_on_lookup_thread(index_module.update_index))
+    assert mitre.get_technique("T1105") is None
+
+    reloader = AttackReloader(mitre, interval=0.01)
+    reloader.start()
+    try:
+        deadline = time.monotonic() + 5
+        while mitre.generation == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        reloader.stop()
+    assert mitre.get_technique("T1105")['name'] == "Ingress Tool Transfer"
+    mitre.close()
+
+def _fail_on_lookup_thread(update):
+    main_thread = threading.current_thread()
+    def wrapper(*args, **kwargs):
+        assert threading.current_thread() is not main_thread
+        return update(*args, **kwargs)
+    return wrapper
+
+def test_reloader_disabled():
+    reloader = AttackReloader(MagicMock(), interval=0)
+    reloader.start()
+    assert reloader._thread is None
+
+def test_refresh_after_data_appears(bundle, tmp_path):
+    missing = tmp_path / "later.json"
+    mitre = MITREAttack(missing, tmp_path / "index.sqlite", tmp_path / "actors.json")
+    assert mitre.get_technique("T1059") is None
+
+    missing.write_text(bundle.read_text())
+    assert mitre.refresh()
+    assert mitre.get_technique("T1059")['name'] == "Command and Scripting Interpreter"
+    mitre.close()
@@ -0,0 +1,20 @@
+from mitre.matcher import NameMatcher, normalize_name
+
+def test_normalize_name():
+    assert normalize_name("  Fancy-Bear / APT_28 ") == "fancy bear apt 28"
+
+def test_finds_all_names_on_word_boundaries():
+    matcher = NameMatcher([("APT28", "apt28"), ("Fancy Bear", "apt28"), ("APT2", "apt2"),
+                           ("Bear", "bear"), ("Lazarus Group", "lazarus"), ("Lazarus", "lazarus")])
+
+    assert matcher.find("Campaign by fancy-bear (APT28)") == ["apt28", "bear"]
+    assert matcher.find("APT28") == ["apt28"]
+    assert matcher.find("apt2, apt28") == ["apt2", "apt28"]
+    assert matcher.find("Lazarus Group") == ["lazarus"]
+    assert matcher.find("Bearish APT283") == []
+    assert matcher.find("") == []
+
+def test_overlapping_names_share_states():
+    matcher = NameMatcher([("she", "a"), ("he", "b"), ("hers", "c"), ("his", "d")])
+    assert matcher.find("ushers he his") == ["b", "d"]
+    assert matcher.find("she hers") == ["a", "c"]
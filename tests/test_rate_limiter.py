@@ -0,0 +1,82 @@
+import time
+import pytest
+from multiprocessing import Process
+from enrichers.rate_limiter import RateLimiter, QuotaExceededError
+
+LIMITS = {
+    'slow': {'rate': 2.0, 'burst': 3, 'daily_quota': None},
+    'quota': {'rate': 100.0, 'burst': 10, 'daily_quota': 2},
+    'free': {'rate': 0, 'burst': 0, 'daily_quota': None},
+    'capped': {'rate': 0, 'burst': 0, 'daily_quota': 2}
+}
+
+@pytest.fixture
+def limiter(tmp_path):
+    return RateLimiter(tmp_path / 'limits.db', limits=LIMITS)
+
+def test_burst_then_throttle(limiter):
+    assert [limiter.try_acquire('slow') for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = limiter.try_acquire('slow')
+    assert 0 < wait <= 0.5
+
+def test_acquire_waits_for_refill(limiter):
+    for _ in range(3):
+        limiter.acquire('slow')
+    start = time.monotonic()
+    limiter.acquire('slow')
+    assert time.monotonic() - start >= 0.4
+
+def test_daily_quota(limiter):
+    limiter.acquire('quota')
+    limiter.acquire('quota')
+    with pytest.raises(QuotaExceededError):
+        limiter.try_acquire('quota')
+    assert limiter.remaining('quota')['daily_remaining'] == 0
+
+def test_daily_quota_without_rate(limiter):
+    assert limiter.try_acquire('capped') == 0.0
+    assert limiter.try_acquire_spare('capped')
+    with pytest.raises(QuotaExceededError):
+        limiter.try_acquire('capped')
+    assert not limiter.try_acquire_spare('capped')
+    budget = limiter.remaining('capped')
+    assert budget['daily_remaining'] == 0
+    assert budget['tokens'] is None
+
+def test_unlimited_provider(limiter):
+    assert limiter.try_acquire('free') == 0.0
+    assert limiter.try_acquire('unknown') == 0.0
+    assert limiter.remaining('free')['tokens'] is None
+
+def test_remaining_reports_without_consuming(limiter):
+    limiter.acquire('slow')
+    budget = limiter.remaining('slow')
+    assert budget['tokens'] == pytest.approx(2.0, abs=0.1)
+    assert limiter.remaining('slow')['tokens'] == pytest.approx(2.0, abs=0.1)
+    assert set(limiter.remaining_all()) == set(LIMITS)
+
+def _consume(db_path):
+    RateLimiter(db_path, limits=LIMITS).acquire('quota')
+
+def test_state_shared_across_processes(tmp_path):
+    db_path = tmp_path / 'limits.db'
+    workers = [Process(target=_consume, args=(db_path,)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    with pytest.raises(QuotaExceededError):
+        RateLimiter(db_path, limits=LIMITS).try_acquire('quota')
+
+def test_spare_tokens_leave_headroom(limiter):
+    assert limiter.try_acquire_spare('slow', min_tokens=2)
+    assert limiter.try_acquire_spare('slow', min_tokens=2)
+    assert not limiter.try_acquire_spare('slow', min_tokens=2)  # one token left for foreground
+    assert limiter.try_acquire('slow') == 0.0
+    assert limiter.try_acquire_spare('free', min_tokens=5)
+
+def test_spare_tokens_respect_quota_reserve(limiter):
+    assert not limiter.try_acquire_spare('quota', quota_reserve=1.0)
+    assert limiter.try_acquire_spare('quota', quota_reserve=0.5)
+    assert not limiter.try_acquire_spare('quota', quota_reserve=0.5)
@@ -0,0 +1,80 @@
+import time
+import pytest
+from unittest.mock import patch
+from cache.db import CacheDB
+from cache.memory import MemoryCache
+from cache.tiered import TieredCache
+from enrichers.manager import EnrichmentManager
+from enrichers.rate_limiter import RateLimiter
+from enrichers.refresher import RefreshAhead
+from tests.test_manager import FakeEnricher
+
+# Limits applied once the foreground lookups are done: beta has room for one refresh
+BACKGROUND_LIMITS = {
+    'alpha': {'rate': 0, 'burst': 0, 'daily_quota': None},
+    'beta': {'rate': 0.001, 'burst': 2, 'daily_quota': None}
+}
+
+@pytest.fixture
+def manager(tmp_path):
+    enrichers = [FakeEnricher('alpha', delay=0), FakeEnricher('beta', delay=0)]
+    with patch.object(EnrichmentManager, '_load_enrichers', return_value={'ip': enrichers}), \
+         patch('enrichers.manager.MITRECorrelator'), \
+         patch('enrichers.manager.settings.CACHE_ENABLED', False), \
+         patch('enrichers.rate_limiter.settings.RATE_LIMIT_DB', tmp_path / 'rate_limits.db'):
+        manager = EnrichmentManager()
+    manager.correlator.correlate.return_value = {}
+    manager.cache = TieredCache(CacheDB(tmp_path / 'cache.sqlite', ttl=600), MemoryCache())
+    manager.rate_limiter = RateLimiter(tmp_path / 'limits.db', limits={})
+    yield manager
+    manager.cache.close()
+
+def test_refreshes_hot_entries_before_expiry(manager):
+    for _ in range(4):
+        manager.enrich_batch([{'ioc': '1.2.3.4', 'type': 'ip'}])
+    manager.enrich_batch([{'ioc': '5.6.7.8', 'type': 'ip'}])
+    alpha, beta = manager.enrichers['ip']
+    assert alpha.calls == ['1.2.3.4', '5.6.7.8']
+    manager.rate_limiter.limits = BACKGROUND_LIMITS
+
+    result = RefreshAhead(manager, lead=900, min_hits=3).refresh_once()
+
+    # Both sources for the hot IOC refreshed; beta spent its only spare token
+    assert result == {'refreshed': 2, 'skipped': 0, 'failed': 0}
+    assert alpha.calls == ['1.2.3.4', '5.6.7.8', '1.2.3.4']
+    assert beta.calls == ['1.2.3.4', '5.6.7.8', '1.2.3.4']
+    expiry = manager.cache.persistent.conn.execute(
+        "SELECT MIN(expires_at) FROM entries WHERE ioc = '1.2.3.4'").fetchone()[0]
+    assert expiry == pytest.approx(time.time() + 600, abs=5)
+
+def test_skips_providers_without_spare_budget(manager):
+    for _ in range(4):
+        manager.enrich_batch([{'ioc': '1.2.3.4', 'type': 'ip'}, {'ioc': '5.6.7.8', 'type': 'ip'}])
+    alpha, beta = manager.enrichers['ip']
+    manager.rate_limiter.limits = BACKGROUND_LIMITS
+
+    result = RefreshAhead(manager, lead=900, min_hits=3).refresh_once()
+
+    assert result == {'refreshed': 3, 'skipped': 1, 'failed': 0}
+    assert len(alpha.calls) == 4
+    assert len(beta.calls) == 3
+
+def test_cold_or_distant_entries_are_left_alone(manager):
+    manager.enrich_batch([{'ioc': '1.2.3.4', 'type': 'ip'}])
+    refresher = RefreshAhead(manager, lead=900, min_hits=3)
+    assert refresher.refresh_once()['refreshed'] == 0
+
+    for _ in range(4):
+        manager.enrich_batch([{'ioc': '1.2.3.4', 'type': 'ip'}])
+    assert RefreshAhead(manager, lead=60, min_hits=3).refresh_once()['refreshed'] == 0
+
+def test_background_refresh(manager):
+    for _ in range(4):
+        manager.enrich_batch([{'ioc': '1.2.3.4', 'type': 'ip'}])
+    alpha = manager.enrichers['ip'][0]
+
+    refresher = RefreshAhead(manager, interval=0.05, lead=900, min_hits=3)
+    refresher.start()
+    time.sleep(0.3)
+    refresher.stop()
+    assert len(alpha.calls) >= 2
@@ -0,0 +1,237 @@
+import heapq
+import mmap
+import tempfile
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+from config import settings
+
+# Slots in a fresh table; it doubles until the memory limit is reached
+_INITIAL_SLOTS = 1 << 16
+
+# Fingerprints read per block while merging runs
+_MERGE_BLOCK = 1 << 16
+
+_MASK64 = (1 << 64) - 1
+
+def fingerprint(value: str) -> int:
+    """
+    Non-zero 64-bit fingerprint of a string (0 marks empty table slots)
+    
+    Uses the interpreter's SipHash string hash, which is cached on the
+    string and randomized per process, so fingerprints never leave it.
+    """
+    return (hash(value) & _MASK64) or 1
+
+class FingerprintTable:
+    """Open-addressing hash set of 64-bit fingerprints in a flat array('Q')
+    
+    Costs 8 bytes per slot (kept at most half full) against roughly 70 bytes
+    per string in a Python set.
+    """
+    
+    def __init__(self, slots: int = _INITIAL_SLOTS):
+        self._table = array('Q', bytes(8 * slots))
+        self._mask = slots - 1
+        self.count = 0
+        
+    @property
+    def nbytes(self) -> int:
+        return len(self._table) * 8
+        
+    def add(self, fp: int) -> bool:
+        """Insert a fingerprint, returning False if it was already present"""
+        table, mask = self._table, self._mask
+        i = fp & mask
+        while True:
+            slot = table[i]
+            if slot == 0:
+                table[i] = fp
+                self.count += 1
+                return True
+            if slot == fp:
+                return False
+            i = (i + 1) & mask
+            
+    def __contains__(self, fp: int) -> bool:
+        table, mask = self._table, self._mask
+        i = fp & mask
+        while True:
+            slot = table[i]
+            if slot == 0:
+                return False
+            if slot == fp:
+                return True
+            i = (i + 1) & mask
+            
+    def needs_resize(self) -> bool:
+        return self.count * 2 > len(self._table)
+        
+    def resized(self) -> "FingerprintTable":
+        """A table with twice the slots holding the same fingerprints"""
+        bigger = FingerprintTable(len(self._table) * 2)
+        for fp in self._table:
+            if fp:
+                bigger.add(fp)
+        return bigger
+        
+    def write_sorted(self, f) -> None:
+        """
+        Write the fingerprints to a binary file in ascending order
+        
+        Values are first split by their top byte into compact arrays, so only
+        one 1/256th slice is ever sorted as a Python list.
+        """
+        buckets = [array('Q') for _ in range(256)]
+        for fp in self._table:
+            if fp:
+                buckets[fp >> 56].append(fp)
+        for i, bucket in enumerate(buckets):
+            array('Q', sorted(bucket)).tofile(f)
+            buckets[i] = None
+
+class _Run:
+    """Sorted fingerprints spilled to a file, searched through a memory map"""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = path.stat().st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._view = memoryview(self._map).cast('Q') if self._map else memoryview(array('Q'))
+        
+    def __len__(self) -> int:
+        return len(self._view)
+        
+    def __contains__(self, fp: int) -> bool:
+        view = self._view
+        i = bisect_left(view, fp)
+        return i < len(view) and view[i] == fp
+        
+    def blocks(self) -> Iterator[int]:
+        """Stream the fingerprints in order, a block at a time"""
+        for start in range(0, len(self._view), _MERGE_BLOCK):
+            yield from self._view[start:start + _MERGE_BLOCK].tolist()
+            
+    def close(self) -> None:
+        self._view.release()
+        if self._map:
+            self._map.close()
+        self._file.close()
+
+class Deduplicator:
+    """Probabilistic streaming deduplication within a fixed memory budget
+    
+    Values are compared by 64-bit fingerprint, so two distinct values that
+    collide are reported as duplicates: with n unique values the chance of
+    dropping any is about n**2 / 2**65 (roughly 1 in 37 million for a
+    million IOCs).
+    
+    Fingerprints live in an array-backed hash table until it would exceed
+    max_memory; the table is then written out as a sorted run and cleared.
+    New values are checked against the table and, by binary search, every
+    run. Once more than max_runs runs exist they are merged (external
+    sort-merge) into one, so lookups stay cheap. One instance can span any
+    number of input files.
+    """
+    
+    def __init__(self, max_memory: Optional[int] = None, spill_dir: Optional[Union[str, Path]] = None,
+                 max_runs: Optional[int] = None):
+        """
+        Args:
+            max_memory: Byte budget for the in-memory table (defaults to settings.DEDUP_MAX_MEMORY)
+            spill_dir: Directory for run files (defaults to a temporary directory)
+            max_runs: Runs kept before they're merged (defaults to settings.DEDUP_MAX_RUNS)
+        """
+        self.max_memory = max_memory or settings.DEDUP_MAX_MEMORY
+        self.max_runs = max_runs or settings.DEDUP_MAX_RUNS
+        self._spill_root = spill_dir or settings.DEDUP_SPILL_DIR
+        self._tempdir: Optional[tempfile.TemporaryDirectory] = None
+        self._table = FingerprintTable(min(_INITIAL_SLOTS, self._max_slots()))
+        self._runs: List[_Run] = []
+        self._run_seq = 0
+        self.unique = 0
+        self.duplicates = 0
+        self.spills = 0
+        
+    def _max_slots(self) -> int:
+        """Largest power-of-two slot count that fits the memory budget"""
+        slots = 1
+        while slots * 2 * 8 <= self.max_memory:
+            slots *= 2
+        return max(slots, 2)
+        
+    def add(self, value: str) -> bool:
+        """Record a value, returning True the first time it is seen"""
+        fp = fingerprint(value)
+        if (self._runs and any(fp in run for run in self._runs)) or not self._table.add(fp):
+            self.duplicates += 1
+            return False
+            
+        self.unique += 1
+        if self._table.needs_resize():
+            if self._table.nbytes * 2 <= self.max_memory:
+                self._table = self._table.resized()
+            else:
+                self._spill()
+        return True
+        
+    def filter(self, values: Iterable[str]) -> Iterator[str]:
+        """Yield each value the first time it is seen"""
+        for value in values:
+            if self.add(value):
+                yield value
+                
+    @property
+    def spill_dir(self) -> Path:
+        if self._tempdir is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix='ioc-dedup-', dir=self._spill_root)
+        return Path(self._tempdir.name)
+        
+    def _new_run_path(self) -> Path:
+        self._run_seq += 1
+        return self.spill_dir / f"run-{self._run_seq:06d}.bin"
+        
+    def _spill(self) -> None:
+        """Write the table out as a sorted run and start an empty one"""
+        path = self._new_run_path()
+        with open(path, 'wb') as f:
+            self._table.write_sorted(f)
+        self._runs.append(_Run(path))
+        self._table = FingerprintTable(min(_INITIAL_SLOTS, self._max_slots()))
+        self.spills += 1
+        if len(self._runs) > self.max_runs:
+            self._merge_runs()
+            
+    def _merge_runs(self) -> None:
+        """Merge every run into one sorted file, streaming block by block"""
+        path = self._new_run_path()
+        buffer = array('Q')
+        with open(path, 'wb') as f:
+            for fp in heapq.merge(*(run.blocks() for run in self._runs)):
+                buffer.append(fp)
+                if len(buffer) >= _MERGE_BLOCK:
+                    buffer.tofile(f)
+                    buffer = array('Q')
+            buffer.tofile(f)
+            
+        for run in self._runs:
+            run.close()
+            run.path.unlink()
+        self._runs = [_Run(path)]
+        
+    def close(self) -> None:
+        """Release run files and remove the spill directory"""
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+            self._tempdir = None
+            
+    def __enter__(self) -> "Deduplicator":
+        return self
+        
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,142 @@
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from config import settings
+from .dedup import Deduplicator
+from .ioc_utils import IOCClassifier
+
+# Defanging conventions: 1.2.3[.]4, evil(.)com, evil[dot]com, fe80[:]:1
+_DEFANG_RE = re.compile(rb'\[\.\]|\(\.\)|\{\.\}|\[dot\]|\(dot\)|\[:\]', re.IGNORECASE)
+_REFANG = {b'[:]': b':'}
+
+# One pass finds every candidate token; IOCClassifier decides what it is
+_CANDIDATE_RE = re.compile(rb'''
+    (?<![\w.:-])
+    (?:
+        (?:[a-z0-9-]{1,63}\.)+[a-z0-9-]{1,63}                     # domain or IPv4
+      | [0-9a-f]{0,4}(?::[0-9a-f]{0,4}){2,7}(?::\d{1,3}(?:\.\d{1,3}){3})?  # IPv6
+      | [0-9a-f]{32,64}                                           # hash
+    )
+    (?![\w-])
+''', re.IGNORECASE | re.VERBOSE)
+
+# File names that look like domains in free text; none of these are TLDs
+_FILE_EXTENSIONS = frozenset((
+    'bat', 'bin', 'cfg', 'conf', 'csv', 'dat', 'dll', 'doc', 'docx', 'exe', 'gif', 'gz',
+    'htm', 'html', 'ini', 'jar', 'jpeg', 'jpg', 'js', 'json', 'log', 'msi', 'pdf', 'php',
+    'png', 'ps1', 'rar', 'sys', 'tar', 'tmp', 'txt', 'vbs', 'xls', 'xlsx', 'xml', 'yml'
+))
+
+def refang(data: bytes) -> bytes:
+    """Undo common defanging so indicators match their real form"""
+    return _DEFANG_RE.sub(lambda m: _REFANG.get(m.group(0), b'.'), data)
+
+def _scan(data: bytes) -> Dict[Tuple[str, str], str]:
+    """Unique (type, ioc) pairs in a block of text, in order of first appearance"""
+    found: Dict[Tuple[str, str], str] = {}
+    candidates = [m.decode('ascii') for m in _CANDIDATE_RE.findall(refang(data))]
+    for candidate, classified in zip(candidates, IOCClassifier.classify_many(candidates)):
+        if not classified or classified in found:
+            continue
+        if classified[0] == 'domain' and classified[1].rsplit('.', 1)[-1] in _FILE_EXTENSIONS:
+            continue
+        found[classified] = candidate
+    return found
+
+def _scan_range(path: str, start: int, end: int) -> Dict[Tuple[str, str], str]:
+    """Scan one line-aligned byte range of a file (runs in a worker process)"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _scan(mm[start:end])
+
+class IOCExtractor:
+    """Extract IPs, domains and hashes from free text (logs, emails, reports)
+    
+    Large files are memory-mapped and split into line-aligned chunks that
+    are scanned in parallel by a process pool; chunk results are merged in
+    file order and deduplicated.
+    """
+    
+    def __init__(self, workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        """
+        Args:
+            workers: Worker processes (defaults to settings.EXTRACT_WORKERS, or the CPU count)
+            chunk_size: Approximate bytes per chunk (defaults to settings.EXTRACT_CHUNK_BYTES)
+        """
+        self.workers = workers or settings.EXTRACT_WORKERS or os.cpu_count() or 1
+        self.chunk_size = chunk_size or settings.EXTRACT_CHUNK_BYTES
+        
+    def extract_text(self, text: str) -> List[Dict[str, Any]]:
+        """Extract normalized IOCs from a string"""
+        return [
+            self._entry(ioc_type, ioc, original)
+            for (ioc_type, ioc), original in _scan(text.encode('utf-8', 'replace')).items()
+        ]
+        
+    def extract_file(self, file_path: Union[str, Path]) -> List[Dict[str, Any]]:
+        """Extract normalized IOCs from a text file"""
+        return list(self.iter_file(file_path))
+        
+    def iter_file(self, file_path: Union[str, Path],
+                  dedup: Optional[Deduplicator] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream normalized, deduplicated IOCs from a text file in file order
+        
+        Args:
+            file_path: Any text file (log, email dump, report)
+            dedup: Deduplicator to share across files (a private one if None)
+            
+        Returns:
+            Iterator of {'original', 'ioc', 'type'} dictionaries
+        """
+        path = Path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Input file not found: {file_path}")
+        return self._iter_chunks(path, dedup)
+        
+    def _iter_chunks(self, path: Path, dedup: Optional[Deduplicator] = None) -> Iterator[Dict[str, Any]]:
+        owned = dedup is None
+        dedup = dedup or Deduplicator()
+        
+        try:
+            for found in self._scan_chunks(path):
+                for (ioc_type, ioc), original in found.items():
+                    if dedup.add(ioc):
+                        yield self._entry(ioc_type, ioc, original)
+        finally:
+            if owned:
+                dedup.close()
+                
+    def _scan_chunks(self, path: Path) -> Iterator[Dict[Tuple[str, str], str]]:
+        """Per-chunk scan results in file order, in parallel when there are several chunks"""
+        ranges = self._chunk_ranges(path)
+        if len(ranges) <= 1 or self.workers <= 1:
+            for start, end in ranges:
+                yield _scan_range(str(path), start, end)
+            return
+            
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(ranges))) as pool:
+            yield from pool.map(_scan_range, [str(path)] * len(ranges),
+                                [start for start, _ in ranges], [end for _, end in ranges])
+                                
+    def _chunk_ranges(self, path: Path) -> List[Tuple[int, int]]:
+        """Split a file into ~chunk_size byte ranges that end on line boundaries"""
+        size = path.stat().st_size
+        if size == 0:
+            return []
+            
+        ranges = []
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                end = mm.find(b'\n', min(start + self.chunk_size, size) - 1)
+                end = size if end == -1 else end + 1
+                ranges.append((start, end))
+                start = end
+        return ranges
+        
+    @staticmethod
+    def _entry(ioc_type: str, ioc: str, original: str) -> Dict[str, Any]:
+        return {'original': original, 'ioc': ioc, 'type': ioc_type}
@@ -0,0 +1,133 @@
+import re
+from typing import Any, Dict, Iterator
+from urllib.parse import urlsplit
+
+# Comparisons in a STIX pattern: object:path = 'value' (quotes escaped as \')
+_STIX_COMPARISON_RE = re.compile(r"([a-z0-9-]+):([\w.'-]+)\s*=\s*'((?:[^'\\]|\\.)*)'")
+_STIX_UNESCAPE_RE = re.compile(r"\\(.)")
+
+# STIX cyber-observable types whose 'value' is an IOC
+_STIX_VALUE_TYPES = frozenset(('ipv4-addr', 'ipv6-addr', 'domain-name'))
+
+# STIX object types carrying indicator values ('spec_version' is optional on observables)
+_STIX_OBJECT_TYPES = _STIX_VALUE_TYPES | {'indicator', 'url', 'file'}
+
+# MISP attribute types (or parts of composite types) holding an IOC
+_MISP_VALUE_TYPES = frozenset(('ip', 'ip-src', 'ip-dst', 'domain', 'hostname', 'md5', 'sha1', 'sha256'))
+_MISP_URL_TYPES = frozenset(('url', 'uri', 'link'))
+
+def _url_host(url: str) -> str:
+    """Host part of a URL, which is what the enrichers can look up"""
+    try:
+        return urlsplit(url if '//' in url else f"//{url}").hostname or ''
+    except ValueError:
+        return ''
+
+def stix_pattern_values(pattern: str) -> Iterator[str]:
+    """
+    Indicator values compared for equality in a STIX 2.1 pattern
+    
+    Example: "[ipv4-addr:value = '1.2.3.4'] OR [file:hashes.'SHA-256' = '...']"
+    yields the address and the hash. URL comparisons yield their host.
+    """
+    for object_type, path, value in _STIX_COMPARISON_RE.findall(pattern):
+        value = _STIX_UNESCAPE_RE.sub(r"\1", value)
+        if object_type in _STIX_VALUE_TYPES and path == 'value':
+            yield value
+        elif object_type == 'file' and path.startswith('hashes.'):
+            yield value
+        elif object_type == 'url' and path == 'value':
+            yield _url_host(value)
+
+def stix_object_values(obj: Dict[str, Any]) -> Iterator[str]:
+    """
+    Indicator values carried by one STIX 2.1 object
+    
+    Indicators contribute the values in their pattern; cyber-observable
+    objects (addresses, domains, URLs, files) contribute their own value
+    or hashes. Other object types carry none.
+    """
+    object_type = obj.get('type')
+    if object_type == 'indicator':
+        if obj.get('pattern_type', 'stix') == 'stix' and isinstance(obj.get('pattern'), str):
+            yield from stix_pattern_values(obj['pattern'])
+    elif object_type in _STIX_VALUE_TYPES:
+        if isinstance(obj.get('value'), str):
+            yield obj['value']
+    elif object_type == 'url':
+        if isinstance(obj.get('value'), str):
+            yield _url_host(obj['value'])
+    elif object_type == 'file':
+        hashes = obj.get('hashes')
+        if isinstance(hashes, dict):
+            yield from (value for value in hashes.values() if isinstance(value, str))
+
+def misp_attribute_values(attribute: Dict[str, Any]) -> Iterator[str]:
+    """
+    Indicator values of one MISP attribute
+    
+    Composite types such as 'domain|ip' or 'filename|sha256' hold one
+    value per part; only parts of indicator types are kept, so file
+    names and ports are dropped. URL attributes yield their host.
+    Attributes without a type are passed through for classification.
+    """
+    value = attribute.get('value')
+    if not isinstance(value, str):
+        return
+        
+    attribute_type = attribute.get('type')
+    if not attribute_type:
+        yield value
+        return
+        
+    types = attribute_type.split('|')
+    parts = value.split('|') if len(types) > 1 else [value]
+    for part_type, part in zip(types, parts):
+        if part_type in _MISP_VALUE_TYPES:
+            yield part
+        elif part_type in _MISP_URL_TYPES:
+            yield _url_host(part)
+
+def misp_event_values(event: Dict[str, Any]) -> Iterator[str]:
+    """Indicator values of a MISP event's attributes, including those inside objects"""
+    event = event.get('Event', event)
+    for attribute in event.get('Attribute') or []:
+        yield from misp_attribute_values(attribute)
+    for misp_object in event.get('Object') or []:
+        for attribute in misp_object.get('Attribute') or []:
+            yield from misp_attribute_values(attribute)
+
+def _is_stix_object(record: Dict[str, Any]) -> bool:
+    """Whether a record is a STIX object, judged by its type or a '<type>--' id"""
+    object_type = record.get('type')
+    if not isinstance(object_type, str):
+        return False
+    if object_type in _STIX_OBJECT_TYPES:
+        return True
+    stix_id = record.get('id')
+    return isinstance(stix_id, str) and stix_id.startswith(f"{object_type}--")
+
+def record_values(record: Any) -> Iterator[str]:
+    """
+    Indicator values of one NDJSON record
+    
+    A record may be a bare IOC string, a STIX object, a MISP event or
+    attribute, or an object with an 'ioc', 'indicator' or 'value' field.
+    """
+    if isinstance(record, str):
+        yield record
+        return
+    if not isinstance(record, dict):
+        return
+        
+    if 'Event' in record:
+        yield from misp_event_values(record)
+    elif 'spec_version' in record or _is_stix_object(record):
+        yield from stix_object_values(record)
+    elif 'value' in record and 'type' in record:
+        yield from misp_attribute_values(record)
+    else:
+        for field in ('ioc', 'indicator', 'value'):
+            if isinstance(record.get(field), str):
+                yield record[field]
+                return
@@ -1,99 +1,438 @@
 import csv
+import gzip
+import io
 import json
 from pathlib import Path
-from typing import List, Dict, Union, Any
+from itertools import chain
+from typing import List, Dict, Union, Any, Callable, Iterable, Iterator, IO, Optional, Tuple
+from .dedup import Deduplicator
+from .feeds import misp_attribute_values, misp_event_values, record_values, stix_object_values
 from .ioc_utils import IOCClassifier
 
+# Optional zstd support for compressed feeds
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Characters read per refill when streaming JSON
+_JSON_CHUNK = 64 * 1024
+
+_JSON_SHAPE_ERROR = "JSON must contain array of IOCs or object with 'iocs' field"
+
+# Compression is detected from the leading magic bytes, not the suffix
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_COMPRESSION_SUFFIXES = ('.gz', '.gzip', '.zst', '.zstd')
+
+_FORMAT_SUFFIXES = {'.json': 'json', '.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+INPUT_FORMATS = ('json', 'csv', 'ndjson', 'stix', 'misp')
+
+# Characters examined when sniffing a compressed file with no format suffix
+_SNIFF_CHARS = 64 * 1024
+
+def _open_text(path: Path, newline: Optional[str] = None) -> IO[str]:
+    """Open a file as text, decompressing gzip or zstd content on the fly"""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+        
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(path, 'rt', encoding='utf-8', newline=newline)
+    if magic == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError("zstd-compressed input requires the 'zstandard' package")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True)
+        return io.TextIOWrapper(reader, encoding='utf-8', newline=newline)
+    return open(path, 'r', newline=newline)
+
+class _JSONArrayStream:
+    """Incrementally decode the elements of a JSON array from a text file
+    
+    The input is either a top-level array or an object with an 'iocs'
+    array field; elements are decoded one at a time with raw_decode, so
+    only the current element and a read-ahead chunk are held in memory.
+    """
+    
+    _WHITESPACE = ' \t\n\r'
+    
+    def __init__(self, f: IO[str], chunk_size: int = _JSON_CHUNK):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        
+    def _fill(self) -> bool:
+        """Read another chunk, dropping consumed input; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+        
+    def _peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self._WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+                
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if not char or char not in chars:
+            raise ValueError(f"Invalid JSON file: expected one of {chars!r} at offset {self.pos}")
+        self.pos += 1
+        return char
+        
+    def _value(self) -> Any:
+        """Decode the next complete JSON value, reading more input as needed"""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise ValueError(f"Invalid JSON file: {e}")
+            # A number or literal ending at the buffer edge may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+            
+    def skip(self) -> None:
+        """Consume the next value without keeping it"""
+        self._value()
+        
+    def members(self) -> Iterator[str]:
+        """
+        Keys of the object at the current position, in document order
+        
+        After each key the caller must consume its value (with skip(),
+        elements() or a nested members()) before asking for the next key.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            yield key
+            if self._expect(',}') == '}':
+                return
+                
+    def elements(self) -> Iterator[Any]:
+        """Decode the elements of the array at the current position one at a time"""
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
+                
+    def __iter__(self) -> Iterator[Any]:
+        """Elements of a top-level array, or of an object's 'iocs' array"""
+        char = self._peek()
+        if char == '[':
+            yield from self.elements()
+            return
+        if char != '{':
+            if char in '"-0123456789tfn':
+                raise ValueError(_JSON_SHAPE_ERROR)
+            raise ValueError("Invalid JSON file: expected an array or object")
+            
+        for key in self.members():
+            if key == 'iocs':
+                if self._peek() != '[':
+                    raise ValueError("IOCs must be provided as a list")
+                yield from self.elements()
+                return
+            self.skip()
+        raise ValueError(_JSON_SHAPE_ERROR)
+
 class FileParser:
-    """Parse input files (CSV/JSON) and extract IOCs"""
+    """Parse input files (CSV, JSON, NDJSON, STIX 2.1, MISP; optionally gzip/zstd) and extract IOCs"""
     
     @staticmethod
-    def parse_file(file_path: Union[str, Path]) -> List[Dict[str, Any]]:
+    def parse_file(file_path: Union[str, Path], input_format: Optional[str] = None) -> List[Dict[str, Any]]:
         """Parse input file and return normalized IOCs with types"""
+        return list(FileParser.iter_file(file_path, input_format=input_format))
+        
+    @staticmethod
+    def iter_file(file_path: Union[str, Path], dedup: Optional[Deduplicator] = None,
+                  input_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream normalized IOCs from an input file one at a time
+        
+        The path and format are checked up front; the content is parsed
+        (and decompressed) lazily as the iterator is consumed, and
+        deduplication runs within a fixed memory budget, so memory stays
+        flat regardless of file size.
+        
+        Args:
+            file_path: Input file, optionally gzip- or zstd-compressed
+            dedup: Deduplicator to share across files (a private one if None)
+            input_format: One of INPUT_FORMATS, or None to detect it
+            
+        Returns:
+            Iterator of normalized IOC dictionaries, in file order
+        """
+        path, reader = FileParser._reader_for(file_path, input_format)
+        return FileParser._iter_normalized(reader(path), dedup)
+        
+    @staticmethod
+    def iter_files(file_paths: Iterable[Union[str, Path]], dedup: Optional[Deduplicator] = None,
+                   input_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream normalized IOCs from several files, deduplicated across all of them
+        
+        Every path is checked before any is read.
+        
+        Args:
+            file_paths: Input files, read in order
+            dedup: Deduplicator to use (a private one if None)
+            input_format: Format of every file, or None to detect each one
+            
+        Returns:
+            Iterator of normalized IOC dictionaries, in file order
+        """
+        readers = [FileParser._reader_for(file_path, input_format) for file_path in file_paths]
+        raw = chain.from_iterable(reader(path) for path, reader in readers)
+        return FileParser._iter_normalized(raw, dedup)
+        
+    @staticmethod
+    def detect_format(file_path: Union[str, Path]) -> str:
+        """
+        Detect an input file's format
+        
+        The suffix (ignoring a compression suffix) picks JSON, CSV or
+        NDJSON; JSON documents are then told apart from STIX bundles and
+        MISP events by their leading keys. Compressed files without a
+        format suffix are sniffed from their content.
+        
+        Raises:
+            ValueError: If the format can't be determined
+        """
         path = Path(file_path)
+        suffixes = [suffix.lower() for suffix in path.suffixes]
+        compressed = bool(suffixes) and suffixes[-1] in _COMPRESSION_SUFFIXES
+        if compressed:
+            suffixes.pop()
+            
+        input_format = _FORMAT_SUFFIXES.get(suffixes[-1]) if suffixes else None
+        if input_format is None:
+            if not compressed:
+                raise ValueError("Unsupported file format. Supported: JSON, CSV, NDJSON, "
+                                 "STIX 2.1 and MISP JSON, optionally gzip or zstd compressed.")
+            input_format = FileParser._sniff_format(path)
+            
+        if input_format == 'json':
+            input_format = FileParser._json_flavor(path)
+        return input_format
         
-        if not path.exists():
-            raise FileNotFoundError(f"Input file not found: {file_path}")
+    @staticmethod
+    def _sniff_format(path: Path) -> str:
+        """Guess JSON, NDJSON or CSV from the start of the content"""
+        with _open_text(path) as f:
+            head = f.read(_SNIFF_CHARS)
+        text = head.lstrip()
+        if not text or text[0] not in '[{':
+            return 'csv'
+            
+        # Several top-level values, one per line, make NDJSON
+        try:
+            _, end = json.JSONDecoder().raw_decode(text)
+        except json.JSONDecodeError:
+            return 'json'
+        return 'ndjson' if text[end:].strip() else 'json'
         
-        suffix = path.suffix.lower()
-        if suffix == '.json':
-            return FileParser._parse_json(path)
-        elif suffix == '.csv':
-            return FileParser._parse_csv(path)
-        else:
-            raise ValueError("Unsupported file format. Only JSON and CSV are supported.")
-
     @staticmethod
-    def _parse_json(file_path: Path) -> List[Dict[str, Any]]:
-        """Parse JSON input file"""
-        with open(file_path, 'r') as f:
+    def _json_flavor(path: Path) -> str:
+        """Tell a plain IOC list from a STIX bundle or MISP export by its leading keys"""
+        with _open_text(path) as f:
+            stream = _JSONArrayStream(f)
             try:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    if 'iocs' in data:
-                        iocs = data['iocs']
+                char = stream._peek()
+                if char == '[':
+                    # A list of {"Event": ...} objects is a MISP export
+                    stream.pos += 1
+                    if stream._peek() == '{':
+                        for key in stream.members():
+                            return 'misp' if key == 'Event' else 'json'
+                    return 'json'
+                if char != '{':
+                    return 'json'
+                    
+                for key in stream.members():
+                    if key in ('Event', 'response'):
+                        return 'misp'
+                    if key == 'objects':
+                        return 'stix'
+                    if key == 'iocs':
+                        return 'json'
+                    if key == 'type':
+                        if stream._value() == 'bundle':
+                            return 'stix'
                     else:
-                        raise ValueError("JSON must contain array of IOCs or object with 'iocs' field")
-                elif isinstance(data, list):
-                    iocs = data
-                else:
-                    raise ValueError("JSON must contain array of IOCs or object with 'iocs' field")
+                        stream.skip()
+            except ValueError:
+                # Malformed documents are reported by the reader
+                pass
+        return 'json'
+        
+    @staticmethod
+    def _reader_for(file_path: Union[str, Path],
+                    input_format: Optional[str] = None) -> Tuple[Path, Callable[[Path], Iterator[Any]]]:
+        """Check an input path and pick the raw value reader for its format"""
+        path = Path(file_path)
+        
+        if not path.exists():
+            raise FileNotFoundError(f"Input file not found: {file_path}")
+            
+        if input_format is None:
+            input_format = FileParser.detect_format(path)
+        elif input_format not in INPUT_FORMATS:
+            raise ValueError(f"Unsupported input format: {input_format}. "
+                             f"Supported: {', '.join(INPUT_FORMATS)}")
+                             
+        readers = {
+            'json': FileParser._iter_json,
+            'csv': FileParser._iter_csv,
+            'ndjson': FileParser._iter_ndjson,
+            'stix': FileParser._iter_stix,
+            'misp': FileParser._iter_misp
+        }
+        return path, readers[input_format]
+        
+    @staticmethod
+    def _iter_json(file_path: Path) -> Iterator[Any]:
+        """Stream raw IOC values from a JSON array or an object's 'iocs' array"""
+        with _open_text(file_path) as f:
+            yield from _JSONArrayStream(f)
+            
+    @staticmethod
+    def _iter_csv(file_path: Path) -> Iterator[str]:
+        """Stream raw IOC values from the first column of a CSV file"""
+        with _open_text(file_path, newline='') as f:
+            for row in csv.reader(f):
+                # A header row doesn't classify as an IOC and is dropped during normalization
+                if row and row[0].strip():
+                    yield row[0]
+                    
+    @staticmethod
+    def _iter_ndjson(file_path: Path) -> Iterator[str]:
+        """Stream raw IOC values from one JSON record per line"""
+        with _open_text(file_path) as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid NDJSON record on line {line_number}: {e}")
+                yield from record_values(record)
                 
-                if not isinstance(iocs, list):
-                    raise ValueError("IOCs must be provided as a list")
+    @staticmethod
+    def _iter_stix(file_path: Path) -> Iterator[str]:
+        """Stream indicator values from the objects of a STIX 2.1 bundle"""
+        with _open_text(file_path) as f:
+            stream = _JSONArrayStream(f)
+            for key in stream.members():
+                if key != 'objects':
+                    stream.skip()
+                    continue
+                for obj in stream.elements():
+                    if isinstance(obj, dict):
+                        yield from stix_object_values(obj)
+                        
+    @staticmethod
+    def _iter_misp(file_path: Path) -> Iterator[str]:
+        """
+        Stream attribute values from a MISP export
+        
+        Accepts a single {"Event": ...} document, a REST {"response": [...]}
+        wrapper, or a list of events. A single event's attribute lists are
+        streamed, so large events aren't loaded whole.
+        """
+        with _open_text(file_path) as f:
+            stream = _JSONArrayStream(f)
+            if stream._peek() == '[':
+                for event in stream.elements():
+                    if isinstance(event, dict):
+                        yield from misp_event_values(event)
+                return
                 
-                return FileParser._normalize_iocs(iocs)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON file: {e}")
-
+            for key in stream.members():
+                if key == 'Event':
+                    yield from FileParser._stream_misp_event(stream)
+                elif key == 'response':
+                    for event in stream.elements():
+                        if isinstance(event, dict):
+                            yield from misp_event_values(event)
+                else:
+                    stream.skip()
+                    
     @staticmethod
-    def _parse_csv(file_path: Path) -> List[Dict[str, Any]]:
-        """Parse CSV input file"""
-        with open(file_path, 'r') as f:
-            reader = csv.reader(f)
-            try:
-                # Skip header row if it exists
-                first_row = next(reader)
-                try:
-                    # Check if first row contains an IOC
-                    IOCClassifier.classify(first_row[0])
-                    iocs = [first_row[0]] + [row[0] for row in reader if row and row[0].strip()]
-                except:
-                    # Assume first row was header
-                    iocs = [row[0] for row in reader if row and row[0].strip()]
-            except StopIteration:
-                iocs = []
-            except IndexError as e:
-                raise ValueError(f"Invalid CSV format: {e}")
-        
-        return FileParser._normalize_iocs(iocs)
-
+    def _stream_misp_event(stream: _JSONArrayStream) -> Iterator[str]:
+        """Attribute values of the event object at the stream's position"""
+        for key in stream.members():
+            if key == 'Attribute':
+                for attribute in stream.elements():
+                    if isinstance(attribute, dict):
+                        yield from misp_attribute_values(attribute)
+            elif key == 'Object':
+                for misp_object in stream.elements():
+                    if isinstance(misp_object, dict):
+                        for attribute in misp_object.get('Attribute') or []:
+                            yield from misp_attribute_values(attribute)
+            else:
+                stream.skip()
+                
     @staticmethod
-    def _normalize_iocs(raw_iocs: List[str]) -> List[Dict[str, Any]]:
+    def _normalize_iocs(raw_iocs: Iterable[str]) -> List[Dict[str, Any]]:
         """Normalize and classify IOCs"""
-        normalized = []
-        seen = set()
+        return list(FileParser._iter_normalized(raw_iocs))
         
-        for ioc in raw_iocs:
-            if not ioc or not isinstance(ioc, str):
-                continue
-            
-            # Classify and normalize the IOC
-            classified = IOCClassifier.classify(ioc.strip())
-            if not classified:
-                continue
-            
-            ioc_type, normalized_ioc = classified
-            
-            # Deduplicate
-            if normalized_ioc in seen:
-                continue
-            seen.add(normalized_ioc)
-            
-            normalized.append({
-                'original': ioc,
-                'ioc': normalized_ioc,
-                'type': ioc_type
-            })
+    @staticmethod
+    def _iter_normalized(raw_iocs: Iterable[Any], dedup: Optional[Deduplicator] = None) -> Iterator[Dict[str, Any]]:
+        """Classify, normalize and deduplicate raw IOC values lazily"""
+        owned = dedup is None
+        dedup = dedup or Deduplicator()
         
-        return normalized
\ No newline at end of file
+        try:
+            for ioc in raw_iocs:
+                if not ioc or not isinstance(ioc, str):
+                    continue
+                    
+                # Classify and normalize the IOC
+                classified = IOCClassifier.classify(ioc)
+                if not classified:
+                    continue
+                    
+                ioc_type, normalized_ioc = classified
+                
+                # Deduplicate
+                if not dedup.add(normalized_ioc):
+                    continue
+                    
+                yield {
+                    'original': ioc,
+                    'ioc': normalized_ioc,
+                    'type': ioc_type
+                }
+        finally:
+            if owned:
+                dedup.close()
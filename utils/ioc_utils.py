@@ -1,8 +1,26 @@
+import ipaddress
 import re
-from typing import Dict, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
+
+# Patterns are compiled once at import; classify() picks at most one or two of them
+_IPV4_RE = re.compile(r'(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)')
+_DOMAIN_RE = re.compile(r'(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}')
+
+# MD5, SHA1 and SHA256 hex digest lengths
+_HASH_LENGTHS = frozenset((32, 40, 64))
+_HEX_DIGITS = '0123456789abcdef'
+
+# Longest IPv4 (15) and IPv6 (45, with an embedded IPv4 tail) text forms
+_IPV4_MAX_LEN = 15
+_IPV6_MAX_LEN = 45
 
 class IOCClassifier:
-    """Classify and normalize IOCs (IP, domain, hash)"""
+    """Classify and normalize IOCs (IP, domain, hash)
+    
+    Dispatches on cheap features (a ':' means IPv6, a '.' means IPv4 or
+    domain, otherwise a hex string of digest length means hash) so each
+    input runs at most two precompiled patterns.
+    """
     
     @staticmethod
     def classify(ioc: str) -> Optional[Tuple[str, str]]:
@@ -11,60 +29,72 @@ class IOCClassifier:
         Returns: (type, normalized_ioc) or None if invalid
         """
         ioc = ioc.strip()
+        if not ioc:
+            return None
+            
+        # Only IPv6 addresses contain colons
+        if ':' in ioc:
+            return IOCClassifier._classify_ip(ioc)
+            
+        if '.' in ioc:
+            # IPv4 first: dotted quads would otherwise never match a domain anyway
+            if len(ioc) <= _IPV4_MAX_LEN and ioc[0].isdigit() and _IPV4_RE.fullmatch(ioc):
+                return ('ip', ioc)
+            if _DOMAIN_RE.fullmatch(ioc):
+                return ('domain', ioc.lower())
+            return None
+            
+        # Hashes: digest length and nothing left after stripping hex digits
+        if len(ioc) in _HASH_LENGTHS:
+            ioc = ioc.lower()
+            if not ioc.strip(_HEX_DIGITS):
+                return ('hash', ioc)
+        return None
         
-        # Check for IP address (IPv4 or IPv6)
-        if ip_type := IOCClassifier._classify_ip(ioc):
-            return ip_type
-        
-        # Check for domain
-        if domain := IOCClassifier._classify_domain(ioc):
-            return ('domain', domain.lower())
+    @staticmethod
+    def classify_many(iocs: Iterable[str]) -> List[Optional[Tuple[str, str]]]:
+        """
+        Classify a batch of IOCs, e.g. a chunk of lines from a parallel parser
         
-        # Check for hash
-        if hash_type := IOCClassifier._classify_hash(ioc):
-            return hash_type
+        Args:
+            iocs: Raw IOC strings
+            
+        Returns:
+            One (type, normalized_ioc) or None per input, in order
+        """
+        classify = IOCClassifier.classify
+        return [classify(ioc) for ioc in iocs]
         
-        return None
-
     @staticmethod
     def _classify_ip(ioc: str) -> Optional[Tuple[str, str]]:
-        """Classify IPv4 or IPv6 address"""
-        # IPv4 regex
-        ipv4_re = r'^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$'
-        if re.fullmatch(ipv4_re, ioc):
+        """Classify IPv4 or IPv6 address (IPv6 in any valid form, including '::')"""
+        if len(ioc) <= _IPV4_MAX_LEN and _IPV4_RE.fullmatch(ioc):
             return ('ip', ioc)
+            
+        # Zone indices ('%eth0') are host-local, not indicators
+        if len(ioc) > _IPV6_MAX_LEN or '%' in ioc:
+            return None
+        try:
+            ipaddress.IPv6Address(ioc)
+        except ValueError:
+            return None
+        return ('ip', ioc.lower())
         
-        # IPv6 regex (simplified)
-        ipv6_re = r'^([0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}$'
-        if re.fullmatch(ipv6_re, ioc):
-            return ('ip', ioc.lower())
-        
-        return None
-
     @staticmethod
     def _classify_domain(ioc: str) -> Optional[str]:
         """Validate and normalize domain"""
-        # Simple domain regex - adjust as needed
-        domain_re = r'^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}$'
-        if re.fullmatch(domain_re, ioc):
+        if _DOMAIN_RE.fullmatch(ioc):
             return ioc.lower()
         return None
-
+        
     @staticmethod
     def _classify_hash(ioc: str) -> Optional[Tuple[str, str]]:
         """Classify hash type (MD5, SHA1, SHA256)"""
+        if len(ioc) not in _HASH_LENGTHS:
+            return None
+            
         ioc = ioc.lower()
-        
-        # MD5 (32 hex chars)
-        if re.fullmatch(r'^[a-f0-9]{32}$', ioc):
-            return ('hash', ioc)
-        
-        # SHA1 (40 hex chars)
-        if re.fullmatch(r'^[a-f0-9]{40}$', ioc):
-            return ('hash', ioc)
-        
-        # SHA256 (64 hex chars)
-        if re.fullmatch(r'^[a-f0-9]{64}$', ioc):
-            return ('hash', ioc)
-        
-        return None
\ No newline at end of file
+        # Stripping every hex digit leaves nothing only for an all-hex string
+        if ioc.strip(_HEX_DIGITS):
+            return None
+        return ('hash', ioc)
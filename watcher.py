@@ -4,6 +4,11 @@ import sys
 import subprocess
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from cache.db import CacheDB
+from cache.maintenance import CacheMaintainer
+from config import settings
+from enrichers.manager import EnrichmentManager
+from enrichers.refresher import RefreshAhead
 
 # The directory to watch for new files
 WATCH_DIRECTORY = "watch"
@@ -22,7 +27,9 @@ class MyHandler(FileSystemEventHandler):
             command = [
                 venv_python, "main.py", "enrich", file_path,
                 "--output-format", "json",
-                "--output-file", f"output/auto_enriched_{os.path.basename(file_path)}.json"
+                "--output-file", f"output/auto_enriched_{os.path.basename(file_path)}.json",
+                # Each file extends the persistent cluster graph
+                "--graph"
             ]
             
             try:
@@ -49,6 +56,18 @@ if __name__ == "__main__":
     observer = Observer()
     observer.schedule(event_handler, WATCH_DIRECTORY, recursive=False)
     
+    # Keep the shared cache bounded while the watcher runs
+    maintainer = None
+    if settings.CACHE_ENABLED and settings.CACHE_BACKEND == 'sqlite':
+        maintainer = CacheMaintainer(CacheDB())
+        maintainer.start()
+    
+    # Re-enrich hot IOCs before they expire, using spare provider budget
+    refresher = None
+    if settings.CACHE_ENABLED and settings.CACHE_REFRESH_ENABLED:
+        refresher = RefreshAhead(EnrichmentManager())
+        refresher.start()
+        
     print(f"👀 Watching directory '{WATCH_DIRECTORY}' for new files...")
     observer.start()
 
@@ -57,4 +76,8 @@ if __name__ == "__main__":
             time.sleep(1)
     except KeyboardInterrupt:
         observer.stop()
-    observer.join()
\ No newline at end of file
+        if maintainer:
+            maintainer.stop()
+        if refresher:
+            refresher.stop()
+    observer.join()